@@ -2,12 +2,17 @@
 
 import streamlit as st
 
+from sysmon.core.instrument import span
+from sysmon.core.tracing import start_from_env
+from sysmon.ui import debug_panel
+
 st.set_page_config(
     page_title="SysMon 系統查詢",
     page_icon="🖥️",
     layout="wide",
     initial_sidebar_state="expanded",
 )
+start_from_env()  # 設定 SYSMON_TRACE 時匯出 span（每個行程只啟動一次）
 
 # ── 側邊欄 API Key 設定 ────────────────────────────────────────────────────────
 with st.sidebar:
@@ -48,6 +53,8 @@ with st.sidebar:
         )
         st.caption("[取得 API Key](https://www.virustotal.com/gui/my-apikey)")
 
+    debug_panel()
+
     st.divider()
     st.caption("v0.1.0 · 繁體中文介面")
     st.caption("© 2024 SysMon")
@@ -66,4 +73,5 @@ pages = [
 ]
 
 pg = st.navigation(pages)
-pg.run()
+with span("page.run", target=pg.title):
+    pg.run()
@@ -0,0 +1 @@
+"""效能基準測試（不屬於 tests/，需手動執行；見 README「效能基準」）"""
@@ -0,0 +1,278 @@
+"""
+微基準共用 fixture：所有網路工具都對本機伺服器量測，不依賴外部網路
+
+    tcp_listeners   本機開放的 TCP 連接埠與一組確定關閉的連接埠
+    dns_stub        UDP DNS 伺服器（任何名稱都回答 A 記錄），query_dns 改向此伺服器查詢
+    http_server     回傳小型 HTML 頁面的 HTTP 伺服器
+    tls_server      使用自簽憑證的 TLS 伺服器（憑證透過 SSL_CERT_FILE 設為信任）
+
+基準紀錄存於 benchmarks/baselines/<主機>-<CPU>/<平台>/（pytest-benchmark 格式），與執行時的工作目錄無關；
+只有加上 --benchmark-gate 才與同一台機器最新的紀錄比較，並只檢查不經網路的 CPU 密集群組。
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import ipaddress
+import platform
+import re
+import socket
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Iterator
+
+import pytest
+
+BASELINES = Path(__file__).resolve().parent / "baselines"
+# 回歸門檻只套用在不經網路、結果穩定的 CPU 密集群組；本機網路群組的波動遠大於門檻
+GATED_GROUPS = ("subnet-calc", "subnet-split", "instrument")
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    parser.addoption(
+        "--benchmark-gate", action="store_true",
+        help=f"只執行 {', '.join(GATED_GROUPS)} 群組，並與本機最新的基準比較（--benchmark-compare-fail 的門檻）",
+    )
+
+
+def host_key() -> str:
+    """基準目錄的主機識別：主機名稱、CPU 型號與核心數（同為 Linux CPython 3.12 的機器不會共用基準）"""
+    import cpuinfo
+
+    info = cpuinfo.get_cpu_info() or {}
+    key = f"{platform.node()}-{info.get('brand_raw') or platform.machine()}-{info.get('count', 0)}cpu"
+    return re.sub(r"[^a-z0-9]+", "-", key.lower()).strip("-")
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config: pytest.Config) -> None:
+    """
+    固定基準目錄為本機專屬的子目錄。預設只量測；--benchmark-gate 時與本機最新的紀錄比較，
+    沒有本機紀錄時只量測不比較（否則 --benchmark-compare-fail 會中止執行）。
+    """
+    from pytest_benchmark.utils import get_machine_id
+
+    if config.option.benchmark_storage == "file://./.benchmarks":
+        config.option.benchmark_storage = f"file://{BASELINES / host_key()}"
+    storage = config.option.benchmark_storage
+    has_baseline = not storage.startswith("file://") or any(
+        (Path(storage.removeprefix("file://")) / get_machine_id()).glob("*.json")
+    )
+    if config.getoption("benchmark_gate") and has_baseline:
+        config.option.benchmark_compare = config.option.benchmark_compare or True
+    else:
+        # 手動加上 --benchmark-compare 時只顯示差異，不判定失敗
+        config.option.benchmark_compare_fail = None
+
+
+def pytest_collection_modifyitems(config: pytest.Config, items: list[pytest.Item]) -> None:
+    """--benchmark-gate 時取消選取不在 GATED_GROUPS 的基準"""
+    if not config.getoption("benchmark_gate"):
+        return
+    selected, deselected = [], []
+    for item in items:
+        marker = item.get_closest_marker("benchmark")
+        (selected if marker and marker.kwargs.get("group") in GATED_GROUPS else deselected).append(item)
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+
+
+def _serve(server: socketserver.BaseServer) -> threading.Thread:
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    return thread
+
+
+def _free_ports(count: int) -> list[int]:
+    """取得 count 個目前未被使用的連接埠（綁定後立即釋放，之後連線會被拒絕）"""
+    socks = []
+    for _ in range(count):
+        s = socket.socket()
+        s.bind(("127.0.0.1", 0))
+        socks.append(s)
+    ports = [s.getsockname()[1] for s in socks]
+    for s in socks:
+        s.close()
+    return ports
+
+
+# ── TCP ────────────────────────────────────────────────────────────────────────
+@pytest.fixture(scope="session")
+def tcp_listeners() -> Iterator[dict[str, list[int]]]:
+    """20 個開放（listen 中）與 80 個關閉的本機連接埠；連線由背景執行緒接受後立即關閉"""
+    import selectors
+
+    sel = selectors.DefaultSelector()
+    socks = []
+    for _ in range(20):
+        s = socket.socket()
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        s.bind(("127.0.0.1", 0))
+        s.listen(128)
+        s.setblocking(False)
+        sel.register(s, selectors.EVENT_READ)
+        socks.append(s)
+    stop = threading.Event()
+
+    def accept_loop() -> None:
+        while not stop.is_set():
+            for key, _ in sel.select(timeout=0.05):
+                try:
+                    conn, _ = key.fileobj.accept()
+                    conn.close()
+                except BlockingIOError:
+                    pass
+
+    thread = threading.Thread(target=accept_loop, daemon=True)
+    thread.start()
+    opened = [s.getsockname()[1] for s in socks]
+    closed = [p for p in _free_ports(80) if p not in opened]
+    yield {"open": opened, "closed": closed}
+    stop.set()
+    thread.join()
+    for s in socks:
+        s.close()
+
+
+# ── DNS ────────────────────────────────────────────────────────────────────────
+class _DNSHandler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        import dns.message
+        import dns.rrset
+
+        data, sock = self.request
+        query = dns.message.from_wire(data)
+        response = dns.message.make_response(query)
+        question = query.question[0]
+        response.answer.append(dns.rrset.from_text(question.name, 300, "IN", "A", "192.0.2.10", "192.0.2.11"))
+        sock.sendto(response.to_wire(), self.client_address)
+
+
+@pytest.fixture(scope="session")
+def _dns_server() -> Iterator[int]:
+    server = socketserver.ThreadingUDPServer(("127.0.0.1", 0), _DNSHandler)
+    server.daemon_threads = True
+    _serve(server)
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def dns_stub(_dns_server: int, monkeypatch: pytest.MonkeyPatch) -> str:
+    """回傳 DNS 伺服器位址；query_dns 建立的 resolver 改用 stub 的連接埠"""
+    from sysmon.core import dns_tools
+
+    make_resolver = dns_tools._make_resolver
+
+    def local_resolver(dns_server: str | None = None) -> Any:
+        resolver = make_resolver(dns_server)
+        resolver.port = _dns_server
+        return resolver
+
+    monkeypatch.setattr(dns_tools, "_make_resolver", local_resolver)
+    return "127.0.0.1"
+
+
+# ── HTTP ───────────────────────────────────────────────────────────────────────
+_PAGE = (
+    b"<!doctype html><html><head><title>sysmon benchmark</title></head><body>"
+    + b"<p>lorem ipsum dolor sit amet</p>" * 200
+    + b"</body></html>"
+)
+
+
+class _HTTPHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(_PAGE)))
+        self.send_header("Server", "sysmon-bench")
+        self.end_headers()
+        self.wfile.write(_PAGE)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+@pytest.fixture(scope="session")
+def http_server() -> Iterator[str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _HTTPHandler)
+    server.daemon_threads = True
+    _serve(server)
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+# ── TLS ────────────────────────────────────────────────────────────────────────
+def _self_signed(directory: Any) -> tuple[str, str]:
+    """產生 localhost 的自簽憑證（同時作為信任的根憑證），回傳 (cert_path, key_path)"""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = dt.datetime.now(dt.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - dt.timedelta(days=1))
+        .not_valid_after(now + dt.timedelta(days=30))
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .add_extension(
+            x509.SubjectAlternativeName([
+                x509.DNSName("localhost"), x509.IPAddress(ipaddress.ip_address("127.0.0.1")),
+            ]),
+            critical=False,
+        )
+        .sign(key, hashes.SHA256())
+    )
+    cert_path, key_path = directory / "cert.pem", directory / "key.pem"
+    cert_path.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption(),
+    ))
+    return str(cert_path), str(key_path)
+
+
+class _TLSHandler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        try:
+            with self.server.context.wrap_socket(self.request, server_side=True) as tls:
+                tls.recv(1)
+        except OSError:
+            pass
+
+
+@pytest.fixture(scope="session")
+def _tls_server(tmp_path_factory: pytest.TempPathFactory) -> Iterator[tuple[int, str]]:
+    import ssl
+
+    cert, key = _self_signed(tmp_path_factory.mktemp("tls"))
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _TLSHandler)
+    server.daemon_threads = True
+    server.context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    server.context.load_cert_chain(cert, key)
+    _serve(server)
+    yield server.server_address[1], cert
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def tls_server(_tls_server: tuple[int, str], monkeypatch: pytest.MonkeyPatch) -> int:
+    """回傳 TLS 伺服器連接埠（主機為 localhost）；量測期間只信任其自簽憑證"""
+    port, cert = _tls_server
+    monkeypatch.setenv("SSL_CERT_FILE", cert)
+    return port
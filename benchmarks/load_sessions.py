@@ -0,0 +1,342 @@
+"""
+Web 介面多使用者負載基準：以 Streamlit AppTest 模擬同時操作頁面的使用者
+
+每位模擬使用者各自持有一個 AppTest（獨立的 session_state），依序執行一組頁面操作
+（DNS、WHOIS、SSL、子網路計算輪流分配），所有使用者在各自的執行緒中同時進行。
+網路後端以固定延遲的假函式取代，結果只反映應用本身（頁面重跑、快取、工作執行緒）的負擔。
+
+每個使用者數量等級量測：
+    - 重跑延遲：每次 AppTest.run() 的 p50 / p95 / 最大值（毫秒）
+    - 吞吐量：每秒完成的重跑次數
+    - 每 session 記憶體：所有 session 仍存活時的 RSS 增量 / 使用者數
+
+用法（於專案根目錄）：
+    python -m benchmarks.load_sessions                      # 顯示結果
+    python -m benchmarks.load_sessions --save               # 更新基準檔
+    python -m benchmarks.load_sessions --check              # 與基準比較，退步超過容許值時結束碼為 1
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+import psutil
+
+ROOT = Path(__file__).resolve().parents[1]
+PAGES = ROOT / "pages"
+BASELINE = Path(__file__).resolve().parent / "baselines" / "load_sessions.json"
+
+DEFAULT_USERS = (1, 5, 10, 25)
+# 與基準相比允許的退步比例（延遲、記憶體可增加、吞吐量可減少的幅度）
+DEFAULT_TOLERANCE = 0.5
+# RSS 增量在 session 數少時雜訊大，每 session 記憶體增加不到此值（MB）時不視為退步
+MEMORY_SLACK_MB = 1.0
+
+
+# ── 假網路後端 ─────────────────────────────────────────────────────────────────
+def _install_backends(latency_s: float) -> None:
+    """以固定延遲的假函式取代頁面使用的網路查詢（頁面每次重跑時才 import，直接替換模組屬性即可）"""
+    import sysmon.core.dns_tools as dns_tools
+    import sysmon.core.ssl_tools as ssl_tools
+    import sysmon.core.whois_tools as whois_tools
+
+    def query_dns(domain: str, record_type: str = "A", dns_server: str | None = None) -> dict[str, Any]:
+        time.sleep(latency_s)
+        return {"domain": domain, "type": record_type, "records": ["192.0.2.10", "192.0.2.11"], "ttl": 300}
+
+    def query_whois(target: str) -> dict[str, Any]:
+        time.sleep(latency_s)
+        return {
+            "type": "domain", "domain": target, "registrar": "Example Registrar", "org": "Example Org",
+            "country": "TW", "creation_date": "2000-01-01", "expiration_date": "2030-01-01",
+            "updated_date": "2024-01-01", "status": ["clientTransferProhibited"],
+            "name_servers": ["ns1.example.net", "ns2.example.net"], "emails": [], "raw": "Domain Name: " + target,
+        }
+
+    def query_ssl(hostname: str, port: int = 443) -> dict[str, Any]:
+        time.sleep(latency_s)
+        return {
+            "hostname": hostname, "port": port, "subject": {"commonName": hostname},
+            "issuer": {"commonName": "Example CA", "organizationName": "Example"},
+            "serial_number": "0x1", "not_before": "2024-01-01 00:00:00 UTC", "not_after": "2030-01-01 00:00:00 UTC",
+            "days_left": 1000, "san": [hostname, f"www.{hostname}"], "signature_algorithm": "1.2.840.113549.1.1.11",
+            "version": "v3", "is_expired": False, "is_expiring_soon": False,
+        }
+
+    dns_tools.query_dns = query_dns
+    whois_tools.query_whois = query_whois
+    ssl_tools.query_ssl = query_ssl
+
+
+def _clear_caches() -> None:
+    from sysmon.core.cache import tool_cache
+
+    for tool in ("dns", "whois", "ssl"):
+        tool_cache(tool).clear()
+
+
+@contextmanager
+def _concurrent_apptest() -> Iterator[None]:
+    """
+    AppTest 假設同一時間只有一個腳本在執行：每次 run() 設定全域 Runtime 實例、結束時清為 None，
+    多個 session 同時重跑時會讓其他仍在執行的腳本找不到 Runtime。
+    量測期間忽略清除動作（各 run 設定的模擬 Runtime 功能相同，保留最後一個即可），結束後還原。
+    """
+    from streamlit.runtime import Runtime
+    from streamlit.testing.v1 import app_test
+
+    class _KeepInstance(type):
+        def __setattr__(cls, name: str, value: Any) -> None:
+            if name == "_instance":
+                if value is not None:
+                    Runtime._instance = value
+                return
+            super().__setattr__(name, value)
+
+    class _SharedRuntime(Runtime, metaclass=_KeepInstance):
+        pass
+
+    app_test.Runtime = _SharedRuntime
+    try:
+        yield
+    finally:
+        app_test.Runtime = Runtime
+        Runtime._instance = None
+
+
+# ── 使用者操作腳本 ─────────────────────────────────────────────────────────────
+# 每個步驟對 AppTest 設定輸入後回傳，由呼叫端計時 run()；第一步為開啟頁面
+Step = Callable[[Any], None]
+
+
+def _dns_steps(target: str) -> list[Step]:
+    return [
+        lambda at: None,
+        lambda at: (at.text_input(key="dns_domain").set_value(target), at.button(key="dns_query_btn").click()),
+        lambda at: at.selectbox(key="dns_rtype").set_value("MX"),
+        lambda at: at.selectbox(key="dns_rtype").set_value("A"),   # 快取命中
+    ]
+
+
+def _whois_steps(target: str) -> list[Step]:
+    return [
+        lambda at: None,
+        lambda at: (at.text_input[0].set_value(target), at.button[0].click()),
+        lambda at: None,                                            # 其他互動造成的重跑（快取命中）
+    ]
+
+
+def _ssl_steps(target: str) -> list[Step]:
+    return [
+        lambda at: None,
+        lambda at: (at.text_input[0].set_value(target), at.button[0].click()),
+        lambda at: None,
+    ]
+
+
+def _subnet_steps(target: str) -> list[Step]:
+    octet = sum(map(ord, target)) % 256
+    return [
+        lambda at: None,
+        lambda at: (at.text_input[0].set_value(f"10.{octet}.0.0/16"), at.button[0].click()),
+        lambda at: None,
+    ]
+
+
+SCENARIOS: dict[str, tuple[str, Callable[[str], list[Step]]]] = {
+    "dns": ("3_dns.py", _dns_steps),
+    "whois": ("4_whois.py", _whois_steps),
+    "ssl": ("5_ssl.py", _ssl_steps),
+    "subnet": ("8_subnet.py", _subnet_steps),
+}
+
+
+def _target(user: int, round_no: int, shared_ratio: float) -> str:
+    """依 shared_ratio 決定查詢熱門目標（各 session 共用快取）或該使用者專屬的目標"""
+    if (user * 37 + round_no * 11) % 100 < shared_ratio * 100:
+        return "example.com"
+    return f"user{user}-r{round_no}.example.com"
+
+
+# ── 量測 ───────────────────────────────────────────────────────────────────────
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run_level(users: int, rounds: int, shared_ratio: float, timeout: float) -> dict[str, Any]:
+    """以 users 位同時操作的使用者執行一輪量測"""
+    from streamlit.testing.v1 import AppTest
+
+    _clear_caches()
+    gc.collect()
+    proc = psutil.Process()
+    rss_before = proc.memory_info().rss
+
+    names = list(SCENARIOS)
+    sessions: list[Any] = [None] * users
+    latencies: list[list[float]] = [[] for _ in range(users)]
+    errors: list[str] = []
+    barrier = threading.Barrier(users)
+
+    def user(i: int) -> None:
+        page, steps_of = SCENARIOS[names[i % len(names)]]
+        at = AppTest.from_file(str(PAGES / page), default_timeout=timeout)
+        sessions[i] = at
+        barrier.wait()
+        for r in range(rounds):
+            for step in steps_of(_target(i, r, shared_ratio)):
+                step(at)
+                start = time.perf_counter()
+                at.run()
+                latencies[i].append((time.perf_counter() - start) * 1000)
+                if at.exception:
+                    errors.append(f"{page}: {at.exception[0].message}")
+
+    threads = [threading.Thread(target=user, args=(i,), name=f"user-{i}") for i in range(users)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+
+    # session 仍存活時量測記憶體，之後才釋放
+    gc.collect()
+    rss_after = proc.memory_info().rss
+    sessions.clear()
+
+    flat = [v for per_user in latencies for v in per_user]
+    return {
+        "users": users,
+        "reruns": len(flat),
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(flat) / wall, 2),
+        "latency_ms": {
+            "p50": round(statistics.median(flat), 1),
+            "p95": round(_percentile(flat, 95), 1),
+            "max": round(max(flat), 1),
+        },
+        "rss_per_session_mb": round(max(0, rss_after - rss_before) / users / 2**20, 2),
+        "errors": errors[:5],
+    }
+
+
+def run(
+    levels: tuple[int, ...] = DEFAULT_USERS,
+    rounds: int = 2,
+    backend_ms: float = 50.0,
+    shared_ratio: float = 0.5,
+    timeout: float = 60.0,
+) -> dict[str, Any]:
+    _install_backends(backend_ms / 1000)
+    # 頁面的 use_container_width 棄用警告等會大量輸出，量測期間關閉
+    logging.disable(logging.WARNING)
+    with _concurrent_apptest():
+        # 先暖機一次：首次 import pandas / plotly 等的成本不計入第一個等級
+        run_level(1, 1, shared_ratio, timeout)
+        levels_out = [run_level(u, rounds, shared_ratio, timeout) for u in levels]
+    return {
+        "config": {"rounds": rounds, "backend_ms": backend_ms, "shared_ratio": shared_ratio},
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(terse=True),
+            "cpus": os.cpu_count(),
+        },
+        "levels": levels_out,
+    }
+
+
+# ── 基準比較 ───────────────────────────────────────────────────────────────────
+def compare(result: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """回傳超過容許值的退步項目（只比較兩邊都有的使用者數量等級）"""
+    base = {lvl["users"]: lvl for lvl in baseline["levels"]}
+    failures = []
+    for lvl in result["levels"]:
+        ref = base.get(lvl["users"])
+        if ref is None:
+            continue
+        checks = [
+            ("p95 延遲", lvl["latency_ms"]["p95"], ref["latency_ms"]["p95"], True),
+            ("吞吐量", lvl["throughput_rps"], ref["throughput_rps"], False),
+            ("每 session 記憶體", lvl["rss_per_session_mb"], ref["rss_per_session_mb"], True),
+        ]
+        for name, now, then, higher_is_worse in checks:
+            if then <= 0:
+                continue
+            if name == "每 session 記憶體" and now - then < MEMORY_SLACK_MB:
+                continue
+            ratio = now / then if higher_is_worse else then / max(now, 1e-9)
+            if ratio > 1 + tolerance:
+                failures.append(f"{lvl['users']} 位使用者 {name}：{then} → {now}（{ratio:.2f}x）")
+    return failures
+
+
+def _print(result: dict[str, Any]) -> None:
+    cfg = result["config"]
+    print(f"後端延遲 {cfg['backend_ms']} ms · 每位使用者 {cfg['rounds']} 輪 · 共用目標比例 {cfg['shared_ratio']}")
+    print(f"{'使用者':>6} {'重跑':>6} {'吞吐量/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'MB/session':>11}")
+    for lvl in result["levels"]:
+        lat = lvl["latency_ms"]
+        print(
+            f"{lvl['users']:>6} {lvl['reruns']:>6} {lvl['throughput_rps']:>10} "
+            f"{lat['p50']:>9} {lat['p95']:>9} {lat['max']:>9} {lvl['rss_per_session_mb']:>11}"
+        )
+        for err in lvl["errors"]:
+            print(f"       ⚠️ {err}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Streamlit 多使用者負載基準")
+    parser.add_argument("--users", default=",".join(map(str, DEFAULT_USERS)), help="使用者數量等級，逗號分隔")
+    parser.add_argument("--rounds", type=int, default=2, help="每位使用者重複操作的輪數")
+    parser.add_argument("--backend-ms", type=float, default=50.0, help="假網路後端的回應延遲（毫秒）")
+    parser.add_argument("--shared", type=float, default=0.5, help="查詢熱門共用目標的比例（0-1）")
+    parser.add_argument("--save", action="store_true", help=f"寫入基準檔 {BASELINE.relative_to(ROOT)}")
+    parser.add_argument("--check", action="store_true", help="與基準檔比較，退步超過容許值時結束碼為 1")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="容許的退步比例")
+    parser.add_argument("--json", action="store_true", help="以 JSON 輸出結果")
+    args = parser.parse_args(argv)
+
+    result = run(
+        tuple(int(u) for u in args.users.split(",") if u.strip()),
+        rounds=args.rounds, backend_ms=args.backend_ms, shared_ratio=args.shared,
+    )
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        _print(result)
+
+    if args.save:
+        BASELINE.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE.write_text(json.dumps(result, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"已寫入 {BASELINE.relative_to(ROOT)}", file=sys.stderr)
+
+    if args.check:
+        if not BASELINE.exists():
+            print(f"找不到基準檔 {BASELINE.relative_to(ROOT)}，請先以 --save 建立", file=sys.stderr)
+            return 2
+        failures = compare(result, json.loads(BASELINE.read_text(encoding="utf-8")), args.tolerance)
+        for f in failures:
+            print(f"❌ {f}", file=sys.stderr)
+        if failures:
+            return 1
+        print("✅ 未超過基準容許值", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""sysmon.core 熱點路徑微基準（pytest-benchmark；執行方式見 README「效能基準」）"""
+
+from __future__ import annotations
+
+import pytest
+
+from sysmon.core import dns_tools, instrument, port_scanner, ssl_tools, subnet_calc, system_info, tracing, web_tools
+
+
+# ── 網路工具（本機伺服器） ─────────────────────────────────────────────────────
+@pytest.mark.benchmark(group="scan")
+@pytest.mark.parametrize("max_workers", [16, 100])
+def test_scan_ports(benchmark, tcp_listeners, max_workers):
+    ports = tcp_listeners["open"] + tcp_listeners["closed"]
+    benchmark.extra_info["ports"] = len(ports)
+    result = benchmark(port_scanner.scan_ports, "127.0.0.1", ports=ports, timeout=0.5, max_workers=max_workers)
+    assert result["open_count"] == len(tcp_listeners["open"])
+
+
+@pytest.mark.benchmark(group="dns")
+def test_query_dns(benchmark, dns_stub):
+    result = benchmark(dns_tools.query_dns, "example.com", "A", dns_stub)
+    assert result["error"] is None and result["records"]
+
+
+@pytest.mark.benchmark(group="dns")
+def test_bulk_query(benchmark, dns_stub):
+    domains = [f"host{i}.example.com" for i in range(50)]
+    benchmark.extra_info["domains"] = len(domains)
+    results = benchmark(dns_tools.bulk_query, domains, "A", dns_stub)
+    assert all(r["error"] is None for r in results)
+
+
+@pytest.mark.benchmark(group="web")
+def test_check_website(benchmark, http_server):
+    result = benchmark(web_tools.check_website, http_server)
+    assert result.get("status_code") == 200
+
+
+@pytest.mark.benchmark(group="ssl")
+def test_query_ssl(benchmark, tls_server):
+    result = benchmark(ssl_tools.query_ssl, "localhost", tls_server)
+    assert "error" not in result and "localhost" in result["san"]
+
+
+# ── 子網路計算 ─────────────────────────────────────────────────────────────────
+@pytest.mark.benchmark(group="subnet-calc")
+@pytest.mark.parametrize("cidr", [
+    "10.0.0.0/8", "172.16.0.0/16", "192.168.1.0/24", "192.168.1.0/30", "192.168.1.1/32",
+    "2001:db8::/32", "2001:db8::/64", "2001:db8::/120",
+])
+def test_calculate_subnet(benchmark, cidr):
+    result = benchmark(subnet_calc.calculate_subnet, cidr)
+    assert "error" not in result
+
+
+@pytest.mark.benchmark(group="subnet-split")
+@pytest.mark.parametrize("cidr,new_prefix", [
+    ("192.168.0.0/16", 24), ("10.0.0.0/8", 24), ("10.0.0.0/8", 30), ("2001:db8::/32", 64), ("2001:db8::/32", 128),
+])
+def test_split_subnet(benchmark, cidr, new_prefix):
+    result = benchmark(subnet_calc.split_subnet, cidr, new_prefix)
+    assert "error" not in result and result["subnets"]
+
+
+# ── 系統資訊 ───────────────────────────────────────────────────────────────────
+@pytest.mark.benchmark(group="system")
+@pytest.mark.parametrize("getter", [
+    "get_os_info", "get_cpu_info", "get_memory_info", "get_disk_info",
+    "get_network_interfaces", "read_counters", "get_all_system_info",
+])
+def test_system_info(benchmark, getter):
+    fn = getattr(system_info, getter)
+    fn()  # 啟動背景取樣器等一次性成本不計入
+    assert benchmark(fn)
+
+
+# ── 計時與追蹤匯出 ─────────────────────────────────────────────────────────────
+@pytest.mark.benchmark(group="instrument")
+@pytest.mark.parametrize("mode", ["disabled", "enabled", "traced"])
+def test_span_overhead(benchmark, tmp_path, mode):
+    """每個 span 在探測執行緒上的額外成本（traced 時 OTLP 編碼與寫檔在背景執行緒）"""
+    processor = None
+    if mode != "disabled":
+        instrument.enable()
+    if mode == "traced":
+        processor = tracing.start(str(tmp_path / "spans.jsonl"))
+
+    def probe() -> None:
+        with instrument.span("tcp.connect", target="192.0.2.1:80"):
+            pass
+
+    try:
+        # 單次不到數微秒，每輪執行多次以攤平計時誤差
+        benchmark.pedantic(probe, iterations=1000, rounds=50)
+    finally:
+        if processor is not None:
+            tracing.stop(processor)
+        instrument.enable(False)
+        instrument.reset()
+    if processor is not None:
+        assert processor.exported and processor.last_error is None
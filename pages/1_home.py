@@ -4,6 +4,7 @@ import streamlit as st
 import pandas as pd
 from streamlit_javascript import st_javascript
 from sysmon.core.ip_info import query_ip
+from sysmon.ui import cache_status, cached_query
 
 st.title("🏠 SysMon 儀表板")
 st.markdown("歡迎使用 SysMon 系統查詢工具，快速取得網路與系統資訊。")
@@ -41,9 +42,14 @@ if not isinstance(client_ip, str) or not client_ip:
     st.info("⏳ 正在偵測您的公網 IP...")
     st.stop()
 
-with st.spinner("查詢 IP 資訊..."):
-    ipinfo_token = st.session_state.get("ipinfo_token", "")
-    data = query_ip(client_ip, ipinfo_token)
+ipinfo_token = st.session_state.get("ipinfo_token", "")
+provider = "ipinfo.io" if ipinfo_token else "ip-api.com"
+# 與 query_ip 共用同一個快取（鍵為 (ip, provider)）
+data, entry = cached_query(
+    "home_ip", "ip_info", (client_ip, provider),
+    lambda: query_ip(client_ip, ipinfo_token, use_cache=False), spinner="查詢 IP 資訊...",
+)
+cache_status("home_ip", entry)
 
 if "error" in data:
     st.error(f"無法取得 IP 資訊：{data['error']}")
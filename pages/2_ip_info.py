@@ -4,6 +4,7 @@ import streamlit as st
 import pandas as pd
 from streamlit_javascript import st_javascript
 from sysmon.core.ip_info import query_ip, format_ip_info
+from sysmon.ui import cache_status, cached_query, remember
 
 st.title("🌐 IP 資訊查詢")
 st.markdown("查詢 IP 的地理位置、ISP、ASN、代理偵測等詳細資訊。")
@@ -27,16 +28,18 @@ with col1:
 with col2:
     query_btn = st.button("🔍 查詢", use_container_width=True, type="primary")
 
-if query_btn:
-    target = ip_input.strip() or detected_ip
-    if not target:
-        st.warning("尚未偵測到 IP，請手動輸入。")
-        st.stop()
+if query_btn and not (ip_input.strip() or detected_ip):
+    st.warning("尚未偵測到 IP，請手動輸入。")
+    st.stop()
 
+target = remember("ip_query", ip_input.strip() or detected_ip, query_btn)
+if target:
     ipinfo_token = st.session_state.get("ipinfo_token", "")
-
-    with st.spinner("查詢中..."):
-        data = query_ip(target, ipinfo_token)
+    provider = "ipinfo.io" if ipinfo_token else "ip-api.com"
+    data, entry = cached_query(
+        "ip_query", "ip_info", (target, provider), lambda: query_ip(target, ipinfo_token, use_cache=False)
+    )
+    cache_status("ip_query", entry)
 
     if "error" in data:
         st.error(f"查詢失敗：{data['error']}")
@@ -2,7 +2,10 @@
 
 import streamlit as st
 import pandas as pd
-from sysmon.core.dns_tools import query_dns, query_all_types, bulk_query, RECORD_TYPES, DNS_SERVERS
+from sysmon.core.dns_tools import query_dns, query_all_types, RECORD_TYPES, DNS_SERVERS
+from sysmon.ui import (
+    bulk_status, cache_status, cached_bulk, cached_query, normalize_target, remember, start_task, task_progress,
+)
 
 st.title("🔍 DNS 查詢")
 st.markdown("查詢域名的各類型 DNS 記錄，支援自訂 DNS 伺服器。")
@@ -30,9 +33,12 @@ with tab1:
         if custom_dns.strip():
             dns_server = custom_dns.strip()
 
-    if query_btn and domain:
-        with st.spinner(f"查詢 {domain} 的 {rtype} 記錄..."):
-            result = query_dns(domain, rtype, dns_server)
+    query = remember("dns_single", (normalize_target(domain), rtype, dns_server), bool(query_btn and domain.strip()))
+    if query:
+        result, entry = cached_query(
+            "dns_single", "dns", query, lambda: query_dns(*query), spinner=f"查詢 {query[0]} 的 {query[1]} 記錄..."
+        )
+        cache_status("dns_single", entry)
 
         if result.get("error"):
             st.warning(f"⚠️ {result['error']}")
@@ -53,9 +59,15 @@ with tab2:
         st.markdown("<br>", unsafe_allow_html=True)
         query_all_btn = st.button("🔍 全部查詢", key="dns_all_btn", type="primary", use_container_width=True)
 
-    if query_all_btn and domain_all:
-        with st.spinner(f"查詢 {domain_all} 所有記錄類型..."):
-            all_results = query_all_types(domain_all, dns_server_all)
+    query_all = remember(
+        "dns_all", (normalize_target(domain_all), dns_server_all), bool(query_all_btn and domain_all.strip())
+    )
+    if query_all:
+        all_results, entry = cached_query(
+            "dns_all", "dns", (*query_all, "ALL"), lambda: query_all_types(*query_all),
+            spinner=f"查詢 {query_all[0]} 所有記錄類型...",
+        )
+        cache_status("dns_all", entry)
 
         for rtype_key, res in all_results.items():
             if res.get("error") or not res.get("records"):
@@ -82,19 +94,39 @@ with tab3:
         st.markdown("<br>", unsafe_allow_html=True)
         bulk_btn = st.button("🔍 批次查詢", key="dns_bulk_btn", type="primary", use_container_width=True)
 
-    if bulk_btn and domains_text:
-        domains_list = [d.strip() for d in domains_text.strip().splitlines() if d.strip()]
-        with st.spinner(f"批次查詢 {len(domains_list)} 個域名..."):
-            bulk_results = bulk_query(domains_list, bulk_rtype, dns_bulk)
+    domains_list = list(dict.fromkeys(normalize_target(d) for d in domains_text.splitlines() if d.strip()))
+
+    def _start_bulk(query: tuple, refresh: bool = False) -> None:
+        # 每個域名各自快取：與單筆查詢、前次批次重疊的域名不會重新查詢
+        domains, rtype, server = query
+        start_task(
+            "dns_bulk_task", f"批次查詢 {len(domains)} 個域名", cached_bulk,
+            "dns", [(d, rtype, server) for d in domains], lambda key: query_dns(*key), refresh=refresh,
+        )
 
+    def _bulk_rows(results: list) -> list:
         rows = []
-        for res in bulk_results:
+        for res in results:
             if res.get("error"):
                 rows.append({"域名": res["domain"], "記錄": f"⚠️ {res['error']}"})
             else:
                 for rec in res["records"]:
                     rows.append({"域名": res["domain"], "記錄": rec})
+        return rows
 
+    def _show_partial(results: list) -> None:
+        st.dataframe(pd.DataFrame(_bulk_rows(results)), use_container_width=True, hide_index=True)
+
+    if bulk_btn and domains_list:
+        st.session_state["dns_bulk"] = (tuple(domains_list), bulk_rtype, dns_bulk)
+        _start_bulk(st.session_state["dns_bulk"])
+
+    snap = task_progress("dns_bulk_task", render_partial=_show_partial)
+    if snap and snap["result"]:
+        bulk_status(
+            snap["result"], lambda: _start_bulk(st.session_state["dns_bulk"], refresh=True), key="dns_bulk_refresh_btn"
+        )
+        rows = _bulk_rows(snap["result"]["results"])
         if rows:
             st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
 
@@ -3,101 +3,171 @@
 import streamlit as st
 import pandas as pd
 from sysmon.core.whois_tools import query_whois
+from sysmon.ui import (
+    bulk_status, cache_status, cached_bulk, cached_query, normalize_target, remember, start_task, task_progress,
+)
 
 st.title("📋 WHOIS 查詢")
 st.markdown("查詢域名或 IP 的 WHOIS 資訊，包含註冊商、有效期、Name Servers 等。")
 
-col1, col2 = st.columns([4, 1])
-with col1:
-    target = st.text_input(
-        "域名或 IP",
-        placeholder="example.com 或 8.8.8.8",
-        label_visibility="collapsed",
-    )
-with col2:
-    query_btn = st.button("🔍 查詢", type="primary", use_container_width=True)
-
-if query_btn and target:
-    with st.spinner(f"查詢 {target} 的 WHOIS 資訊..."):
-        result = query_whois(target.strip())
-
-    if "error" in result:
-        st.error(f"查詢失敗：{result['error']}")
-    elif result.get("type") == "domain":
-        st.success("域名 WHOIS 查詢完成")
-
-        # 關鍵資訊卡片
-        col1, col2, col3 = st.columns(3)
-        col1.metric("📅 建立日期", result.get("creation_date") or "未知")
-        col2.metric("⏳ 到期日期", result.get("expiration_date") or "未知")
-        col3.metric("🔄 更新日期", result.get("updated_date") or "未知")
-
-        col1, col2 = st.columns(2)
-        with col1:
-            st.markdown("#### 📝 基本資訊")
-            basic_info = {
-                "域名": result.get("domain", ""),
-                "註冊商": result.get("registrar") or "未知",
-                "組織": result.get("org") or "未知",
-                "國家": result.get("country") or "未知",
-                "狀態": ", ".join(result.get("status") or []) if isinstance(result.get("status"), list) else str(result.get("status") or ""),
+tab1, tab2 = st.tabs(["單筆查詢", "批次查詢"])
+
+# ── 單筆查詢 ───────────────────────────────────────────────────────────────────
+with tab1:
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        target = st.text_input(
+            "域名或 IP",
+            placeholder="example.com 或 8.8.8.8",
+            label_visibility="collapsed",
+        )
+    with col2:
+        query_btn = st.button("🔍 查詢", type="primary", use_container_width=True)
+
+    query = remember("whois_query", normalize_target(target), bool(query_btn and target.strip()))
+    if query:
+        result, entry = cached_query(
+            "whois_query", "whois", query, lambda: query_whois(query), spinner=f"查詢 {query} 的 WHOIS 資訊..."
+        )
+        cache_status("whois_query", entry)
+
+        if "error" in result:
+            st.error(f"查詢失敗：{result['error']}")
+        elif result.get("type") == "domain":
+            st.success("域名 WHOIS 查詢完成")
+
+            # 關鍵資訊卡片
+            col1, col2, col3 = st.columns(3)
+            col1.metric("📅 建立日期", result.get("creation_date") or "未知")
+            col2.metric("⏳ 到期日期", result.get("expiration_date") or "未知")
+            col3.metric("🔄 更新日期", result.get("updated_date") or "未知")
+
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown("#### 📝 基本資訊")
+                basic_info = {
+                    "域名": result.get("domain", ""),
+                    "註冊商": result.get("registrar") or "未知",
+                    "組織": result.get("org") or "未知",
+                    "國家": result.get("country") or "未知",
+                    "狀態": ", ".join(result.get("status") or []) if isinstance(result.get("status"), list) else str(result.get("status") or ""),
+                }
+                df_basic = pd.DataFrame(list(basic_info.items()), columns=["欄位", "值"])
+                st.dataframe(df_basic, use_container_width=True, hide_index=True)
+
+            with col2:
+                st.markdown("#### 🖥️ Name Servers")
+                ns_list = result.get("name_servers") or []
+                if isinstance(ns_list, list):
+                    for ns in ns_list:
+                        st.code(ns)
+                else:
+                    st.code(str(ns_list))
+
+            if result.get("emails"):
+                with st.expander("📧 聯絡信箱"):
+                    emails = result["emails"]
+                    if isinstance(emails, list):
+                        for email in emails:
+                            st.write(email)
+                    else:
+                        st.write(emails)
+
+            with st.expander("📄 原始 WHOIS 資料"):
+                st.text(result.get("raw", ""))
+
+        elif result.get("type") == "ip":
+            st.success("IP WHOIS 查詢完成")
+
+            col1, col2, col3 = st.columns(3)
+            col1.metric("ASN", result.get("asn") or "未知")
+            col2.metric("國家", result.get("asn_country_code") or "未知")
+            col3.metric("CIDR", result.get("asn_cidr") or "未知")
+
+            st.markdown("#### 📊 詳細資訊")
+            info = {
+                "IP 位址": result.get("ip", ""),
+                "ASN": result.get("asn", ""),
+                "ASN 說明": result.get("asn_description", ""),
+                "ASN 國家": result.get("asn_country_code", ""),
+                "CIDR": result.get("asn_cidr", ""),
+                "網路名稱": result.get("network_name", ""),
+                "網路範圍": result.get("network_cidr", ""),
+                "起始 IP": result.get("network_start", ""),
+                "結束 IP": result.get("network_end", ""),
+                "網路國家": result.get("network_country", ""),
             }
-            df_basic = pd.DataFrame(list(basic_info.items()), columns=["欄位", "值"])
-            st.dataframe(df_basic, use_container_width=True, hide_index=True)
-
-        with col2:
-            st.markdown("#### 🖥️ Name Servers")
-            ns_list = result.get("name_servers") or []
-            if isinstance(ns_list, list):
-                for ns in ns_list:
-                    st.code(ns)
+            df = pd.DataFrame(list(info.items()), columns=["欄位", "值"])
+            st.dataframe(df, use_container_width=True, hide_index=True)
+
+            if result.get("entities"):
+                with st.expander("🏢 相關實體"):
+                    for entity in result["entities"]:
+                        st.write(f"• {entity}")
+
+# ── 批次查詢 ───────────────────────────────────────────────────────────────────
+with tab2:
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        targets_text = st.text_area(
+            "多個域名或 IP（每行一個）",
+            placeholder="google.com\ncloudflare.com\n8.8.8.8",
+            height=120,
+            key="whois_bulk_targets",
+        )
+    with col2:
+        st.markdown("<br>", unsafe_allow_html=True)
+        bulk_btn = st.button("🔍 批次查詢", key="whois_bulk_btn", type="primary", use_container_width=True)
+
+    targets_list = list(dict.fromkeys(normalize_target(t) for t in targets_text.splitlines() if t.strip()))
+
+    def _start_bulk(targets: tuple, refresh: bool = False) -> None:
+        # WHOIS 伺服器多有頻率限制，並發數較 DNS 低
+        start_task(
+            "whois_bulk_task", f"批次 WHOIS {len(targets)} 筆", cached_bulk,
+            "whois", list(targets), query_whois, max_workers=4, refresh=refresh,
+        )
+
+    def _bulk_rows(results: list) -> list:
+        rows = []
+        for res in results:
+            is_domain = res.get("type") == "domain"
+            row = {"目標": res.get("domain") if is_domain else res.get("ip"), "類型": "域名" if is_domain else "IP"}
+            if "error" in res:
+                row.update({"註冊商 / ASN": f"⚠️ {res['error']}", "到期日 / 國家": ""})
+            elif is_domain:
+                row.update({
+                    "註冊商 / ASN": res.get("registrar") or "未知",
+                    "到期日 / 國家": res.get("expiration_date") or "未知",
+                })
             else:
-                st.code(str(ns_list))
-
-        if result.get("emails"):
-            with st.expander("📧 聯絡信箱"):
-                emails = result["emails"]
-                if isinstance(emails, list):
-                    for email in emails:
-                        st.write(email)
-                else:
-                    st.write(emails)
-
-        with st.expander("📄 原始 WHOIS 資料"):
-            st.text(result.get("raw", ""))
-
-    elif result.get("type") == "ip":
-        st.success("IP WHOIS 查詢完成")
-
-        col1, col2, col3 = st.columns(3)
-        col1.metric("ASN", result.get("asn") or "未知")
-        col2.metric("國家", result.get("asn_country_code") or "未知")
-        col3.metric("CIDR", result.get("asn_cidr") or "未知")
-
-        st.markdown("#### 📊 詳細資訊")
-        info = {
-            "IP 位址": result.get("ip", ""),
-            "ASN": result.get("asn", ""),
-            "ASN 說明": result.get("asn_description", ""),
-            "ASN 國家": result.get("asn_country_code", ""),
-            "CIDR": result.get("asn_cidr", ""),
-            "網路名稱": result.get("network_name", ""),
-            "網路範圍": result.get("network_cidr", ""),
-            "起始 IP": result.get("network_start", ""),
-            "結束 IP": result.get("network_end", ""),
-            "網路國家": result.get("network_country", ""),
-        }
-        df = pd.DataFrame(list(info.items()), columns=["欄位", "值"])
-        st.dataframe(df, use_container_width=True, hide_index=True)
-
-        if result.get("entities"):
-            with st.expander("🏢 相關實體"):
-                for entity in result["entities"]:
-                    st.write(f"• {entity}")
+                row.update({
+                    "註冊商 / ASN": f"AS{res['asn']} {res.get('asn_description') or ''}".strip() if res.get("asn") else "未知",
+                    "到期日 / 國家": res.get("asn_country_code") or "未知",
+                })
+            rows.append(row)
+        return rows
+
+    def _show_partial(results: list) -> None:
+        st.dataframe(pd.DataFrame(_bulk_rows(results)), use_container_width=True, hide_index=True)
+
+    if bulk_btn and targets_list:
+        st.session_state["whois_bulk"] = tuple(targets_list)
+        _start_bulk(st.session_state["whois_bulk"])
+
+    snap = task_progress("whois_bulk_task", render_partial=_show_partial)
+    if snap and snap["result"]:
+        bulk_status(
+            snap["result"], lambda: _start_bulk(st.session_state["whois_bulk"], refresh=True),
+            key="whois_bulk_refresh_btn",
+        )
+        st.dataframe(pd.DataFrame(_bulk_rows(snap["result"]["results"])), use_container_width=True, hide_index=True)
+
 
 with st.expander("ℹ️ 使用說明"):
     st.markdown("""
     - **域名查詢**：輸入如 `google.com`、`example.org`
     - **IP 查詢**：輸入如 `8.8.8.8`（使用 RDAP 協定）
+    - **批次查詢**：每行一個目標，於背景執行，可切換頁面或取消；已查過的目標直接取自快取
     - WHOIS 資料由各域名註冊機構提供，部分資訊可能因隱私保護而遮蔽
     """)
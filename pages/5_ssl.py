@@ -3,6 +3,7 @@
 import streamlit as st
 import pandas as pd
 from sysmon.core.ssl_tools import query_ssl
+from sysmon.ui import cache_status, cached_query, normalize_target, remember
 
 st.title("🔒 SSL 憑證查詢")
 st.markdown("查詢網站 SSL/TLS 憑證詳情、SAN 清單、憑證鏈及到期倒數。")
@@ -20,9 +21,12 @@ with col3:
     st.markdown("<br>", unsafe_allow_html=True)
     query_btn = st.button("🔒 查詢", type="primary", use_container_width=True)
 
-if query_btn and hostname:
-    with st.spinner(f"連線至 {hostname}:{port} 取得憑證..."):
-        result = query_ssl(hostname.strip(), int(port))
+query = remember("ssl_query", (normalize_target(hostname), int(port)), bool(query_btn and hostname.strip()))
+if query:
+    result, entry = cached_query(
+        "ssl_query", "ssl", query, lambda: query_ssl(*query), spinner=f"連線至 {query[0]}:{query[1]} 取得憑證..."
+    )
+    cache_status("ssl_query", entry)
 
     if "error" in result:
         st.error(f"查詢失敗：{result['error']}")
@@ -3,6 +3,7 @@
 import streamlit as st
 import pandas as pd
 from sysmon.core.port_scanner import scan_ports, COMMON_PORTS, SERVICE_NAMES
+from sysmon.ui import start_task, task_progress
 
 st.title("🔌 連接埠掃描")
 st.markdown("掃描目標主機開放的 TCP 連接埠，識別執行中的服務。")
@@ -39,6 +40,30 @@ if preset == "自訂連接埠":
         placeholder="80,443,8080,8443,3000,5000",
     )
 
+
+def _scan_job(task, host, ports_list, preset_key, timeout, max_workers):
+    """背景工作：逐埠回報進度與結果，可被取消"""
+    if ports_list:
+        total = len(ports_list[:1000])
+    else:
+        total = 1024 if preset_key == "all" else len(COMMON_PORTS)
+    task.progress(0, total)
+    return scan_ports(
+        host,
+        ports=ports_list,
+        preset=preset_key,
+        timeout=timeout,
+        max_workers=max_workers,
+        on_result=task.add_partial,
+        stop_event=task.cancel_event,
+    )
+
+
+def _show_open(rows):
+    opened = sorted(r["port"] for r in rows if r["status"] == "open")
+    st.caption(f"目前發現開放：{', '.join(map(str, opened)) if opened else '尚無'}")
+
+
 if scan_btn and host:
     # 解析連接埠
     ports_list = None
@@ -56,14 +81,12 @@ if scan_btn and host:
     elif preset == "1-1024 全掃描":
         preset_key = "all"
 
-    with st.spinner(f"正在掃描 {host}..."):
-        result = scan_ports(
-            host.strip(),
-            ports=ports_list,
-            preset=preset_key,
-            timeout=timeout,
-            max_workers=max_workers,
-        )
+    # 掃描在伺服器端背景執行：不阻塞頁面，切換頁面後回來仍可看到進度與結果
+    start_task("port_scan_task", f"掃描 {host.strip()}", _scan_job, host.strip(), ports_list, preset_key, timeout, max_workers)
+
+snap = task_progress("port_scan_task", render_partial=_show_open)
+if snap and snap["result"]:
+    result = snap["result"]
 
     # 摘要指標
     col1, col2, col3, col4 = st.columns(4)
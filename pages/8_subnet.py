@@ -2,12 +2,12 @@
 
 import streamlit as st
 import pandas as pd
-from sysmon.core.subnet_calc import calculate_subnet, split_subnet
+from sysmon.core.subnet_calc import calculate_subnet, split_subnet, host_page, iter_subnets
 
 st.title("🧮 子網路計算器")
 st.markdown("輸入 CIDR 表示法，計算子網路位址範圍、主機數等詳細資訊。")
 
-tab1, tab2 = st.tabs(["子網路計算", "子網路分割"])
+tab1, tab2, tab3 = st.tabs(["子網路計算", "子網路分割", "批次集合運算"])
 
 # ── 子網路計算 ─────────────────────────────────────────────────────────────────
 with tab1:
@@ -30,8 +30,14 @@ with tab1:
             cidr_input = example
             calc_btn = True
 
+    # 記住上次計算的 CIDR，翻頁時頁面重新執行仍可顯示結果
     if calc_btn and cidr_input:
-        result = calculate_subnet(cidr_input.strip())
+        st.session_state["subnet_cidr"] = cidr_input.strip()
+        st.session_state.pop("host_page_no", None)
+    current_cidr = st.session_state.get("subnet_cidr", "")
+
+    if current_cidr:
+        result = calculate_subnet(current_cidr)
 
         if "error" in result:
             st.error(f"計算失敗：{result['error']}")
@@ -70,15 +76,23 @@ with tab1:
                 df_attrs = pd.DataFrame(list(attrs.items()), columns=["屬性", "值"])
                 st.dataframe(df_attrs, use_container_width=True, hide_index=True)
 
-            # 主機清單
-            host_list = result.get("host_list", [])
-            if host_list:
-                with st.expander(f"📋 主機 IP 清單（{result.get('usable_hosts', 0):,} 個）"):
-                    if "..." in host_list:
-                        st.info("清單過長，僅顯示前 10 筆及最後一筆")
-                    cols = st.columns(4)
-                    for i, h in enumerate(host_list):
-                        cols[i % 4].code(h)
+            # 主機清單（分頁延遲產生，大型網路也不會一次展開）
+            usable = result.get("usable_hosts", 0)
+            with st.expander(f"📋 主機 IP 清單（{usable:,} 個）"):
+                col1, col2 = st.columns(2)
+                with col1:
+                    page_size = st.selectbox("每頁筆數", [64, 256, 1024], index=1, key="host_page_size")
+                # number_input 上限受 JavaScript 安全整數限制
+                total_pages = min(max((usable + page_size - 1) // page_size, 1), 2 ** 53 - 1)
+                with col2:
+                    page_no = st.number_input(
+                        f"頁碼（共 {total_pages:,} 頁）",
+                        min_value=1, max_value=total_pages, value=1, key="host_page_no",
+                    )
+                page = host_page(current_cidr, int(page_no), page_size)
+                cols = st.columns(4)
+                for i, h in enumerate(page["hosts"]):
+                    cols[i % 4].code(h)
 
 # ── 子網路分割 ─────────────────────────────────────────────────────────────────
 with tab2:
@@ -93,14 +107,114 @@ with tab2:
         split_btn = st.button("✂️ 分割", type="primary", use_container_width=True)
 
     if split_btn and parent_cidr:
-        split_result = split_subnet(parent_cidr.strip(), int(new_prefix))
-        if "error" in split_result:
-            st.error(split_result["error"])
+        st.session_state["split_args"] = (parent_cidr.strip(), int(new_prefix))
+        st.session_state.pop("split_page_no", None)
+    split_args = st.session_state.get("split_args")
+
+    if split_args:
+        split_cidr, split_prefix = split_args
+        col1, col2 = st.columns(2)
+        with col1:
+            split_page_size = st.selectbox("每頁筆數", [64, 256, 1024], key="split_page_size")
+        probe = split_subnet(split_cidr, split_prefix, 1, split_page_size)
+        if "error" in probe:
+            st.error(probe["error"])
         else:
+            with col2:
+                split_page_no = st.number_input(
+                    f"頁碼（共 {probe['pages']:,} 頁）",
+                    min_value=1, max_value=min(probe["pages"], 2 ** 53 - 1), value=1, key="split_page_no",
+                )
+            split_result = split_subnet(split_cidr, split_prefix, int(split_page_no), split_page_size)
             st.success(f"將 `{split_result['parent']}` 分割為 **{split_result['count']:,}** 個 `/{split_result['new_prefix']}` 子網路")
-            if split_result.get("truncated"):
-                st.info("結果過多，僅顯示前 64 個")
             subnets = split_result.get("subnets", [])
             cols = st.columns(4)
             for i, subnet in enumerate(subnets):
                 cols[i % 4].code(subnet)
+
+            # 匯出：自目前頁面起最多 65,536 筆（完整匯出請用 CLI --export）
+            export_limit = 65536
+            start = split_result["offset"]
+            st.download_button(
+                f"⬇️ 匯出自第 {start + 1:,} 筆起最多 {export_limit:,} 筆",
+                data="\n".join(iter_subnets(split_cidr, split_prefix, start, start + export_limit)) + "\n",
+                file_name=f"{split_result['parent'].replace('/', '_')}_split_{split_prefix}.txt",
+                mime="text/plain",
+            )
+            st.caption("完整匯出可使用 CLI：`sysmon subnet <CIDR> --split <前綴> --export 檔案`")
+
+# ── 批次集合運算 ───────────────────────────────────────────────────────────────
+with tab3:
+    st.markdown("上傳 IP / CIDR 清單檔案（每行一筆，支援 `#` 註解），以向量化運算處理大量資料。")
+    operation = st.radio(
+        "運算",
+        ["IP 歸屬比對", "合併 CIDR", "找出重疊", "扣除範圍"],
+        horizontal=True,
+        key="bulk_op",
+    )
+
+    col1, col2 = st.columns(2)
+    with col1:
+        label = "IP 清單" if operation == "IP 歸屬比對" else "CIDR 清單"
+        primary_file = st.file_uploader(label, type=["txt", "csv"], key="bulk_primary")
+    with col2:
+        secondary_file = None
+        if operation == "IP 歸屬比對":
+            secondary_file = st.file_uploader("CIDR 清單", type=["txt", "csv"], key="bulk_prefixes")
+        elif operation == "扣除範圍":
+            secondary_file = st.file_uploader("要扣除的 CIDR 清單", type=["txt", "csv"], key="bulk_remove")
+
+    needs_secondary = operation in ("IP 歸屬比對", "扣除範圍")
+    run_btn = st.button("▶️ 執行", type="primary", key="bulk_run")
+
+    if run_btn:
+        if primary_file is None or (needs_secondary and secondary_file is None):
+            st.warning("請先上傳所需的檔案")
+            st.stop()
+
+        from sysmon.core.ip_bulk import (
+            read_lines, match_addresses, collapse_prefixes, find_overlaps, subtract_prefixes,
+        )
+
+        primary = read_lines(primary_file.getvalue().decode("utf-8", errors="replace"))
+        secondary = read_lines(secondary_file.getvalue().decode("utf-8", errors="replace")) if secondary_file else []
+
+        with st.spinner("運算中..."):
+            if operation == "IP 歸屬比對":
+                res = match_addresses(primary, secondary)
+                match = res["match"]
+                hit = match >= 0
+                df = pd.DataFrame({
+                    "IP": pd.Series(primary, dtype="string"),
+                    "所屬前綴": pd.Series(secondary, dtype="string").reindex(match).to_numpy(),
+                })[hit]
+                invalid = res["invalid_ips"] + res["invalid_prefixes"]
+                st.success(f"{res['matched']:,} / {res['total']:,} 個 IP 命中")
+            elif operation == "合併 CIDR":
+                res = collapse_prefixes(primary)
+                df = pd.DataFrame({"CIDR": res["prefixes"]})
+                invalid = res["invalid"]
+                st.success(f"{res['input_count']:,} 筆合併為 {len(res['prefixes']):,} 筆")
+            elif operation == "找出重疊":
+                res = find_overlaps(primary)
+                df = pd.DataFrame(res["overlaps"], columns=["prefix", "contained_in", "kind"])
+                df.columns = ["CIDR", "被包含於", "類型"]
+                invalid = res["invalid"]
+                st.success(f"找到 {len(df):,} 筆重疊")
+            else:
+                res = subtract_prefixes(primary, secondary)
+                df = pd.DataFrame({"CIDR": res["prefixes"]})
+                invalid = res["invalid"]
+                st.success(f"剩餘 {len(df):,} 筆 CIDR")
+
+        if invalid:
+            st.warning(f"略過 {len(invalid):,} 筆格式錯誤：{', '.join(invalid[:5])}{' ...' if len(invalid) > 5 else ''}")
+        st.dataframe(df.head(10000), use_container_width=True, hide_index=True)
+        if len(df) > 10000:
+            st.caption(f"僅顯示前 10,000 筆，完整結果請下載（共 {len(df):,} 筆）")
+        st.download_button(
+            "⬇️ 下載 CSV",
+            data=df.to_csv(index=False).encode("utf-8"),
+            file_name="sysmon_bulk_result.csv",
+            mime="text/csv",
+        )
@@ -28,19 +28,160 @@ if IS_CLOUD:
 
 from sysmon.core.system_info import (
     get_os_info, get_cpu_info, get_memory_info,
-    get_disk_info, get_network_interfaces,
+    get_disk_info, get_network_interfaces, get_cpu_sampler,
+    network_rate_sampler, disk_io_sampler,
 )
 import plotly.graph_objects as go
 
 st.markdown("顯示本機 CPU、RAM、磁碟、網路介面及作業系統資訊。")
 
+
+@st.cache_resource
+def _nic_sampler():
+    """每張網卡的速率由背景執行緒每秒更新，頁面重新執行時直接讀取"""
+    return network_rate_sampler(interval=1.0).start()
+
+
+@st.cache_resource
+def _disk_sampler():
+    """每個磁碟裝置的 IOPS/吞吐量/延遲由背景執行緒每秒更新"""
+    return disk_io_sampler(interval=1.0).start()
+
+
+# ── 即時監控 ───────────────────────────────────────────────────────────────────
+@st.cache_resource
+def _live_sampler():
+    """全伺服器共用一個取樣執行緒；環形緩衝區保留最近 1 小時（每秒一筆）"""
+    from sysmon.core.timeseries import MetricsSampler
+    return MetricsSampler(interval=1.0, capacity=3600).start()
+
+
+def _live_panel(window_s: int) -> None:
+    buf = _live_sampler().buffer
+    ts, data = buf.snapshot(last=window_s)
+    if len(ts) < 2:
+        st.info("⏳ 收集資料中...")
+        return
+
+    df = pd.DataFrame(data, columns=buf.fields)
+    df["時間"] = pd.to_datetime(ts, unit="s", utc=True).tz_convert(None)
+    latest = df.iloc[-1]
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("CPU", f"{latest['cpu_percent']:.1f}%")
+    col2.metric("記憶體", f"{latest['mem_percent']:.1f}%")
+    col3.metric("磁碟 讀/寫", f"{latest['disk_read_bps'] / 1024 ** 2:.1f} / {latest['disk_write_bps'] / 1024 ** 2:.1f} MB/s")
+    col4.metric("網路 上/下", f"{latest['net_sent_bps'] / 1024 ** 2:.2f} / {latest['net_recv_bps'] / 1024 ** 2:.2f} MB/s")
+
+    layout = dict(
+        height=220,
+        margin=dict(l=10, r=10, t=30, b=10),
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        font_color="#E0E6ED",
+        legend=dict(orientation="h", y=-0.25),
+    )
+    charts = [
+        ("使用率 (%)", [("cpu_percent", "CPU"), ("mem_percent", "記憶體")], 1, {"range": [0, 100]}),
+        ("磁碟 I/O (MB/s)", [("disk_read_bps", "讀取"), ("disk_write_bps", "寫入")], 1024 ** 2, {}),
+        ("網路 I/O (MB/s)", [("net_sent_bps", "上傳"), ("net_recv_bps", "下載")], 1024 ** 2, {}),
+    ]
+    cols = st.columns(3)
+    for col, (title, series, scale, yaxis) in zip(cols, charts):
+        fig = go.Figure([
+            go.Scatter(x=df["時間"], y=df[field] / scale, name=label, mode="lines")
+            for field, label in series
+        ])
+        fig.update_layout(title=title, yaxis=yaxis, **layout)
+        col.plotly_chart(fig, use_container_width=True)
+
+
+if st.toggle("📈 即時監控模式", key="sys_live"):
+    col1, col2 = st.columns(2)
+    with col1:
+        refresh_s = st.select_slider("更新間隔（秒）", [1, 2, 5, 10], value=2, key="sys_live_refresh")
+    with col2:
+        window_label = st.select_slider("顯示範圍", ["1 分鐘", "5 分鐘", "15 分鐘", "1 小時"], value="5 分鐘", key="sys_live_window")
+    window_s = {"1 分鐘": 60, "5 分鐘": 300, "15 分鐘": 900, "1 小時": 3600}[window_label]
+    # fragment 只重新執行圖表區塊，不會重繪整個頁面
+    st.fragment(run_every=refresh_s)(_live_panel)(window_s)
+    st.divider()
+
+# ── 歷史趨勢 ───────────────────────────────────────────────────────────────────
+_HISTORY_WINDOWS = {"1 小時": 3600, "6 小時": 6 * 3600, "24 小時": 86400, "7 天": 7 * 86400, "30 天": 30 * 86400}
+
+
+def _history_panel(window_s: int, stat: str) -> None:
+    import time
+    from sysmon.core.rollup import open_store
+
+    store = open_store()
+    if store is None:
+        st.info("尚無歷史資料。請先在背景執行 `sysmon agent` 收集指標。")
+        return
+
+    end = time.time()
+    aggs = ("avg", "min", "max") if stat == "avg" else (stat,)
+    layout = dict(
+        height=240,
+        margin=dict(l=10, r=10, t=30, b=10),
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        font_color="#E0E6ED",
+        legend=dict(orientation="h", y=-0.25),
+    )
+    charts = [
+        ("使用率 (%)", [("cpu_percent", "CPU"), ("mem_percent", "記憶體")], 1, {"range": [0, 100]}),
+        ("磁碟 I/O (MB/s)", [("disk_read_bps", "讀取"), ("disk_write_bps", "寫入")], 1024 ** 2, {}),
+        ("網路 I/O (MB/s)", [("net_sent_bps", "上傳"), ("net_recv_bps", "下載")], 1024 ** 2, {}),
+    ]
+    cols = st.columns(3)
+    resolution = None
+    for col, (title, series, scale, yaxis) in zip(cols, charts):
+        traces = []
+        for field, label in series:
+            q = store.query(field, end - window_s, end, points=300, aggregates=aggs)
+            if "error" in q:
+                continue
+            resolution = q["resolution_s"]
+            x = pd.to_datetime(q["ts"], unit="s", utc=True).tz_convert(None)
+            if stat == "avg":
+                # 以 min/max 畫出範圍帶，平均值為主線
+                traces.append(go.Scatter(x=x, y=q["max"] / scale, mode="lines", line=dict(width=0),
+                                         showlegend=False, hoverinfo="skip"))
+                traces.append(go.Scatter(x=x, y=q["min"] / scale, mode="lines", line=dict(width=0),
+                                         fill="tonexty", opacity=0.2, showlegend=False, hoverinfo="skip"))
+                traces.append(go.Scatter(x=x, y=q["avg"] / scale, name=label, mode="lines"))
+            else:
+                traces.append(go.Scatter(x=x, y=q[stat] / scale, name=label, mode="lines"))
+        fig = go.Figure(traces)
+        fig.update_layout(title=title, yaxis=yaxis, **layout)
+        col.plotly_chart(fig, use_container_width=True)
+    if resolution:
+        st.caption(f"資料來自預先彙總（每點 {resolution} 秒）；陰影為區間最小值～最大值。")
+
+
+if st.toggle("📚 歷史趨勢（agent 記錄）", key="sys_history"):
+    col1, col2 = st.columns(2)
+    with col1:
+        hist_label = st.select_slider("時間範圍", list(_HISTORY_WINDOWS), value="24 小時", key="sys_history_window")
+    with col2:
+        hist_stat = st.selectbox(
+            "統計", ["avg", "max", "p95", "p99"], key="sys_history_stat",
+            format_func={"avg": "平均（含最小/最大）", "max": "最大值", "p95": "P95", "p99": "P99"}.get,
+        )
+    _history_panel(_HISTORY_WINDOWS[hist_label], hist_stat)
+    st.divider()
+
 # ── 作業系統 ───────────────────────────────────────────────────────────────────
 with st.spinner("讀取系統資訊..."):
+    # CPU 使用率來自背景取樣器（跨重新執行共用），僅伺服器第一次渲染需等待取樣區間
+    get_cpu_sampler()
     os_info = get_os_info()
-    cpu_info = get_cpu_info()
     mem_info = get_memory_info()
     disks = get_disk_info()
     nets = get_network_interfaces()
+    cpu_info = get_cpu_info(min_span=0.25)
 
 st.markdown("### 🖥️ 作業系統")
 col1, col2, col3, col4 = st.columns(4)
@@ -168,15 +309,33 @@ if disks:
             text=f"{d.get('mountpoint', '')} — {d.get('used_gb', 0):.1f} / {d.get('total_gb', 0):.1f} GB ({d.get('percent', 0):.1f}%)",
         )
 
+disk_io = _disk_sampler().latest() or []
+if disk_io:
+    st.markdown("#### 📈 磁碟 I/O")
+    io_rows = [{
+        "裝置": d["device"],
+        "讀 IOPS": d["read_iops"],
+        "寫 IOPS": d["write_iops"],
+        "讀 (MB/s)": d["read_mb_s"],
+        "寫 (MB/s)": d["write_mb_s"],
+        "平均讀延遲 (ms)": d["avg_read_ms"],
+        "平均寫延遲 (ms)": d["avg_write_ms"],
+        "忙碌 (%)": d["busy_percent"],
+    } for d in disk_io]
+    st.dataframe(pd.DataFrame(io_rows), use_container_width=True, hide_index=True)
+    st.caption("由背景執行緒每秒取樣 disk_io_counters(perdisk=True) 差值；平均延遲為每次 I/O 的服務時間。")
+
 st.divider()
 
 # ── 網路介面 ───────────────────────────────────────────────────────────────────
 st.markdown("### 🌐 網路介面")
 if nets:
+    nic_rates = {r["name"]: r for r in _nic_sampler().latest() or []}
     net_rows = []
     for n in nets:
         if not n.get("ipv4") and not n.get("mac"):
             continue
+        rate = nic_rates.get(n.get("name", ""), {})
         net_rows.append({
             "介面": n.get("name", ""),
             "IPv4": n.get("ipv4", ""),
@@ -184,7 +343,61 @@ if nets:
             "MAC": n.get("mac", ""),
             "狀態": "🟢 啟用" if n.get("is_up") else "🔴 停用",
             "速度 (Mbps)": n.get("speed_mbps", 0),
-            "上傳 (MB)": n.get("bytes_sent_mb", 0),
-            "下載 (MB)": n.get("bytes_recv_mb", 0),
+            "上傳 (KB/s)": round(rate.get("sent_bps", 0) / 1024, 1),
+            "下載 (KB/s)": round(rate.get("recv_bps", 0) / 1024, 1),
+            "封包/s 出": round(rate.get("packets_sent_ps", 0)),
+            "封包/s 入": round(rate.get("packets_recv_ps", 0)),
+            "錯誤 入/出": f"{rate.get('errin', 0)}/{rate.get('errout', 0)}",
+            "丟棄 入/出": f"{rate.get('dropin', 0)}/{rate.get('dropout', 0)}",
+            "累計上傳 (MB)": n.get("bytes_sent_mb", 0),
+            "累計下載 (MB)": n.get("bytes_recv_mb", 0),
         })
     st.dataframe(pd.DataFrame(net_rows), use_container_width=True, hide_index=True)
+    st.caption("速率為最近 1 秒的背景取樣；錯誤與丟棄為該取樣區間內的封包數。")
+
+st.divider()
+
+# ── 行程 ───────────────────────────────────────────────────────────────────────
+def _process_monitor():
+    """
+    每個 session 各自的監控器（存於 session_state）：CPU% 與 I/O 速率為相對「這個使用者」
+    上一次重新整理的差值，不受其他 session 重新整理影響
+    """
+    monitor = st.session_state.get("process_monitor")
+    if monitor is None:
+        from sysmon.core.process_info import ProcessMonitor
+        monitor = st.session_state["process_monitor"] = ProcessMonitor()
+        monitor.refresh()
+    return monitor
+
+
+st.markdown("### 📋 行程")
+pcol1, pcol2, pcol3 = st.columns([2, 1, 1])
+with pcol1:
+    proc_filter = st.text_input("名稱或 PID 篩選", key="proc_filter", placeholder="例如 python")
+with pcol2:
+    proc_sort = st.selectbox(
+        "排序", ["cpu", "mem", "io", "fds", "threads"], key="proc_sort",
+        format_func={"cpu": "CPU %", "mem": "記憶體", "io": "I/O", "fds": "開啟 FD", "threads": "執行緒"}.get,
+    )
+with pcol3:
+    proc_top = st.number_input("顯示筆數", min_value=5, max_value=500, value=25, step=5, key="proc_top")
+
+procs = _process_monitor().snapshot(sort_by=proc_sort, name_filter=proc_filter, top_n=int(proc_top))
+if procs:
+    st.dataframe(pd.DataFrame([{
+        "PID": p["pid"],
+        "名稱": p["name"],
+        "使用者": p["user"],
+        "狀態": p["status"],
+        "CPU (%)": p["cpu_percent"],
+        "RSS (MB)": p["rss_mb"],
+        "記憶體 (%)": p["mem_percent"],
+        "執行緒": p["threads"],
+        "開啟 FD": p["num_fds"],
+        "讀取 (KB/s)": None if p["read_bps"] is None else round(p["read_bps"] / 1024, 1),
+        "寫入 (KB/s)": None if p["write_bps"] is None else round(p["write_bps"] / 1024, 1),
+    } for p in procs]), use_container_width=True, hide_index=True)
+    st.caption("CPU% 與 I/O 速率為距上一次重新整理的平均值；無權限讀取的欄位留白。")
+else:
+    st.info("沒有符合條件的行程")
@@ -2,26 +2,164 @@
 
 from __future__ import annotations
 
-import subprocess
+import contextlib
 import sys
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Iterable, List, Optional
 
 import typer
-from rich.console import Console
-from rich.table import Table
-from rich import print as rprint
-from rich.panel import Panel
-from rich.progress import Progress, SpinnerColumn, TextColumn
+
+from sysmon.output import OutputFormat
+
+if TYPE_CHECKING:
+    from rich.console import Console
+    from rich.table import Table
 
 app = typer.Typer(
     name="sysmon",
     help="SysMon 系統查詢工具 - 網路/系統資訊查詢平台",
     rich_markup_mode="rich",
 )
-console = Console()
+
+
+class _LazyConsole:
+    """
+    第一次輸出時才匯入 rich.console 並建立 Console。
+
+    CLI 啟動時只匯入 typer；Rich 與各功能模組都在實際用到的指令內匯入，
+    啟動時間由 tests/test_startup.py 把關。
+    """
+
+    def __init__(self, **kwargs):
+        self._kwargs = kwargs
+        self._console: Console | None = None
+
+    def get(self) -> "Console":
+        if self._console is None:
+            from rich.console import Console
+            self._console = Console(**self._kwargs)
+        return self._console
+
+    def __getattr__(self, name: str):
+        return getattr(self.get(), name)
+
+
+console = _LazyConsole()
+err_console = _LazyConsole(stderr=True)
+_output = OutputFormat.table
+
+
+@app.callback()
+def main(
+    ctx: typer.Context,
+    output: OutputFormat = typer.Option(
+        OutputFormat.table, "--output", "-o", envvar="SYSMON_OUTPUT", case_sensitive=False,
+        help="輸出格式：table / json / ndjson / csv（機器可讀格式不會繪製表格）",
+    ),
+    profile: bool = typer.Option(
+        False, "--profile", help="結束時於 stderr 顯示各階段耗時（DNS / 連線 / TLS / HTTP / 快取命中...）",
+    ),
+    profile_out: Optional[str] = typer.Option(
+        None, "--profile-out", metavar="FILE", help="以 cProfile 記錄整個指令並寫入 FILE（pstats / snakeviz 可讀）",
+    ),
+    trace: Optional[str] = typer.Option(
+        None, "--trace", metavar="FILE|URL", envvar="SYSMON_TRACE",
+        help="將各階段 span 以 OTLP/JSON 匯出：附加寫入 FILE，或送往 OTLP/HTTP collector（http://host:4318）",
+    ),
+):
+    """SysMon 系統查詢工具 - 網路/系統資訊查詢平台"""
+    global _output
+    _output = output
+    if profile or profile_out:
+        _start_profile(ctx, profile, profile_out)
+    if trace:
+        _start_trace(ctx, trace)
+
+
+def _start_profile(ctx: typer.Context, breakdown: bool, out: str | None) -> None:
+    """啟用 sysmon.core.instrument（及 cProfile），指令結束時輸出結果"""
+    import time
+
+    from sysmon.core import instrument
+
+    instrument.enable()
+    profiler = None
+    if out:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    started = time.perf_counter()
+
+    def finish() -> None:
+        wall = time.perf_counter() - started
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(out)
+            err_console.print(f"[dim]cProfile 記錄已寫入 {out}（python -m pstats {out}）[/dim]")
+        if breakdown:
+            _print_profile(instrument.snapshot(), wall)
+
+    ctx.call_on_close(finish)
+
+
+def _start_trace(ctx: typer.Context, target: str) -> None:
+    """開始匯出 span，指令結束時寫出剩餘批次"""
+    from sysmon.core import tracing
+
+    processor = tracing.start(target)
+
+    def finish() -> None:
+        tracing.stop(processor)
+        if processor.dropped:
+            err_console.print(
+                f"[yellow]追蹤匯出：{processor.exported:,} 個 span 已寫入 {processor.exporter}，"
+                f"{processor.dropped:,} 個遺失（{processor.last_error or '佇列已滿'}）[/yellow]"
+            )
+
+    ctx.call_on_close(finish)
+
+
+def _print_profile(snap: dict, wall: float) -> None:
+    from rich.table import Table
+
+    table = Table(title=f"⏱️ 各階段耗時（指令總計 {wall * 1000:,.1f} ms）", header_style="bold cyan")
+    table.add_column("階段", style="cyan", no_wrap=True)
+    for col in ("次數", "累計 ms", "平均 ms", "最大 ms", "失敗", "佔總計"):
+        table.add_column(col, justify="right")
+    for name, s in snap["spans"].items():
+        share = s["total_ms"] / (wall * 1000) * 100 if wall else 0
+        table.add_row(
+            name, f"{s['count']:,}", f"{s['total_ms']:,.1f}", f"{s['mean_ms']:,.2f}", f"{s['max_ms']:,.1f}",
+            f"[red]{s['errors']:,}[/red]" if s["errors"] else "0", f"{share:.0f}%",
+        )
+    if not snap["spans"]:
+        table.add_row("[dim]（沒有記錄到任何網路階段）[/dim]", "", "", "", "", "", "")
+    err_console.print(table)
+    if snap["counters"]:
+        err_console.print("計數器：" + "  ".join(f"{k}={v:,}" for k, v in snap["counters"].items()))
+    err_console.print("[dim]並發執行的階段會重疊，佔總計可超過 100%；probe.* 包含其中各階段[/dim]")
+
+
+def _machine() -> bool:
+    return _output != OutputFormat.table
+
+
+def _status(message: str):
+    """表格模式顯示進度動畫；機器可讀模式不輸出任何裝飾"""
+    return contextlib.nullcontext() if _machine() else console.status(message)
+
+
+def _emit(document: Any, rows: Iterable[dict] | None = None, failed: bool = False) -> None:
+    from sysmon.output import emit
+
+    emit(_output, document, rows)
+    if failed:
+        raise typer.Exit(1)
 
 
 def _table(title: str, rows: dict) -> Table:
+    from rich.table import Table
+
     table = Table(title=title, show_header=True, header_style="bold cyan")
     table.add_column("欄位", style="cyan", no_wrap=True)
     table.add_column("值", style="white")
@@ -37,13 +175,16 @@ def _table(title: str, rows: dict) -> Table:
 def ip(
     address: Optional[str] = typer.Argument(None, help="IP 位址（留空自動偵測）"),
     token: str = typer.Option("", "--token", "-t", help="ipinfo.io Token（選填）"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="略過快取，強制重新查詢"),
 ):
     """查詢 IP 地理位置、ISP、ASN 等資訊"""
     from sysmon.core.ip_info import query_ip, format_ip_info
 
-    with console.status(f"查詢 {address or '公網 IP'}..."):
-        data = query_ip(address or "", token)
+    with _status(f"查詢 {address or '公網 IP'}..."):
+        data = query_ip(address or "", token, use_cache=not no_cache)
 
+    if _machine():
+        return _emit(data, failed="error" in data)
     if "error" in data:
         console.print(f"[red]錯誤：{data['error']}[/red]")
         raise typer.Exit(1)
@@ -64,13 +205,20 @@ def dns(
     from sysmon.core.dns_tools import query_dns
 
     record_type = record_type.upper()
-    with console.status(f"查詢 {domain} 的 {record_type} 記錄..."):
+    with _status(f"查詢 {domain} 的 {record_type} 記錄..."):
         result = query_dns(domain, record_type, server)
 
+    if _machine():
+        return _emit(result, [
+            {"domain": domain, "type": record_type, "record": rec, "dns_server": result["dns_server"]}
+            for rec in result["records"]
+        ], failed=bool(result.get("error")))
     if result.get("error"):
         console.print(f"[yellow]⚠️  {result['error']}[/yellow]")
         return
 
+    from rich.table import Table
+
     table = Table(title=f"DNS {record_type} — {domain}", show_header=True, header_style="bold cyan")
     table.add_column("記錄", style="white")
     for rec in result.get("records", []):
@@ -87,9 +235,11 @@ def whois(
     """查詢 WHOIS 資訊"""
     from sysmon.core.whois_tools import query_whois
 
-    with console.status(f"查詢 {target} 的 WHOIS..."):
+    with _status(f"查詢 {target} 的 WHOIS..."):
         result = query_whois(target)
 
+    if _machine():
+        return _emit(result, failed="error" in result)
     if "error" in result:
         console.print(f"[red]錯誤：{result['error']}[/red]")
         raise typer.Exit(1)
@@ -127,9 +277,11 @@ def ssl(
     """查詢 SSL/TLS 憑證詳情"""
     from sysmon.core.ssl_tools import query_ssl
 
-    with console.status(f"連線 {hostname}:{port} 取得憑證..."):
+    with _status(f"連線 {hostname}:{port} 取得憑證..."):
         result = query_ssl(hostname, port)
 
+    if _machine():
+        return _emit(result, failed="error" in result)
     if "error" in result:
         console.print(f"[red]錯誤：{result['error']}[/red]")
         raise typer.Exit(1)
@@ -175,13 +327,18 @@ def web(
     from sysmon.core.web_tools import check_website, DEFAULT_UA
 
     ua = user_agent or DEFAULT_UA
-    with console.status(f"檢測 {url}..."):
+    with _status(f"檢測 {url}..."):
         result = check_website(url, ua, timeout)
 
+    if _machine():
+        return _emit(result, failed="error" in result)
     if "error" in result:
         console.print(f"[red]錯誤：{result['error']}[/red]")
         raise typer.Exit(1)
 
+    from rich.table import Table
+    from rich.panel import Panel
+
     status = result.get("status_code", 0)
     color = "green" if 200 <= status < 300 else "yellow" if 300 <= status < 400 else "red"
     console.print(Panel(
@@ -228,15 +385,28 @@ def scan(
         try:
             ports_list = [int(p.strip()) for p in ports.split(",") if p.strip().isdigit()]
         except ValueError:
-            console.print("[red]連接埠格式錯誤[/red]")
+            err_console.print("[red]連接埠格式錯誤[/red]")
             raise typer.Exit(1)
 
+    if _machine():
+        if _output == OutputFormat.json:
+            return _emit(scan_ports(host, ports_list, preset, timeout))
+        from sysmon.output import RecordWriter
+
+        # ndjson / csv：每個連接埠完成即寫出一筆
+        writer = RecordWriter(_output)
+        scan_ports(host, ports_list, preset, timeout, on_result=lambda r: writer.write({"host": host, **r}))
+        writer.close()
+        return
+
     console.print(f"[cyan]掃描 {host}...[/cyan]")
     with console.status("掃描中（可能需要一點時間）..."):
         result = scan_ports(host, ports_list, preset, timeout)
 
     console.print(f"掃描完成：{result['total_scanned']} 個連接埠，[green]{result['open_count']} 個開放[/green]")
 
+    from rich.table import Table
+
     table = Table(title=f"開放的連接埠 — {host}", show_header=True, header_style="bold cyan")
     table.add_column("連接埠", style="cyan")
     table.add_column("服務", style="white")
@@ -245,15 +415,299 @@ def scan(
     console.print(table)
 
 
+# ── probe ───────────────────────────────────────────────────────────────────
+@app.command()
+def probe(
+    targets: Optional[List[str]] = typer.Argument(None, help="目標（域名 / IP / URL，或 kind:目標 如 tcp:host:22、dns:example.com/MX）"),
+    file: Optional[str] = typer.Option(None, "--file", "-f", help="目標清單檔（每行一個，# 為註解）"),
+    kinds: str = typer.Option("dns,tcp,tls,http", "--kind", "-k", help="探測類型（逗號分隔）：dns / tcp / tls / http / whois"),
+    ports: str = typer.Option("", "--ports", "-p", help="tcp 探測的連接埠（逗號分隔，預設 80）"),
+    record_types: str = typer.Option("A", "--type", "-t", help="dns 探測的記錄類型（逗號分隔）"),
+    concurrency: int = typer.Option(100, "--concurrency", "-c", help="全域並發上限"),
+    per_host: int = typer.Option(10, "--per-host", help="每個目的主機的並發上限"),
+    timeout: float = typer.Option(10.0, "--timeout", help="單一探測逾時秒數"),
+    deadline: Optional[float] = typer.Option(None, "--deadline", help="整體期限秒數，到期取消未完成的探測"),
+):
+    """以單一非同步協調器對多個目標執行 DNS / TCP / TLS / HTTP / WHOIS 探測"""
+    from sysmon.core.probe import ProbeRunner, build_probes, summarize
+
+    items = list(targets or [])
+    if file:
+        items += _read_list(file)
+    try:
+        port_list = [int(p) for p in ports.split(",") if p.strip()]
+        probes = build_probes(
+            items,
+            kinds=[k.strip() for k in kinds.split(",") if k.strip()],
+            ports=port_list,
+            record_types=[t.strip() for t in record_types.split(",") if t.strip()],
+        )
+    except ValueError as e:
+        err_console.print(f"[red]參數錯誤：{e}[/red]")
+        raise typer.Exit(1)
+    if not probes:
+        err_console.print("[red]請指定至少一個目標[/red]")
+        raise typer.Exit(1)
+
+    runner = ProbeRunner(concurrency=concurrency, per_host=per_host, timeout=timeout, deadline=deadline)
+
+    if _machine():
+        if _output == OutputFormat.json:
+            try:
+                results = runner.run(probes)
+            except KeyboardInterrupt:
+                raise typer.Exit(130)
+            return _emit(results)
+        from sysmon.output import RecordWriter
+
+        # ndjson / csv：每個探測完成即寫出一筆
+        writer = RecordWriter(_output)
+        runner.on_result = writer.write
+        try:
+            runner.run(probes)
+        except KeyboardInterrupt:
+            raise typer.Exit(130)
+        return
+
+    from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn, TimeElapsedColumn
+
+    with Progress(
+        TextColumn("[cyan]探測中"), BarColumn(), MofNCompleteColumn(), TimeElapsedColumn(),
+        console=console.get(), transient=True,
+    ) as progress:
+        task = progress.add_task("probe", total=len(probes))
+        runner.on_progress = lambda done, total: progress.update(task, completed=done)
+        try:
+            results = runner.run(probes)
+        except KeyboardInterrupt:
+            console.print("[yellow]已中斷[/yellow]")
+            raise typer.Exit(130)
+
+    from rich.table import Table
+
+    ok_count = sum(r["ok"] for r in results)
+    table = Table(title=f"🔎 探測結果（{ok_count}/{len(results)} 成功）", show_header=True, header_style="bold cyan")
+    table.add_column("類型", style="cyan")
+    table.add_column("目標")
+    table.add_column("結果")
+    table.add_column("耗時 ms", justify="right")
+    table.add_column("摘要", no_wrap=False)
+    for r in results:
+        elapsed = "" if r["elapsed_ms"] is None else f"{r['elapsed_ms']:.0f}"
+        mark = "[green]✓[/green]" if r["ok"] else "[red]✗[/red]"
+        table.add_row(r["kind"], r["target"], mark, elapsed, summarize(r)[:80])
+    console.print(table)
+
+
+# ── audit ───────────────────────────────────────────────────────────────────
+@app.command()
+def audit(
+    domain: str = typer.Argument(..., help="域名"),
+    ports: str = typer.Option("", "--ports", "-p", help="掃描的連接埠（逗號分隔，預設常見埠）"),
+    timeout: float = typer.Option(10.0, "--timeout", help="單一探測逾時秒數"),
+    max_ips: int = typer.Option(4, "--max-ips", help="最多檢查幾個解析出的 IP"),
+    no_ip_whois: bool = typer.Option(False, "--no-ip-whois", help="略過各 IP 的 ASN 查詢"),
+):
+    """域名完整稽核：DNS 解析後並發執行 WHOIS、SSL、HTTP 與連接埠掃描，輸出合併報告"""
+    from sysmon.core.audit import audit as run_audit
+
+    try:
+        port_list = [int(p) for p in ports.split(",") if p.strip()] or None
+    except ValueError:
+        err_console.print("[red]連接埠格式錯誤[/red]")
+        raise typer.Exit(1)
+    kwargs = dict(ports=port_list, timeout=timeout, max_ips=max_ips, ip_whois=not no_ip_whois)
+
+    if _machine():
+        if _output == OutputFormat.json:
+            return _emit(run_audit(domain, **kwargs))
+        from sysmon.output import RecordWriter
+
+        # ndjson / csv：逐筆輸出各探測結果
+        writer = RecordWriter(_output)
+        run_audit(domain, on_result=writer.write, **kwargs)
+        return
+
+    from rich.progress import Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
+
+    with Progress(
+        SpinnerColumn(), TextColumn("[cyan]稽核 {task.fields[domain]}：已完成 {task.completed} 項"),
+        TimeElapsedColumn(), console=console.get(), transient=True,
+    ) as progress:
+        task = progress.add_task("audit", total=None, domain=domain)
+        report = run_audit(domain, on_result=lambda _: progress.advance(task), **kwargs)
+
+    _render_audit(report)
+
+
+def _render_audit(report: dict) -> None:
+    from sysmon.core.probe import summarize
+    from rich.panel import Panel
+    from rich.table import Table
+
+    console.print(Panel(
+        f"位址：{', '.join(report['addresses']) or '[red]無法解析[/red]'}  "
+        f"| 總耗時 {report['elapsed_ms']:.0f} ms"
+        f"（各分支合計 {sum(report['branch_ms'].values()):.0f} ms）",
+        title=f"🧾 稽核報告 — {report['domain']}",
+    ))
+
+    dns_table = Table(title="DNS", show_header=True, header_style="bold cyan")
+    dns_table.add_column("類型", style="cyan")
+    dns_table.add_column("記錄", no_wrap=False)
+    for rtype, r in report["dns"].items():
+        dns_table.add_row(rtype, "\n".join(r["records"]) or f"[dim]{r.get('error') or ''}[/dim]")
+    console.print(dns_table)
+
+    checks = Table(title="檢查結果", show_header=True, header_style="bold cyan")
+    checks.add_column("項目", style="cyan")
+    checks.add_column("目標")
+    checks.add_column("結果")
+    checks.add_column("耗時 ms", justify="right")
+    checks.add_column("摘要", no_wrap=False)
+
+    def add(name: str, r: dict | None) -> None:
+        if r is None:
+            return
+        mark = "[green]✓[/green]" if r["ok"] else "[red]✗[/red]"
+        elapsed = "" if r["elapsed_ms"] is None else f"{r['elapsed_ms']:.0f}"
+        checks.add_row(name, r["target"], mark, elapsed, summarize(r)[:80])
+
+    add("WHOIS", report["whois"])
+    add("HTTP", report["http"])
+    for r in report["ssl"].values():
+        add("SSL", r)
+    for r in report["ip_whois"].values():
+        add("IP WHOIS", r)
+    console.print(checks)
+
+    for ip, entry in report["ports"].items():
+        opened = ", ".join(f"{p['port']}({p['service']})" for p in entry["open_ports"]) or "無"
+        console.print(f"[cyan]{ip}[/cyan] 開放連接埠：{opened}  [dim]（掃描 {len(entry['results'])} 個）[/dim]")
+
+    timings = "  ".join(f"{k} {v:.0f}" for k, v in report["branch_ms"].items())
+    console.print(f"[dim]各分支耗時 ms：{timings}[/dim]")
+
+
+# ── run ─────────────────────────────────────────────────────────────────────
+@app.command("run")
+def run_jobs(
+    job_file: str = typer.Argument(..., help="工作檔（.yaml / .toml / .json）"),
+    out: Optional[str] = typer.Option(None, "--out", "-d", help="結果目錄（預設為設定檔 settings.output 或 <工作檔名>-results）"),
+    concurrency: Optional[int] = typer.Option(None, "--concurrency", "-c", help="同時執行的檢查數（覆蓋設定檔）"),
+    fresh: bool = typer.Option(False, "--fresh", help="忽略既有結果，重新執行全部檢查"),
+    retry_failed: bool = typer.Option(False, "--retry-failed", help="續跑時重新執行先前失敗的檢查"),
+):
+    """依工作檔批次執行檢查，結果逐筆寫入 NDJSON，中斷後可從檢查點續跑"""
+    from pathlib import Path
+    from sysmon.core.jobs import JobRunner, load_jobs
+
+    try:
+        jf = load_jobs(job_file)
+    except (OSError, ValueError) as e:
+        err_console.print(f"[red]工作檔錯誤：{e}[/red]")
+        raise typer.Exit(1)
+
+    path = Path(job_file)
+    output_dir = Path(out) if out else path.parent / (jf.output or f"{path.stem}-results")
+    runner = JobRunner(jf, output_dir, concurrency=concurrency, resume=not fresh, retry_failed=retry_failed)
+
+    if _machine():
+        if _output != OutputFormat.json:
+            from sysmon.output import RecordWriter
+
+            # ndjson / csv：除寫入結果檔外，也逐筆輸出到 stdout
+            runner.on_result = RecordWriter(_output).write
+        summary = runner.run()
+        if _output == OutputFormat.json:
+            _emit(vars(summary))
+        if summary.interrupted:
+            raise typer.Exit(130)
+        return
+
+    from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn, TimeElapsedColumn, TimeRemainingColumn
+
+    total = runner.total()
+    console.print(f"[cyan]{len(jf.jobs)} 個工作、{total:,} 項檢查，並發 {runner.concurrency}，結果目錄 {output_dir}[/cyan]")
+    with Progress(
+        TextColumn("[cyan]執行中"), BarColumn(), MofNCompleteColumn(), TimeElapsedColumn(), TimeRemainingColumn(),
+        console=console.get(),
+    ) as progress:
+        task = progress.add_task("run", total=total)
+        # 續跑時略過的項目也計入進度
+        runner.on_progress = lambda done, _total: progress.update(task, completed=done)
+        summary = runner.run()
+        progress.update(task, completed=summary.skipped + summary.completed)
+
+    color = "yellow" if summary.interrupted or summary.failed else "green"
+    console.print(
+        f"[{color}]完成 {summary.completed:,} 項（失敗 {summary.failed:,}），"
+        f"略過已完成 {summary.skipped:,} 項，耗時 {summary.elapsed_s:.1f} 秒[/{color}]"
+    )
+    if summary.interrupted:
+        console.print("[yellow]已中斷，重新執行同一命令即可從檢查點續跑[/yellow]")
+        raise typer.Exit(130)
+
+
 # ── subnet ────────────────────────────────────────────────────────────────────
 @app.command()
 def subnet(
     cidr: str = typer.Argument(..., help="CIDR 表示法，如 192.168.1.0/24"),
+    hosts: bool = typer.Option(False, "--hosts", help="分頁列出可用主機"),
+    split: Optional[int] = typer.Option(None, "--split", help="分割為指定前綴長度的子網路"),
+    page: int = typer.Option(1, "--page", help="頁碼（從 1 開始）"),
+    page_size: int = typer.Option(256, "--page-size", help="每頁筆數"),
+    export: Optional[str] = typer.Option(None, "--export", help="搭配 --split：串流寫出全部子網路至檔案（- 為標準輸出）"),
 ):
     """子網路 CIDR 計算"""
-    from sysmon.core.subnet_calc import calculate_subnet
+    from sysmon.core.subnet_calc import calculate_subnet, host_page, split_subnet, iter_subnets
+
+    if split is not None:
+        result = split_subnet(cidr, split, page, page_size)
+        if "error" in result:
+            if _machine():
+                return _emit(result, failed=True)
+            console.print(f"[red]錯誤：{result['error']}[/red]")
+            raise typer.Exit(1)
+
+        if export:
+            # 逐行寫出，不論子網路數量多寡記憶體用量固定
+            out = sys.stdout if export == "-" else open(export, "w", encoding="utf-8")
+            try:
+                for s in iter_subnets(cidr, split):
+                    out.write(s + "\n")
+            finally:
+                if out is not sys.stdout:
+                    out.close()
+            if export != "-" and not _machine():
+                console.print(f"[green]已匯出 {result['count']:,} 個子網路至 {export}[/green]")
+            return
+
+        if _machine():
+            return _emit(result, [
+                {"index": i, "subnet": sub} for i, sub in enumerate(result["subnets"], start=result["offset"] + 1)
+            ])
+
+        from rich.table import Table
+
+        table = Table(
+            title=f"子網路分割 — {result['parent']} → /{result['new_prefix']}",
+            show_header=True, header_style="bold cyan",
+        )
+        table.add_column("#", style="dim", justify="right")
+        table.add_column("子網路", style="white")
+        for i, s in enumerate(result["subnets"], start=result["offset"] + 1):
+            table.add_row(f"{i:,}", s)
+        console.print(table)
+        console.print(f"[dim]第 {result['page']:,} / {result['pages']:,} 頁，共 {result['count']:,} 個子網路[/dim]")
+        return
 
     result = calculate_subnet(cidr)
+    if _machine():
+        if hosts and "error" not in result:
+            pg = host_page(cidr, page, page_size)
+            return _emit(pg, [{"host": h} for h in pg["hosts"]])
+        return _emit(result, failed="error" in result)
     if "error" in result:
         console.print(f"[red]錯誤：{result['error']}[/red]")
         raise typer.Exit(1)
@@ -273,6 +727,115 @@ def subnet(
     }
     console.print(_table(f"子網路計算 — {cidr}", rows))
 
+    if hosts:
+        pg = host_page(cidr, page, page_size)
+        for h in pg["hosts"]:
+            console.print(h)
+        console.print(f"[dim]第 {pg['page']:,} / {pg['pages']:,} 頁，共 {pg['total']:,} 個主機[/dim]")
+
+
+# ── bulk ──────────────────────────────────────────────────────────────────────
+bulk_app = typer.Typer(help="大量 IP / CIDR 集合運算（讀取檔案，每行一筆，支援 # 註解）")
+app.add_typer(bulk_app, name="bulk")
+
+
+def _read_list(path: str) -> list[str]:
+    from sysmon.core.ip_bulk import read_lines
+
+    try:
+        with open(path, encoding="utf-8") as f:
+            return read_lines(f.read())
+    except OSError as e:
+        err_console.print(f"[red]無法讀取檔案：{e}[/red]")
+        raise typer.Exit(1)
+
+
+def _write_lines(lines, out: Optional[str]) -> None:
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            for line in lines:
+                f.write(line + "\n")
+    else:
+        for line in lines:
+            sys.stdout.write(line + "\n")
+
+
+def _report_invalid(invalid: list[str]) -> None:
+    if invalid:
+        err_console.print(f"[yellow]⚠️  略過 {len(invalid):,} 筆格式錯誤：{', '.join(invalid[:5])}{' ...' if len(invalid) > 5 else ''}[/yellow]")
+
+
+@bulk_app.command("match")
+def bulk_match(
+    ips_file: str = typer.Argument(..., help="IP 清單檔案"),
+    prefixes_file: str = typer.Argument(..., help="CIDR 清單檔案"),
+    out: Optional[str] = typer.Option(None, "--out", help="輸出 CSV 檔案（預設標準輸出）"),
+    unmatched: bool = typer.Option(False, "--unmatched", help="一併輸出未命中的 IP"),
+):
+    """找出每個 IP 所屬的最長前綴（輸出 ip,prefix）"""
+    from sysmon.core.ip_bulk import match_addresses
+
+    ips = _read_list(ips_file)
+    prefixes = _read_list(prefixes_file)
+    result = match_addresses(ips, prefixes)
+    match = result["match"].tolist()
+
+    def rows():
+        yield "ip,prefix"
+        for ip_text, idx in zip(ips, match):
+            if idx >= 0:
+                yield f"{ip_text},{prefixes[idx]}"
+            elif unmatched:
+                yield f"{ip_text},"
+
+    _write_lines(rows(), out)
+    _report_invalid(result["invalid_ips"] + result["invalid_prefixes"])
+    err_console.print(f"[dim]{result['matched']:,} / {result['total']:,} 個 IP 命中[/dim]")
+
+
+@bulk_app.command("collapse")
+def bulk_collapse(
+    prefixes_file: str = typer.Argument(..., help="CIDR 清單檔案"),
+    out: Optional[str] = typer.Option(None, "--out", help="輸出檔案（預設標準輸出）"),
+):
+    """合併重疊與相鄰的 CIDR"""
+    from sysmon.core.ip_bulk import collapse_prefixes
+
+    result = collapse_prefixes(_read_list(prefixes_file))
+    _write_lines(result["prefixes"], out)
+    _report_invalid(result["invalid"])
+    err_console.print(f"[dim]{result['input_count']:,} 筆合併為 {len(result['prefixes']):,} 筆[/dim]")
+
+
+@bulk_app.command("overlap")
+def bulk_overlap(
+    prefixes_file: str = typer.Argument(..., help="CIDR 清單檔案"),
+    out: Optional[str] = typer.Option(None, "--out", help="輸出 CSV 檔案（預設標準輸出）"),
+):
+    """找出被其他前綴包含或重複的 CIDR（輸出 prefix,contained_in,kind）"""
+    from sysmon.core.ip_bulk import find_overlaps
+
+    result = find_overlaps(_read_list(prefixes_file))
+    lines = ["prefix,contained_in,kind"] + [
+        f"{o['prefix']},{o['contained_in']},{o['kind']}" for o in result["overlaps"]
+    ]
+    _write_lines(lines, out)
+    _report_invalid(result["invalid"])
+
+
+@bulk_app.command("subtract")
+def bulk_subtract(
+    prefixes_file: str = typer.Argument(..., help="CIDR 清單檔案"),
+    remove_file: str = typer.Argument(..., help="要扣除的 CIDR 清單檔案"),
+    out: Optional[str] = typer.Option(None, "--out", help="輸出檔案（預設標準輸出）"),
+):
+    """從 CIDR 清單中扣除另一份清單的範圍"""
+    from sysmon.core.ip_bulk import subtract_prefixes
+
+    result = subtract_prefixes(_read_list(prefixes_file), _read_list(remove_file))
+    _write_lines(result["prefixes"], out)
+    _report_invalid(result["invalid"])
+
 
 # ── system ────────────────────────────────────────────────────────────────────
 @app.command()
@@ -280,8 +843,15 @@ def system():
     """顯示本機系統資訊（OS、CPU、RAM、磁碟）"""
     from sysmon.core.system_info import get_all_system_info
 
-    with console.status("讀取系統資訊..."):
-        info = get_all_system_info()
+    with _status("讀取系統資訊..."):
+        # 單次執行沒有取樣歷史，要求至少 0.25 秒的取樣區間以得到有意義的使用率
+        info = get_all_system_info(cpu_min_span=0.25)
+
+    if _machine():
+        return _emit(info)
+
+    from rich.table import Table
+    from rich.panel import Panel
 
     # OS
     os_i = info["os"]
@@ -333,16 +903,95 @@ def system():
         )
     console.print(disk_table)
 
+    # 磁碟 I/O（讀取系統資訊期間的計數器差值）
+    if info.get("disk_io"):
+        console.print(_disk_io_table(info["disk_io"]))
+
 
 # ── network ────────────────────────────────────────────────────────────────────
+def _fmt_rate(bps: float) -> str:
+    for unit in ("B/s", "KB/s", "MB/s"):
+        if bps < 1024:
+            return f"{bps:.1f} {unit}"
+        bps /= 1024
+    return f"{bps:.1f} GB/s"
+
+
+def _render_net_rates(rows: list[dict]) -> Table:
+    from rich.table import Table
+
+    table = Table(title="🌐 網路介面速率", show_header=True, header_style="bold cyan")
+    table.add_column("介面", style="cyan")
+    table.add_column("上傳", justify="right")
+    table.add_column("下載", justify="right")
+    table.add_column("封包/s 出", justify="right")
+    table.add_column("封包/s 入", justify="right")
+    table.add_column("錯誤 入/出", justify="right")
+    table.add_column("丟棄 入/出", justify="right")
+    for r in rows:
+        errors = f"{r['errin']}/{r['errout']}"
+        drops = f"{r['dropin']}/{r['dropout']}"
+        table.add_row(
+            r["name"],
+            _fmt_rate(r["sent_bps"]),
+            _fmt_rate(r["recv_bps"]),
+            f"{r['packets_sent_ps']:.0f}",
+            f"{r['packets_recv_ps']:.0f}",
+            f"[red]{errors}[/red]" if r["errin"] or r["errout"] else errors,
+            f"[yellow]{drops}[/yellow]" if r["dropin"] or r["dropout"] else drops,
+        )
+    return table
+
+
 @app.command()
-def network():
+def network(
+    watch: Optional[float] = typer.Option(None, "--watch", "-w", help="每 N 秒持續顯示各介面即時速率"),
+):
     """顯示本機網路介面資訊"""
     from sysmon.core.system_info import get_network_interfaces
 
-    with console.status("讀取網路介面..."):
+    if watch:
+        import time
+        from sysmon.core.system_info import get_network_rates, net_rate_tracker
+
+        tracker = net_rate_tracker()
+        tracker.update()
+        if _machine():
+            if _output == OutputFormat.json:
+                err_console.print("[red]--watch 為持續輸出，請改用 --output ndjson 或 csv[/red]")
+                raise typer.Exit(1)
+            from sysmon.output import RecordWriter
+
+            writer = RecordWriter(_output)
+            try:
+                while True:
+                    time.sleep(watch)
+                    now = time.time()
+                    for r in get_network_rates(tracker):
+                        writer.write({"ts": now, **r})
+            except KeyboardInterrupt:
+                pass
+            return
+
+        from rich.live import Live
+
+        try:
+            with Live(_render_net_rates([]), console=console.get(), refresh_per_second=4) as live:
+                while True:
+                    time.sleep(watch)
+                    live.update(_render_net_rates(get_network_rates(tracker)))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    with _status("讀取網路介面..."):
         interfaces = get_network_interfaces()
 
+    if _machine():
+        return _emit(interfaces, interfaces)
+
+    from rich.table import Table
+
     table = Table(title="🌐 網路介面", show_header=True, header_style="bold cyan")
     table.add_column("介面", style="cyan")
     table.add_column("IPv4")
@@ -369,6 +1018,353 @@ def network():
     console.print(table)
 
 
+# ── top ────────────────────────────────────────────────────────────────────────
+def _disk_io_table(rows: list[dict]) -> Table:
+    from rich.table import Table
+
+    table = Table(title="💿 磁碟 I/O", header_style="bold cyan")
+    table.add_column("裝置", style="cyan")
+    table.add_column("讀 IOPS", justify="right")
+    table.add_column("寫 IOPS", justify="right")
+    table.add_column("讀 MB/s", justify="right")
+    table.add_column("寫 MB/s", justify="right")
+    table.add_column("讀延遲 ms", justify="right")
+    table.add_column("寫延遲 ms", justify="right")
+    table.add_column("忙碌 %", justify="right")
+    for d in rows:
+        table.add_row(
+            d["device"],
+            f"{d['read_iops']:.0f}",
+            f"{d['write_iops']:.0f}",
+            f"{d['read_mb_s']:.2f}",
+            f"{d['write_mb_s']:.2f}",
+            f"{d['avg_read_ms']:.2f}",
+            f"{d['avg_write_ms']:.2f}",
+            "" if d["busy_percent"] is None else f"{d['busy_percent']:.1f}",
+        )
+    return table
+
+
+def _bar(percent: float, width: int = 20) -> str:
+    filled = int(round(percent / 100 * width))
+    color = "green" if percent < 50 else "yellow" if percent < 80 else "red"
+    return f"[{color}]{'█' * filled}[/{color}][dim]{'░' * (width - filled)}[/dim] {percent:5.1f}%"
+
+
+def _process_table(rows: list[dict], detail: bool = False) -> Table:
+    from rich.table import Table
+
+    table = Table(title="📋 行程", header_style="bold cyan", expand=True)
+    table.add_column("PID", justify="right", style="cyan")
+    table.add_column("名稱")
+    table.add_column("使用者", style="dim")
+    table.add_column("CPU %", justify="right")
+    table.add_column("RSS MB", justify="right")
+    table.add_column("執行緒", justify="right")
+    if detail:
+        table.add_column("FD", justify="right")
+        table.add_column("讀取", justify="right")
+        table.add_column("寫入", justify="right")
+    for p in rows:
+        cells = [
+            str(p["pid"]), p["name"][:30], p["user"][:12],
+            f"{p['cpu_percent']:.1f}", f"{p['rss_mb']:.1f}", str(p["threads"]),
+        ]
+        if detail:
+            cells += [
+                "" if p["num_fds"] is None else str(p["num_fds"]),
+                "" if p["read_bps"] is None else _fmt_rate(p["read_bps"]),
+                "" if p["write_bps"] is None else _fmt_rate(p["write_bps"]),
+            ]
+        table.add_row(*cells)
+    return table
+
+
+def _render_top(data: dict):
+    from rich.console import Group
+    from rich.columns import Columns
+    from rich.table import Table
+
+    cpu = data["cpu"]
+    cores = Table(title=f"⚡ CPU {cpu['total']:.1f}%", show_header=False, box=None)
+    for i, pct in enumerate(cpu["per_core"]):
+        cores.add_row(f"核心 {i:>2}", _bar(pct))
+
+    mem = data["memory"]
+    load = data.get("load_avg")
+    mem_table = Table(title="💾 記憶體", show_header=False, box=None)
+    mem_table.add_row("RAM", _bar(mem["percent"]))
+    mem_table.add_row("", f"{mem['used_gb']:.1f} / {mem['total_gb']:.1f} GB")
+    mem_table.add_row("Swap", _bar(mem["swap_percent"]))
+    if load:
+        mem_table.add_row("負載", " ".join(f"{v:.2f}" for v in load))
+
+    disk_table = _disk_io_table(list(data["disks"].values()))
+
+    nic_table = Table(title="🌐 網路介面", header_style="bold cyan")
+    nic_table.add_column("介面", style="cyan")
+    nic_table.add_column("上傳", justify="right")
+    nic_table.add_column("下載", justify="right")
+    for name, r in sorted(data["nics"].items()):
+        nic_table.add_row(name, _fmt_rate(r["sent_bps"]), _fmt_rate(r["recv_bps"]))
+
+    return Group(
+        Columns([cores, mem_table]),
+        Columns([disk_table, nic_table]),
+        _process_table(data["processes"]),
+    )
+
+
+@app.command()
+def top(
+    interval: float = typer.Option(1.0, "--interval", "-i", help="更新間隔秒數"),
+    count: int = typer.Option(15, "--top", "-n", help="顯示前 N 個行程"),
+    sort: str = typer.Option("cpu", "--sort", help="行程排序：cpu / mem / fds / threads / io"),
+    iterations: int = typer.Option(0, "--iterations", help="更新次數後結束（0 為持續執行）"),
+):
+    """類 top 即時監控：每核心使用率、記憶體、磁碟/網路速率、行程"""
+    import time
+    from rich.live import Live
+    from sysmon.core.top import TopCollector
+
+    collector = TopCollector(interval=interval, top_n=count, sort_by=sort)
+    time.sleep(interval)
+    ticks = 0
+    try:
+        with Live(_render_top(collector.collect()), console=console.get(), refresh_per_second=4, screen=False) as live:
+            while True:
+                ticks += 1
+                if iterations and ticks >= iterations:
+                    break
+                time.sleep(interval)
+                live.update(_render_top(collector.collect()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        collector.close()
+
+
+# ── ps ───────────────────────────────────────────────────────────────────────
+@app.command()
+def ps(
+    sort: str = typer.Option("cpu", "--sort", "-s", help="排序：cpu / mem / fds / threads / io / pid / name"),
+    descending: Optional[bool] = typer.Option(None, "--desc/--asc", help="排序方向（預設 pid / name 遞增，其餘遞減）"),
+    count: int = typer.Option(20, "--top", "-n", help="顯示前 N 個行程（0 為全部）"),
+    name: str = typer.Option("", "--filter", "-f", help="依名稱（部分比對）或 PID 篩選"),
+    user: str = typer.Option("", "--user", "-u", help="只顯示指定使用者的行程"),
+    interval: float = typer.Option(0.5, "--interval", "-i", help="CPU% / I/O 速率取樣間隔秒數"),
+    watch: bool = typer.Option(False, "--watch", "-w", help="每 interval 秒持續更新"),
+):
+    """列出行程的 CPU%、RSS、開啟 FD、執行緒與 I/O 速率"""
+    import time
+    from sysmon.core.process_info import ProcessMonitor
+
+    monitor = ProcessMonitor()
+    monitor.refresh()
+
+    def snapshot() -> list[dict]:
+        return monitor.snapshot(sort_by=sort, name_filter=name, user=user, top_n=count or None, descending=descending)
+
+    if watch and _machine():
+        if _output == OutputFormat.json:
+            err_console.print("[red]--watch 為持續輸出，請改用 --output ndjson 或 csv[/red]")
+            raise typer.Exit(1)
+        from sysmon.output import RecordWriter
+
+        writer = RecordWriter(_output)
+        try:
+            while True:
+                time.sleep(interval)
+                now = time.time()
+                for r in snapshot():
+                    writer.write({"ts": now, **r})
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if watch:
+        from rich.live import Live
+
+        try:
+            with Live(_process_table([], detail=True), console=console.get(), refresh_per_second=4) as live:
+                while True:
+                    time.sleep(interval)
+                    live.update(_process_table(snapshot(), detail=True))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    time.sleep(interval)
+    rows = snapshot()
+    if _machine():
+        return _emit(rows, rows)
+    if not rows:
+        console.print("[yellow]沒有符合條件的行程[/yellow]")
+        return
+    console.print(_process_table(rows, detail=True))
+
+
+# ── agent ────────────────────────────────────────────────────────────────────
+@app.command()
+def agent(
+    directory: Optional[str] = typer.Option(None, "--dir", "-d", help="記錄目錄（預設 $SYSMON_DATA_DIR 或 ~/.local/share/sysmon/samples）"),
+    interval: float = typer.Option(0.5, "--interval", "-i", help="取樣間隔秒數（可小於 1）"),
+    max_mb: int = typer.Option(64, "--max-mb", help="單一檔案上限 MB，超過即輪替"),
+    rotate_hours: float = typer.Option(24.0, "--rotate-hours", help="每 N 小時輪替一次"),
+    keep: int = typer.Option(30, "--keep", help="保留最近 N 個檔案（0 為不刪除）"),
+    duration: float = typer.Option(0.0, "--duration", help="執行 N 秒後結束（0 為持續執行）"),
+    rollup: bool = typer.Option(True, "--rollup/--no-rollup", help="同時維護歷史查詢用的多解析度彙總"),
+    rollup_interval: float = typer.Option(10.0, "--rollup-interval", help="彙總更新間隔秒數"),
+):
+    """無介面背景取樣：將系統指標寫入固定寬度二進位記錄檔"""
+    import signal
+    import threading
+    import time
+    from sysmon.core.samplelog import SampleLogWriter, default_data_dir
+    from sysmon.core.timeseries import METRIC_FIELDS, MetricsSampler
+
+    writer = SampleLogWriter(
+        directory or default_data_dir(), METRIC_FIELDS,
+        max_bytes=max_mb * 1024 ** 2, rotate_s=rotate_hours * 3600, keep=keep,
+    )
+    sampler = MetricsSampler(interval=interval, capacity=60, on_sample=writer.append)
+
+    store = None
+    if rollup:
+        from sysmon.core.rollup import RollupStore
+
+        # 啟動時先補上既有記錄檔中尚未彙總的樣本
+        store = RollupStore(writer.directory, METRIC_FIELDS)
+        store.update()
+
+    done = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: done.set())
+    console.print(f"[cyan]取樣中：每 {interval:g} 秒 → {writer.directory}[/cyan]（Ctrl+C 結束）")
+    sampler.start()
+    deadline = time.monotonic() + duration if duration else None
+    try:
+        while not done.is_set():
+            remaining = deadline - time.monotonic() if deadline else rollup_interval
+            if remaining <= 0:
+                break
+            done.wait(min(remaining, rollup_interval) if store else remaining)
+            if store:
+                writer.flush()
+                store.update()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sampler.stop()
+        writer.close()
+        if store:
+            store.update()
+
+
+# ── export ───────────────────────────────────────────────────────────────────
+def _split_host_port(spec: str, default_port: int) -> tuple[str, int]:
+    host, sep, port = spec.rpartition(":")
+    if sep and port.isdigit() and "]" not in port:
+        return host.strip("[]"), int(port)
+    return spec, default_port
+
+
+@app.command()
+def export(
+    host: str = typer.Option("127.0.0.1", "--host", help="監聽位址"),
+    port: int = typer.Option(9110, "--port", "-p", help="監聽連接埠"),
+    interval: float = typer.Option(5.0, "--interval", "-i", help="系統指標收集間隔秒數"),
+    probe_interval: float = typer.Option(60.0, "--probe-interval", help="探測收集間隔秒數"),
+    dns_targets: Optional[list[str]] = typer.Option(None, "--dns", help="DNS 探測域名（可重複）"),
+    ssl_targets: Optional[list[str]] = typer.Option(None, "--ssl", help="SSL 探測 host[:port]（可重複）"),
+    http_targets: Optional[list[str]] = typer.Option(None, "--http", help="HTTP 探測 URL（可重複）"),
+    port_targets: Optional[list[str]] = typer.Option(None, "--ports", help="連接埠探測 host:22,80,443（可重複）"),
+):
+    """以 Prometheus 文字格式匯出系統指標與探測結果（HTTP /metrics）"""
+    from sysmon.core.exporter import (
+        Exporter, dns_probe, http_probe, make_server, port_probe, ssl_probe, system_metrics,
+    )
+
+    exporter = Exporter().add("system", system_metrics, interval)
+    for domain in dns_targets or []:
+        exporter.add(f"dns:{domain}", lambda d=domain: dns_probe(d), probe_interval)
+    for spec in ssl_targets or []:
+        h, p = _split_host_port(spec, 443)
+        exporter.add(f"ssl:{h}:{p}", lambda h=h, p=p: ssl_probe(h, p), probe_interval)
+    for url in http_targets or []:
+        exporter.add(f"http:{url}", lambda u=url: http_probe(u), probe_interval)
+    for spec in port_targets or []:
+        h, _, plist = spec.rpartition(":")
+        try:
+            ports = [int(x) for x in plist.split(",") if x.strip()]
+        except ValueError:
+            ports = []
+        if not h or not ports:
+            console.print(f"[red]連接埠探測格式錯誤：{spec}（應為 host:22,80,443）[/red]")
+            raise typer.Exit(1)
+        exporter.add(f"ports:{h}", lambda h=h, ports=ports: port_probe(h, ports), probe_interval)
+
+    try:
+        server = make_server(exporter, host, port)
+    except OSError as e:
+        console.print(f"[red]無法監聽 {host}:{port}：{e}[/red]")
+        raise typer.Exit(1)
+
+    exporter.start()
+    console.print(f"[cyan]Prometheus 指標：http://{host}:{port}/metrics[/cyan]（Ctrl+C 結束）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        exporter.stop()
+
+
+# ── alert ────────────────────────────────────────────────────────────────────
+@app.command()
+def alert(
+    config: str = typer.Argument(..., help="TOML 告警設定檔"),
+    check: bool = typer.Option(False, "--check", help="只驗證設定並列出規則"),
+    duration: float = typer.Option(0.0, "--duration", help="執行 N 秒後結束（0 為持續執行）"),
+):
+    """依設定檔持續評估告警規則（系統指標 + 探測），觸發時送出通知"""
+    import signal
+    import threading
+    from sysmon.core.alerts import AlertRunner, load_config
+    from rich.table import Table
+
+    try:
+        cfg = load_config(config)
+    except (OSError, ValueError) as e:
+        console.print(f"[red]設定檔錯誤：{e}[/red]")
+        raise typer.Exit(1)
+
+    table = Table(title=f"🚨 告警規則（{len(cfg.rules)}）", header_style="bold cyan")
+    table.add_column("名稱", style="cyan")
+    table.add_column("條件")
+    table.add_column("持續", justify="right")
+    table.add_column("等級")
+    for r in cfg.rules:
+        labels = ",".join(f"{k}={v}" for k, v in r.labels.items())
+        target = f"{r.metric}{{{labels}}}" if labels else r.metric
+        expr = target if r.agg == "last" else f"{r.agg}({target}[{r.window:g}s])"
+        table.add_row(r.name, f"{expr} {r.op} {r.threshold:g}", f"{r.for_s:g}s" if r.for_s else "", r.severity)
+    console.print(table)
+    if check:
+        return
+
+    runner = AlertRunner(cfg).start()
+    done = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: done.set())
+    console.print(f"[cyan]監控中：系統每 {cfg.interval:g} 秒、探測 {len(cfg.probes)} 項[/cyan]（Ctrl+C 結束）")
+    try:
+        done.wait(duration or None)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        runner.stop()
+
+
 # ── serve ────────────────────────────────────────────────────────────────────
 @app.command()
 def serve(
@@ -377,6 +1373,7 @@ def serve(
     """啟動 Streamlit Web 介面（本機）"""
     import os
     import pathlib
+    import subprocess
 
     # 找到 app.py 的位置（與此 CLI 模組同一專案根目錄）
     pkg_dir = pathlib.Path(__file__).parent.parent
@@ -0,0 +1,492 @@
+"""
+告警規則引擎（TOML 設定、滑動視窗增量彙總、可插拔通知）
+
+指標名稱與 `sysmon export` 相同但省略 `sysmon_` 前綴，例如
+cpu_usage_percent、memory_used_percent、filesystem_used_percent{mountpoint}、
+ssl_cert_days_left{host,port}、http_response_seconds{url}、port_open{host,port}。
+"""
+
+from __future__ import annotations
+
+import abc
+import bisect
+import json
+import operator
+import re
+import string
+import sys
+import threading
+import time
+import tomllib
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+OPERATORS: dict[str, Callable[[float, float], bool]] = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+_DURATION_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(ms|s|m|h|d)?\s*$")
+_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, "d": 86400, None: 1}
+
+
+def parse_duration(value: str | int | float) -> float:
+    """'5m'、'30s'、'1h'、'1d' 或數字（秒）轉為秒數"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    m = _DURATION_RE.match(value)
+    if not m:
+        raise ValueError(f"無法解析時間長度：{value!r}")
+    return float(m.group(1)) * _UNITS[m.group(2)]
+
+
+# ── 滑動視窗 ───────────────────────────────────────────────────────────────────
+class SlidingWindow:
+    """
+    時間滑動視窗，每次 add() 只處理新增與過期的樣本：
+    平均用累計和、最小/最大用單調佇列、百分位數用 bisect 維護的排序串列。
+    """
+
+    def __init__(self, span: float, need_sorted: bool = False):
+        self.span = span
+        self._items: deque[tuple[float, float]] = deque()
+        self._sum = 0.0
+        self._min: deque[tuple[float, float]] = deque()
+        self._max: deque[tuple[float, float]] = deque()
+        self._sorted: list[float] | None = [] if need_sorted else None
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, ts: float, value: float) -> None:
+        self._items.append((ts, value))
+        self._sum += value
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((ts, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((ts, value))
+        if self._sorted is not None:
+            bisect.insort(self._sorted, value)
+        self._expire(ts)
+
+    def _expire(self, now: float) -> None:
+        # span = 0 時只保留同一時間戳的最新樣本（即 last）
+        cutoff = now - self.span
+        while self._items and self._items[0][0] < cutoff:
+            ts, value = self._items.popleft()
+            self._sum -= value
+            if self._min[0][0] <= ts:
+                self._min.popleft()
+            if self._max[0][0] <= ts:
+                self._max.popleft()
+            if self._sorted is not None:
+                del self._sorted[bisect.bisect_left(self._sorted, value)]
+
+    def aggregate(self, agg: str) -> float | None:
+        if not self._items:
+            return None
+        if agg == "last":
+            return self._items[-1][1]
+        if agg == "avg":
+            return self._sum / len(self._items)
+        if agg == "min":
+            return self._min[0][1]
+        if agg == "max":
+            return self._max[0][1]
+        if agg == "count":
+            return float(len(self._items))
+        # pNN：最近秩（nearest-rank）
+        q = float(agg[1:]) / 100
+        idx = min(max(int(q * len(self._sorted) + 0.999999) - 1, 0), len(self._sorted) - 1)
+        return self._sorted[idx]
+
+
+# ── 規則 ───────────────────────────────────────────────────────────────────────
+@dataclass
+class Rule:
+    name: str
+    metric: str
+    op: str
+    threshold: float
+    labels: dict[str, str] = field(default_factory=dict)
+    agg: str = "last"
+    window: float = 0.0
+    for_s: float = 0.0
+    severity: str = "warning"
+    message: str = ""
+
+    def matches(self, labels: dict[str, str]) -> bool:
+        return all(labels.get(k) == v for k, v in self.labels.items())
+
+    @classmethod
+    def from_dict(cls, raw: dict[str, Any]) -> "Rule":
+        """
+        Raises:
+            ValueError: 欄位缺少或不合法
+        """
+        for key in ("name", "metric", "op", "threshold"):
+            if key not in raw:
+                raise ValueError(f"規則缺少欄位 {key!r}：{raw}")
+        if raw["op"] not in OPERATORS:
+            raise ValueError(f"規則 {raw['name']}：不支援的運算子 {raw['op']!r}")
+        agg = raw.get("agg", "last")
+        if agg not in ("last", "avg", "min", "max", "count") and not re.fullmatch(r"p\d+(\.\d+)?", agg):
+            raise ValueError(f"規則 {raw['name']}：不支援的彙總 {agg!r}")
+        window = parse_duration(raw.get("window", 0))
+        if agg != "last" and window <= 0:
+            raise ValueError(f"規則 {raw['name']}：agg={agg} 需要設定 window")
+        threshold = float(raw["threshold"])
+        message = raw.get("message", "")
+        if message:
+            _check_template(raw["name"], message, threshold)
+        return cls(
+            name=raw["name"],
+            metric=raw["metric"].removeprefix("sysmon_"),
+            op=raw["op"],
+            threshold=threshold,
+            labels={k: str(v) for k, v in raw.get("labels", {}).items()},
+            agg=agg,
+            window=window,
+            for_s=parse_duration(raw.get("for", 0)),
+            severity=raw.get("severity", "warning"),
+            message=message,
+        )
+
+
+class _TemplateFields(dict):
+    """訊息樣板的欄位：序列沒有的標籤原樣保留為 {name}"""
+
+    def __missing__(self, key: str) -> str:
+        return "{" + key + "}"
+
+
+def _check_template(name: str, message: str, threshold: float) -> None:
+    """
+    訊息樣板只能使用 {value}、{threshold} 與標籤名稱（可加格式，如 {value:.1f}）。
+
+    Raises:
+        ValueError: 樣板語法錯誤、欄位不是名稱，或格式不適用
+    """
+    try:
+        fields = [f for _, f, _, _ in string.Formatter().parse(message) if f is not None]
+        for f in fields:
+            if not f.isidentifier():
+                raise ValueError(f"欄位 {{{f}}} 不合法，只能使用 value、threshold 與標籤名稱")
+        message.format_map(_TemplateFields(value=threshold, threshold=threshold))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"規則 {name}：訊息樣板錯誤：{e}") from e
+
+
+@dataclass
+class _SeriesState:
+    window: SlidingWindow
+    pending_since: float | None = None
+    firing: bool = False
+
+
+class AlertEngine:
+    """
+    依指標名稱將觀測值分派給規則；每條規則 × 每組標籤各有一個滑動視窗與狀態。
+    狀態轉為 firing 或 resolved 時才產生事件並送到所有通知端。
+    """
+
+    def __init__(self, rules: list[Rule], sinks: list["Sink"] | None = None):
+        self.rules = rules
+        self.sinks = sinks or []
+        self._by_metric: dict[str, list[Rule]] = {}
+        for rule in rules:
+            self._by_metric.setdefault(rule.metric, []).append(rule)
+        self._states: dict[tuple[str, tuple[tuple[str, str], ...]], _SeriesState] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, metric: str, labels: dict[str, str], value: float, ts: float | None = None) -> list[dict[str, Any]]:
+        rules = self._by_metric.get(metric.removeprefix("sysmon_"))
+        if not rules:
+            return []
+        ts = time.time() if ts is None else ts
+        events = []
+        with self._lock:
+            for rule in rules:
+                if rule.matches(labels):
+                    event = self._evaluate(rule, labels, value, ts)
+                    if event:
+                        events.append(event)
+        for event in events:
+            self._notify(event)
+        return events
+
+    def _evaluate(self, rule: Rule, labels: dict[str, str], value: float, ts: float) -> dict[str, Any] | None:
+        key = (rule.name, tuple(sorted(labels.items())))
+        state = self._states.get(key)
+        if state is None:
+            state = _SeriesState(SlidingWindow(rule.window, need_sorted=rule.agg.startswith("p")))
+            self._states[key] = state
+        state.window.add(ts, value)
+        current = state.window.aggregate(rule.agg)
+        breached = current is not None and OPERATORS[rule.op](current, rule.threshold)
+
+        if breached:
+            if state.pending_since is None:
+                state.pending_since = ts
+            if not state.firing and ts - state.pending_since >= rule.for_s:
+                # 先建立事件再改狀態，產生事件失敗時不會留下沒有通知過的 firing
+                event = self._event(rule, labels, current, ts, "firing")
+                state.firing = True
+                return event
+        else:
+            state.pending_since = None
+            if state.firing:
+                event = self._event(rule, labels, current, ts, "resolved")
+                state.firing = False
+                return event
+        return None
+
+    def _event(self, rule: Rule, labels: dict[str, str], value: float | None, ts: float, status: str) -> dict[str, Any]:
+        desc = f"{rule.metric}{'{' + ','.join(f'{k}={v}' for k, v in labels.items()) + '}' if labels else ''}"
+        agg = "" if rule.agg == "last" else f"{rule.agg}({_fmt_duration(rule.window)}) "
+        message = f"{agg}{desc} = {value:g} {rule.op} {rule.threshold:g}"
+        if rule.message:
+            try:
+                message = rule.message.format_map(_TemplateFields(labels, value=value, threshold=rule.threshold))
+            except (ValueError, TypeError):
+                pass  # 樣板格式不適用於此序列的標籤值時改用預設訊息
+        return {
+            "rule": rule.name,
+            "status": status,
+            "severity": rule.severity,
+            "metric": rule.metric,
+            "labels": labels,
+            "value": value,
+            "op": rule.op,
+            "threshold": rule.threshold,
+            "ts": ts,
+            "message": message,
+        }
+
+    def _notify(self, event: dict[str, Any]) -> None:
+        for sink in self.sinks:
+            try:
+                sink.send(event)
+            except Exception as e:
+                print(f"[alert] 通知失敗（{type(sink).__name__}）：{e}", file=sys.stderr)
+
+    def firing(self) -> list[tuple[str, dict[str, str]]]:
+        with self._lock:
+            return [(name, dict(labels)) for (name, labels), s in self._states.items() if s.firing]
+
+
+def _fmt_duration(seconds: float) -> str:
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size and seconds % size == 0:
+            return f"{int(seconds // size)}{unit}"
+    return f"{seconds:g}s"
+
+
+# ── 通知端 ─────────────────────────────────────────────────────────────────────
+class Sink(abc.ABC):
+    @abc.abstractmethod
+    def send(self, event: dict[str, Any]) -> None:
+        """送出一個 firing / resolved 事件；拋出的例外由 AlertEngine 記錄後略過"""
+
+
+class StdoutSink(Sink):
+    def __init__(self, json_lines: bool = False):
+        self.json_lines = json_lines
+
+    def send(self, event: dict[str, Any]) -> None:
+        if self.json_lines:
+            print(json.dumps(event, ensure_ascii=False), flush=True)
+            return
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(event["ts"]))
+        icon = "🔥" if event["status"] == "firing" else "✅"
+        print(f"{stamp} {icon} [{event['severity']}] {event['rule']} {event['status']}：{event['message']}", flush=True)
+
+
+class FileSink(Sink):
+    """每個事件附加為一行 JSON"""
+
+    def __init__(self, path: str):
+        self.path = Path(path).expanduser()
+        self._lock = threading.Lock()
+
+    def send(self, event: dict[str, Any]) -> None:
+        line = json.dumps(event, ensure_ascii=False) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+class WebhookSink(Sink):
+    """以 JSON POST 送出事件"""
+
+    def __init__(self, url: str, timeout: float = 5.0, headers: dict[str, str] | None = None):
+        self.url = url
+        self.timeout = timeout
+        self.headers = headers or {}
+
+    def send(self, event: dict[str, Any]) -> None:
+        import httpx
+
+        resp = httpx.post(self.url, json=event, timeout=self.timeout, headers=self.headers)
+        resp.raise_for_status()
+
+
+SINKS: dict[str, Callable[..., Sink]] = {
+    "stdout": StdoutSink,
+    "file": FileSink,
+    "webhook": WebhookSink,
+}
+
+
+def register_sink(name: str, factory: Callable[..., Sink]) -> None:
+    """註冊自訂通知端，設定檔中以 type = name 使用"""
+    SINKS[name] = factory
+
+
+# ── 設定檔 ─────────────────────────────────────────────────────────────────────
+@dataclass
+class AlertConfig:
+    rules: list[Rule]
+    sinks: list[Sink]
+    probes: list[dict[str, Any]]
+    interval: float = 5.0
+    probe_interval: float = 60.0
+
+
+PROBE_TYPES = ("dns", "ssl", "http", "ports")
+
+
+def load_config(path: str | Path) -> AlertConfig:
+    """
+    讀取 TOML 告警設定。
+
+    Raises:
+        ValueError: 設定內容不合法
+        OSError: 檔案無法讀取
+    """
+    with open(path, "rb") as f:
+        try:
+            raw = tomllib.load(f)
+        except tomllib.TOMLDecodeError as e:
+            raise ValueError(f"TOML 格式錯誤：{e}") from e
+
+    settings = raw.get("settings", {})
+    rules = [Rule.from_dict(r) for r in raw.get("rule", [])]
+    if not rules:
+        raise ValueError("設定檔中沒有任何 [[rule]]")
+    names = [r.name for r in rules]
+    if len(set(names)) != len(names):
+        raise ValueError("規則名稱重複")
+
+    sinks: list[Sink] = []
+    for s in raw.get("sink", [{"type": "stdout"}]):
+        opts = dict(s)
+        kind = opts.pop("type", None)
+        if kind not in SINKS:
+            raise ValueError(f"不支援的通知端：{kind!r}（可用：{', '.join(SINKS)}）")
+        try:
+            sinks.append(SINKS[kind](**opts))
+        except TypeError as e:
+            raise ValueError(f"通知端 {kind} 參數錯誤：{e}") from e
+
+    probes = raw.get("probe", [])
+    for p in probes:
+        if p.get("type") not in PROBE_TYPES or not p.get("target"):
+            raise ValueError(f"探測設定需包含 type（{' / '.join(PROBE_TYPES)}）與 target：{p}")
+        if p["type"] in ("ssl", "ports"):
+            _probe_address(p)
+        if "interval" in p:
+            parse_duration(p["interval"])
+
+    return AlertConfig(
+        rules=rules,
+        sinks=sinks,
+        probes=probes,
+        interval=parse_duration(settings.get("interval", 5)),
+        probe_interval=parse_duration(settings.get("probe_interval", 60)),
+    )
+
+
+def _probe_address(probe: dict[str, Any]) -> tuple[str, list[int]]:
+    """
+    ssl（host[:port]，預設 443）與 ports（host:port,port,...）探測的主機與連接埠。
+
+    Raises:
+        ValueError: 目標格式不合法
+    """
+    kind, target = probe["type"], str(probe["target"])
+    host, sep, ports = target.rpartition(":")
+    if kind == "ssl" and not sep:
+        host, ports = target, "443"
+    try:
+        port_list = [int(p) for p in ports.split(",") if p.strip()]
+    except ValueError:
+        port_list = []
+    if not host or not port_list or not all(0 < p < 65536 for p in port_list):
+        example = "host 或 host:443" if kind == "ssl" else "host:22,80,443"
+        raise ValueError(f"{kind} 探測目標格式錯誤：{target!r}（應為 {example}）")
+    return host, port_list
+
+
+# ── 執行 ───────────────────────────────────────────────────────────────────────
+def _probe_fn(probe: dict[str, Any]) -> Callable[[], list]:
+    from sysmon.core import exporter
+
+    kind, target = probe["type"], probe["target"]
+    if kind == "dns":
+        return lambda: exporter.dns_probe(target, probe.get("record_type", "A"))
+    if kind == "http":
+        return lambda: exporter.http_probe(target)
+    host, ports = _probe_address(probe)
+    if kind == "ssl":
+        return lambda: exporter.ssl_probe(host, ports[0])
+    return lambda: exporter.port_probe(host, ports)
+
+
+class AlertRunner:
+    """以 BackgroundSampler 定期收集系統指標與探測結果，並逐筆送入 AlertEngine"""
+
+    def __init__(self, config: AlertConfig):
+        from sysmon.core.exporter import system_metrics
+        from sysmon.core.system_info import BackgroundSampler
+
+        self.engine = AlertEngine(config.rules, config.sinks)
+        self._samplers = [
+            BackgroundSampler(self._feeder(system_metrics), config.interval, name="sysmon-alert-system")
+        ]
+        for i, probe in enumerate(config.probes):
+            interval = parse_duration(probe.get("interval", config.probe_interval))
+            self._samplers.append(
+                BackgroundSampler(self._feeder(_probe_fn(probe)), interval, name=f"sysmon-alert-probe-{i}")
+            )
+
+    def _feeder(self, collect: Callable[[], list]) -> Callable[[], None]:
+        def run() -> None:
+            ts = time.time()
+            try:
+                metrics = collect()
+            except Exception as e:
+                print(f"[alert] 收集指標失敗：{type(e).__name__}: {e}", file=sys.stderr)
+                return
+            for metric in metrics:
+                if metric.type != "gauge":
+                    continue
+                for labels, value in metric.samples:
+                    self.engine.observe(metric.name, labels, float(value), ts)
+        return run
+
+    def start(self) -> "AlertRunner":
+        for sampler in self._samplers:
+            sampler.start(prime=False)
+        return self
+
+    def stop(self) -> None:
+        for sampler in self._samplers:
+            sampler.stop()
@@ -0,0 +1,164 @@
+"""
+域名完整稽核：先解析 DNS，再依解析結果並發展開其餘檢查
+
+    階段 1（同時進行）：A / AAAA 解析 ─┐        域名 WHOIS、MX / NS / TXT / CAA 記錄
+                                       ▼        （不依賴解析結果，與階段 1、2 並行）
+    階段 2（同時進行）：每個 IP 的 SSL 憑證、TCP 連接埠、IP WHOIS，以及 HTTP 檢測
+
+階段 2 直接連線到階段 1 解析出的 IP（SSL 以域名作為 SNI、HTTP 保留 Host 標頭），
+不重複 DNS 查詢。所有探測由 sysmon.core.probe 執行，總耗時接近最慢的一條分支。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Callable, Iterable
+
+from sysmon.core.probe import Probe, ProbeRunner, _is_ip
+
+ADDRESS_TYPES = ("A", "AAAA")
+EXTRA_TYPES = ("MX", "NS", "TXT", "CAA")
+
+
+def _normalize_domain(domain: str) -> str:
+    return domain.strip().removeprefix("https://").removeprefix("http://").split("/")[0].rstrip(".").lower()
+
+
+async def audit_async(
+    domain: str,
+    ports: Iterable[int] | None = None,
+    timeout: float = 10.0,
+    concurrency: int = 100,
+    per_host: int = 25,
+    max_ips: int = 4,
+    ip_whois: bool = True,
+    on_result: Callable[[dict[str, Any]], None] | None = None,
+) -> dict[str, Any]:
+    """
+    執行域名稽核並回傳合併報告。
+
+    Args:
+        domain: 域名（可含 http(s):// 前綴或路徑）
+        ports: 掃描的連接埠（預設為 port_scanner.COMMON_PORTS）
+        timeout: 單一探測逾時秒數
+        concurrency / per_host: 整次稽核（含並行的各分支）的全域與每個 IP 並發上限
+        max_ips: 最多對幾個解析出的位址做 SSL / 連接埠 / IP WHOIS 檢查
+        ip_whois: 是否查詢各 IP 的 ASN（RDAP）
+        on_result: 每筆探測完成時呼叫（進度顯示用）
+    """
+    from sysmon.core.port_scanner import COMMON_PORTS
+
+    domain = _normalize_domain(domain)
+    ports = list(ports or COMMON_PORTS)
+    started = time.perf_counter()
+    started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    # 兩條分支共用同一個 runner，concurrency / per_host 為整次稽核的上限
+    runner = ProbeRunner(concurrency=concurrency, per_host=per_host, timeout=timeout, on_result=on_result)
+
+    async def independent() -> list[dict[str, Any]]:
+        probes = [Probe("whois", domain)]
+        probes += [Probe("dns", domain, params={"record_type": t}) for t in EXTRA_TYPES]
+        return await runner.run_async(probes)
+
+    async def dependent() -> tuple[list[dict[str, Any]], list[str], list[dict[str, Any]], float]:
+        resolved = await runner.run_async(
+            [Probe("dns", domain, params={"record_type": t}) for t in ADDRESS_TYPES]
+        )
+        # 只有 A / AAAA 記錄（略過 CNAME 鏈中的名稱），依回應順序去重
+        addresses = list(dict.fromkeys(
+            rec for r in resolved for rec in r["records"] if _is_ip(rec)
+        ))[:max_ips]
+        stage_start = time.perf_counter()
+        probes: list[Probe] = []
+        for ip in addresses:
+            probes.append(Probe("tls", ip, 443, params={"server_name": domain}))
+            probes += [Probe("tcp", ip, p) for p in ports]
+            if ip_whois:
+                probes.append(Probe("whois", ip))
+        probes.append(Probe(
+            "http", f"https://{domain}",
+            params={"connect_ip": addresses[0]} if addresses else {},
+        ))
+        fanned = await runner.run_async(probes)
+        return resolved, addresses, fanned, time.perf_counter() - stage_start
+
+    side, (resolved, addresses, fanned, fanout_s) = await asyncio.gather(independent(), dependent())
+    return _report(domain, started_at, time.perf_counter() - started, side, resolved, addresses, fanned, fanout_s)
+
+
+def audit(domain: str, **kwargs: Any) -> dict[str, Any]:
+    """同步介面，參數同 audit_async"""
+    return asyncio.run(audit_async(domain, **kwargs))
+
+
+def _report(
+    domain: str,
+    started_at: str,
+    elapsed: float,
+    side: list[dict[str, Any]],
+    resolved: list[dict[str, Any]],
+    addresses: list[str],
+    fanned: list[dict[str, Any]],
+    fanout_s: float,
+) -> dict[str, Any]:
+    dns_results = {r["type"]: r for r in resolved}
+    whois = None
+    ssl: dict[str, Any] = {}
+    ports: dict[str, dict[str, Any]] = {ip: {"results": [], "open_ports": []} for ip in addresses}
+    ip_whois: dict[str, Any] = {}
+    http = None
+    # 各分支耗時（同一分支內的探測並行，取最長者）
+    branches: dict[str, float] = {"dns": max((r["elapsed_ms"] or 0 for r in resolved), default=0)}
+
+    def track(branch: str, r: dict[str, Any]) -> None:
+        branches[branch] = max(branches.get(branch, 0), r["elapsed_ms"] or 0)
+
+    for r in side:
+        if r["kind"] == "dns":
+            dns_results[r["type"]] = r
+            track("dns_extra", r)
+        else:
+            whois = r
+            track("whois", r)
+
+    for r in fanned:
+        kind = r["kind"]
+        if kind == "tls":
+            ssl[r["target"].rsplit(":", 1)[0]] = r
+            track("ssl", r)
+        elif kind == "tcp":
+            ip, port = r["target"].rsplit(":", 1)
+            # 逾時被取消的探測沒有 status，記為 error
+            row = {"port": int(port), "status": r.get("status", "error"), "service": r.get("service", "")}
+            ports[ip]["results"].append(row)
+            if row["status"] == "open":
+                ports[ip]["open_ports"].append({"port": row["port"], "service": row["service"]})
+            track("scan", r)
+        elif kind == "whois":
+            ip_whois[r["target"]] = r
+            track("ip_whois", r)
+        elif kind == "http":
+            http = r
+            track("http", r)
+
+    for entry in ports.values():
+        entry["results"].sort(key=lambda x: x["port"])
+        entry["open_ports"].sort(key=lambda x: x["port"])
+
+    return {
+        "domain": domain,
+        "started_at": started_at,
+        "elapsed_ms": round(elapsed * 1000, 2),
+        "fanout_ms": round(fanout_s * 1000, 2),
+        "addresses": addresses,
+        "dns": dns_results,
+        "whois": whois,
+        "ssl": ssl,
+        "http": http,
+        "ports": ports,
+        "ip_whois": ip_whois,
+        "branch_ms": {k: round(v, 2) for k, v in branches.items()},
+    }
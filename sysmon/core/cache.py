@@ -0,0 +1,258 @@
+"""查詢結果快取模組（記憶體 LRU + TTL，選配 SQLite 持久層）"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Hashable
+
+from sysmon.core.instrument import count
+
+
+def default_cache_dir() -> Path:
+    """快取目錄：優先使用環境變數 SYSMON_CACHE_DIR，否則為 ~/.cache/sysmon"""
+    env = os.environ.get("SYSMON_CACHE_DIR")
+    if env:
+        return Path(env)
+    return Path.home() / ".cache" / "sysmon"
+
+
+def disk_cache_enabled() -> bool:
+    """設定 SYSMON_NO_DISK_CACHE=1 可停用持久層"""
+    return os.environ.get("SYSMON_NO_DISK_CACHE", "") not in ("1", "true", "yes")
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    stored_at: float
+    expires_at: float
+    negative: bool = False
+
+    def is_fresh(self, now: float | None = None) -> bool:
+        return (now if now is not None else time.time()) < self.expires_at
+
+
+class _DiskTier:
+    """SQLite 持久層：跨 CLI 執行共享，任何 I/O 錯誤都會自動停用"""
+
+    def __init__(self, path: Path, namespace: str):
+        self.path = path
+        self.namespace = namespace
+        self.enabled = True
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS cache ("
+                    "ns TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                    "stored_at REAL NOT NULL, expires_at REAL NOT NULL, negative INTEGER NOT NULL, "
+                    "PRIMARY KEY (ns, key))"
+                )
+        except (sqlite3.Error, OSError):
+            self.enabled = False
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=2)
+
+    def get(self, key: str) -> CacheEntry | None:
+        if not self.enabled:
+            return None
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value, stored_at, expires_at, negative FROM cache WHERE ns = ? AND key = ?",
+                    (self.namespace, key),
+                ).fetchone()
+        except (sqlite3.Error, OSError):
+            self.enabled = False
+            return None
+        if row is None:
+            return None
+        try:
+            value = json.loads(row[0])
+        except ValueError:
+            return None
+        return CacheEntry(value=value, stored_at=row[1], expires_at=row[2], negative=bool(row[3]))
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        if not self.enabled:
+            return
+        try:
+            payload = json.dumps(entry.value, ensure_ascii=False, default=str)
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?, ?)",
+                    (self.namespace, key, payload, entry.stored_at, entry.expires_at, int(entry.negative)),
+                )
+                conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+        except (sqlite3.Error, OSError, TypeError):
+            self.enabled = False
+
+    def clear(self) -> None:
+        if not self.enabled:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM cache WHERE ns = ?", (self.namespace,))
+        except (sqlite3.Error, OSError):
+            self.enabled = False
+
+
+class TTLCache:
+    """
+    執行緒安全的 LRU + TTL 快取。
+
+    Args:
+        namespace: 快取命名空間（持久層以此區分不同工具）
+        maxsize: 記憶體層最多保留的項目數，超過時淘汰最久未使用者
+        ttl: 成功結果的存活秒數
+        negative_ttl: 失敗結果（負快取）的存活秒數
+        persistent: 是否啟用 SQLite 持久層
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        maxsize: int = 1024,
+        ttl: float = 3600.0,
+        negative_ttl: float = 60.0,
+        persistent: bool = False,
+    ):
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.persistent = persistent
+        self._data: OrderedDict[Hashable, CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk: _DiskTier | None = None
+        if persistent and disk_cache_enabled():
+            self._disk = _DiskTier(default_cache_dir() / "cache.sqlite3", namespace)
+
+    @staticmethod
+    def _disk_key(key: Hashable) -> str:
+        return json.dumps(key, ensure_ascii=False, default=str)
+
+    def get(self, key: Hashable) -> CacheEntry | None:
+        """取得未過期的項目；記憶體未命中時查詢持久層並回填"""
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry.is_fresh(now):
+                    self._data.move_to_end(key)
+                    count(f"cache.{self.namespace}.hit")
+                    return entry
+                del self._data[key]
+
+        entry = self._disk.get(self._disk_key(key)) if self._disk is not None else None
+        if entry is None or not entry.is_fresh(now):
+            count(f"cache.{self.namespace}.miss")
+            return None
+        count(f"cache.{self.namespace}.disk_hit")
+        self._store(key, entry)
+        return entry
+
+    def set(self, key: Hashable, value: Any, negative: bool = False, ttl: float | None = None) -> CacheEntry:
+        """寫入項目；negative=True 時使用 negative_ttl"""
+        now = time.time()
+        if ttl is None:
+            ttl = self.negative_ttl if negative else self.ttl
+        entry = CacheEntry(value=value, stored_at=now, expires_at=now + ttl, negative=negative)
+        self._store(key, entry)
+        if self._disk is not None:
+            self._disk.set(self._disk_key(key), entry)
+        return entry
+
+    def _store(self, key: Hashable, entry: CacheEntry) -> None:
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# ── 工具共用快取 ───────────────────────────────────────────────────────────────
+# 各工具結果的存活秒數，依資料變動頻率設定；DNS 另以記錄本身的 TTL 為準
+TOOL_TTLS: dict[str, float] = {
+    "ip_info": 6 * 3600,
+    "dns": 300,
+    "whois": 24 * 3600,
+    "ssl": 6 * 3600,
+    "web": 300,
+    "scan": 600,
+}
+
+# 各工具快取的記憶體上限與是否持久化（未列出者為 256 筆、僅記憶體）
+TOOL_OPTIONS: dict[str, dict[str, Any]] = {
+    "ip_info": {"maxsize": 2048, "persistent": True},
+}
+
+_TOOL_CACHES: dict[str, TTLCache] = {}
+_TOOL_LOCK = threading.Lock()
+
+
+def tool_cache(tool: str, maxsize: int | None = None, persistent: bool | None = None) -> TTLCache:
+    """
+    取得工具共用的快取實例：同一行程內的所有呼叫端（含所有 Streamlit session）共享。
+    maxsize / persistent 未指定時取自 TOOL_OPTIONS，因此與呼叫順序無關。
+
+    Raises:
+        ValueError: 指定的設定與已建立的實例不同
+    """
+    options = TOOL_OPTIONS.get(tool, {})
+    maxsize = options.get("maxsize", 256) if maxsize is None else maxsize
+    persistent = options.get("persistent", False) if persistent is None else persistent
+    with _TOOL_LOCK:
+        cache = _TOOL_CACHES.get(tool)
+        if cache is None:
+            cache = TTLCache(tool, maxsize=maxsize, ttl=TOOL_TTLS.get(tool, 600), persistent=persistent)
+            _TOOL_CACHES[tool] = cache
+        elif (cache.maxsize, cache.persistent) != (maxsize, persistent):
+            raise ValueError(
+                f"快取 {tool!r} 已以 maxsize={cache.maxsize}、persistent={cache.persistent} 建立，"
+                f"不能再以 maxsize={maxsize}、persistent={persistent} 取得"
+            )
+        return cache
+
+
+def cached_call(
+    cache: TTLCache,
+    key: Hashable,
+    fn: Callable[[], Any],
+    refresh: bool = False,
+    ttl_of: Callable[[Any], float | None] | None = None,
+) -> tuple[Any, CacheEntry, bool]:
+    """
+    命中時回傳快取值，否則呼叫 fn() 並寫入；refresh=True 時略過快取強制重新查詢。
+    結果為含 "error" 的 dict 時以負快取（negative_ttl）保存；
+    ttl_of 可由結果決定存活秒數（如 DNS 記錄 TTL），回傳 None 時使用快取預設值。
+
+    Returns:
+        (值, 快取項目, 是否命中)
+    """
+    if not refresh:
+        entry = cache.get(key)
+        if entry is not None:
+            return entry.value, entry, True
+    value = fn()
+    negative = isinstance(value, dict) and bool(value.get("error"))
+    ttl = ttl_of(value) if ttl_of is not None and not negative else None
+    entry = cache.set(key, value, negative=negative, ttl=ttl)
+    return value, entry, False
@@ -7,6 +7,8 @@ import dns.reversename
 import dns.exception
 from typing import Any
 
+from sysmon.core.instrument import span
+
 
 RECORD_TYPES = ["A", "AAAA", "MX", "TXT", "NS", "CNAME", "PTR", "SOA", "SRV", "CAA"]
 
@@ -27,51 +29,60 @@ def _make_resolver(dns_server: str | None = None) -> dns.resolver.Resolver:
     return resolver
 
 
+def _format_rdata(record_type: str, rdata) -> str:
+    if record_type == "MX":
+        return f"{rdata.preference} {rdata.exchange}"
+    if record_type == "SOA":
+        return (
+            f"mname={rdata.mname} rname={rdata.rname} "
+            f"serial={rdata.serial} refresh={rdata.refresh} "
+            f"retry={rdata.retry} expire={rdata.expire} minimum={rdata.minimum}"
+        )
+    if record_type == "SRV":
+        return f"{rdata.priority} {rdata.weight} {rdata.port} {rdata.target}"
+    if record_type == "CAA":
+        return f"{rdata.flags} {rdata.tag.decode()} {rdata.value.decode()}"
+    if record_type == "TXT":
+        return b"".join(rdata.strings).decode(errors="replace")
+    return str(rdata)
+
+
+def _error_message(e: Exception, domain: str, record_type: str) -> str:
+    if isinstance(e, dns.resolver.NXDOMAIN):
+        return f"域名不存在：{domain}"
+    if isinstance(e, dns.resolver.NoAnswer):
+        return f"無 {record_type} 記錄"
+    if isinstance(e, dns.resolver.Timeout):
+        return "查詢超時"
+    if isinstance(e, dns.exception.DNSException):
+        return str(e)
+    return f"查詢失敗：{e}"
+
+
+def _query_name(domain: str, record_type: str):
+    return dns.reversename.from_address(domain) if record_type == "PTR" else domain
+
+
 def query_dns(domain: str, record_type: str = "A", dns_server: str | None = None) -> dict[str, Any]:
     """查詢單一 DNS 記錄"""
     resolver = _make_resolver(dns_server)
     results: list[str] = []
     error: str | None = None
+    ttl: int | None = None
 
     try:
-        if record_type == "PTR":
-            rev = dns.reversename.from_address(domain)
-            answers = resolver.resolve(rev, "PTR")
-        else:
-            answers = resolver.resolve(domain, record_type)
-
-        for rdata in answers:
-            if record_type == "MX":
-                results.append(f"{rdata.preference} {rdata.exchange}")
-            elif record_type == "SOA":
-                results.append(
-                    f"mname={rdata.mname} rname={rdata.rname} "
-                    f"serial={rdata.serial} refresh={rdata.refresh} "
-                    f"retry={rdata.retry} expire={rdata.expire} minimum={rdata.minimum}"
-                )
-            elif record_type == "SRV":
-                results.append(f"{rdata.priority} {rdata.weight} {rdata.port} {rdata.target}")
-            elif record_type == "CAA":
-                results.append(f"{rdata.flags} {rdata.tag.decode()} {rdata.value.decode()}")
-            elif record_type == "TXT":
-                results.append(b"".join(rdata.strings).decode(errors="replace"))
-            else:
-                results.append(str(rdata))
-    except dns.resolver.NXDOMAIN:
-        error = f"域名不存在：{domain}"
-    except dns.resolver.NoAnswer:
-        error = f"無 {record_type} 記錄"
-    except dns.resolver.Timeout:
-        error = "查詢超時"
-    except dns.exception.DNSException as e:
-        error = str(e)
+        with span("dns.resolve", target=domain, type=record_type):
+            answers = resolver.resolve(_query_name(domain, record_type), record_type)
+        results = [_format_rdata(record_type, rdata) for rdata in answers]
+        ttl = answers.rrset.ttl if answers.rrset is not None else None
     except Exception as e:
-        error = f"查詢失敗：{e}"
+        error = _error_message(e, domain, record_type)
 
     return {
         "domain": domain,
         "type": record_type,
         "records": results,
+        "ttl": ttl,
         "error": error,
         "dns_server": dns_server or "系統預設",
     }
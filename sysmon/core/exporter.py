@@ -0,0 +1,296 @@
+"""Prometheus 文字格式匯出模組（背景收集 + 本機 HTTP /metrics 端點）"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterable
+
+import psutil
+
+from sysmon.core.system_info import BackgroundSampler, get_cpu_sampler
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@dataclass
+class Metric:
+    """單一指標家族（同名、同 HELP/TYPE），samples 為 (標籤, 數值) 列表"""
+
+    name: str
+    help: str
+    type: str = "gauge"
+    samples: list[tuple[dict[str, str], float]] = field(default_factory=list)
+
+    def add(self, value: float, **labels: str) -> "Metric":
+        self.samples.append((labels, value))
+        return self
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_value(value: float) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def render(metrics: Iterable[Metric]) -> str:
+    """
+    轉為 Prometheus exposition 文字格式。
+
+    不同收集器產生的同名指標會合併為一個家族，HELP/TYPE 只輸出一次。
+    """
+    families: dict[str, Metric] = {}
+    for m in metrics:
+        fam = families.get(m.name)
+        if fam is None:
+            families[m.name] = Metric(m.name, m.help, m.type, list(m.samples))
+        else:
+            fam.samples.extend(m.samples)
+
+    lines: list[str] = []
+    for fam in families.values():
+        lines.append(f"# HELP {fam.name} {fam.help}")
+        lines.append(f"# TYPE {fam.name} {fam.type}")
+        for labels, value in fam.samples:
+            if labels:
+                label_str = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                lines.append(f"{fam.name}{{{label_str}}} {_fmt_value(value)}")
+            else:
+                lines.append(f"{fam.name} {_fmt_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# ── 系統指標 ───────────────────────────────────────────────────────────────────
+def system_metrics() -> list[Metric]:
+    """
+    系統指標：CPU 使用率讀取背景 CpuSampler，其餘為 psutil 的即時值。
+    磁碟與網路輸出原始累計計數器（counter），由 Prometheus 端以 rate() 計算速率。
+    """
+    usage = get_cpu_sampler().usage()
+    cpu = Metric("sysmon_cpu_usage_percent", "CPU usage over the sampler window").add(usage["total"])
+    cores = Metric("sysmon_cpu_core_usage_percent", "Per-core CPU usage over the sampler window")
+    for i, pct in enumerate(usage["per_core"]):
+        cores.add(pct, core=str(i))
+
+    vm = psutil.virtual_memory()
+    swap = psutil.swap_memory()
+    metrics = [
+        cpu,
+        cores,
+        Metric("sysmon_memory_total_bytes", "Total physical memory").add(vm.total),
+        Metric("sysmon_memory_used_bytes", "Used physical memory").add(vm.used),
+        Metric("sysmon_memory_available_bytes", "Available physical memory").add(vm.available),
+        Metric("sysmon_memory_used_percent", "Physical memory usage").add(vm.percent),
+        Metric("sysmon_swap_total_bytes", "Total swap").add(swap.total),
+        Metric("sysmon_swap_used_bytes", "Used swap").add(swap.used),
+        Metric("sysmon_boot_time_seconds", "System boot time (unix epoch)").add(psutil.boot_time()),
+        Metric("sysmon_processes", "Number of processes").add(len(psutil.pids())),
+    ]
+
+    if hasattr(psutil, "getloadavg"):
+        load = Metric("sysmon_load_average", "System load average")
+        for period, value in zip(("1m", "5m", "15m"), psutil.getloadavg()):
+            load.add(value, period=period)
+        metrics.append(load)
+
+    fs_size = Metric("sysmon_filesystem_size_bytes", "Filesystem size")
+    fs_used = Metric("sysmon_filesystem_used_bytes", "Filesystem used bytes")
+    fs_pct = Metric("sysmon_filesystem_used_percent", "Filesystem usage")
+    for part in psutil.disk_partitions(all=False):
+        try:
+            du = psutil.disk_usage(part.mountpoint)
+        except (PermissionError, OSError):
+            continue
+        labels = {"device": part.device, "mountpoint": part.mountpoint, "fstype": part.fstype}
+        fs_size.add(du.total, **labels)
+        fs_used.add(du.used, **labels)
+        fs_pct.add(du.percent, **labels)
+    metrics += [fs_size, fs_used, fs_pct]
+
+    # read_time / write_time 為毫秒，轉為秒
+    disk_fields = [
+        ("read_bytes", "sysmon_disk_read_bytes_total", "Bytes read", None),
+        ("write_bytes", "sysmon_disk_written_bytes_total", "Bytes written", None),
+        ("read_count", "sysmon_disk_reads_completed_total", "Reads completed", None),
+        ("write_count", "sysmon_disk_writes_completed_total", "Writes completed", None),
+        ("read_time", "sysmon_disk_read_time_seconds_total", "Time spent reading", 1000),
+        ("write_time", "sysmon_disk_write_time_seconds_total", "Time spent writing", 1000),
+    ]
+    disks = psutil.disk_io_counters(perdisk=True) or {}
+    for attr, name, help_text, scale in disk_fields:
+        m = Metric(name, help_text, "counter")
+        for dev, c in disks.items():
+            value = getattr(c, attr)
+            m.add(value / scale if scale else value, device=dev)
+        metrics.append(m)
+
+    net_fields = [
+        ("bytes_recv", "sysmon_network_receive_bytes_total", "Bytes received"),
+        ("bytes_sent", "sysmon_network_transmit_bytes_total", "Bytes sent"),
+        ("packets_recv", "sysmon_network_receive_packets_total", "Packets received"),
+        ("packets_sent", "sysmon_network_transmit_packets_total", "Packets sent"),
+        ("errin", "sysmon_network_receive_errors_total", "Receive errors"),
+        ("errout", "sysmon_network_transmit_errors_total", "Transmit errors"),
+        ("dropin", "sysmon_network_receive_drop_total", "Inbound packets dropped"),
+        ("dropout", "sysmon_network_transmit_drop_total", "Outbound packets dropped"),
+    ]
+    nics = psutil.net_io_counters(pernic=True) or {}
+    for attr, name, help_text in net_fields:
+        m = Metric(name, help_text, "counter")
+        for nic, c in nics.items():
+            m.add(getattr(c, attr), interface=nic)
+        metrics.append(m)
+    return metrics
+
+
+# ── 探測指標 ───────────────────────────────────────────────────────────────────
+def dns_probe(domain: str, record_type: str = "A", dns_server: str | None = None) -> list[Metric]:
+    from sysmon.core.dns_tools import query_dns
+
+    start = time.perf_counter()
+    result = query_dns(domain, record_type, dns_server)
+    elapsed = time.perf_counter() - start
+    labels = {"domain": domain, "type": record_type}
+    return [
+        Metric("sysmon_dns_lookup_seconds", "DNS lookup duration").add(elapsed, **labels),
+        Metric("sysmon_dns_lookup_success", "Whether the DNS lookup returned records").add(
+            not result.get("error"), **labels),
+        Metric("sysmon_dns_records", "Number of records returned").add(len(result.get("records", [])), **labels),
+    ]
+
+
+def ssl_probe(host: str, port: int = 443) -> list[Metric]:
+    from sysmon.core.ssl_tools import query_ssl
+
+    result = query_ssl(host, port)
+    labels = {"host": host, "port": str(port)}
+    metrics = [Metric("sysmon_ssl_probe_success", "Whether the TLS handshake succeeded").add(
+        not result.get("error"), **labels)]
+    if "days_left" in result:
+        metrics.append(Metric("sysmon_ssl_cert_days_left", "Days until the certificate expires").add(
+            result["days_left"], **labels))
+    return metrics
+
+
+def http_probe(url: str, timeout: int = 10) -> list[Metric]:
+    from sysmon.core.web_tools import check_website
+
+    result = check_website(url, timeout=timeout)
+    labels = {"url": url}
+    metrics = [Metric("sysmon_http_probe_success", "Whether the HTTP request completed").add(
+        not result.get("error"), **labels)]
+    if "status_code" in result:
+        metrics += [
+            Metric("sysmon_http_status_code", "Final HTTP status code").add(result["status_code"], **labels),
+            Metric("sysmon_http_response_seconds", "HTTP response time").add(
+                result["response_time_ms"] / 1000, **labels),
+            Metric("sysmon_http_redirects", "Number of redirects followed").add(
+                len(result["redirect_chain"]), **labels),
+        ]
+    return metrics
+
+
+def port_probe(host: str, ports: list[int], timeout: float = 1.0) -> list[Metric]:
+    from sysmon.core.port_scanner import scan_ports
+
+    result = scan_ports(host, ports=ports, timeout=timeout)
+    m = Metric("sysmon_port_open", "Whether the TCP port accepted a connection")
+    for r in result["results"]:
+        m.add(r["status"] == "open", host=host, port=str(r["port"]))
+    return [m]
+
+
+# ── 匯出器 ─────────────────────────────────────────────────────────────────────
+class Exporter:
+    """
+    每個收集器由獨立的 BackgroundSampler 定期執行並保存結果；
+    scrape 只合併各收集器最新的結果，不會等待 cpu_percent 或網路探測。
+    輸出文字會快取，直到任一收集器有新結果才重新產生。
+    """
+
+    def __init__(self):
+        self._samplers: dict[str, BackgroundSampler] = {}
+        self._body = b""
+        self._body_key: tuple[float, ...] = ()
+        self._lock = threading.Lock()
+
+    def add(self, name: str, fn: Callable[[], list[Metric]], interval: float) -> "Exporter":
+        def collect() -> list[Metric]:
+            start = time.perf_counter()
+            try:
+                metrics, ok = fn(), True
+            except Exception:
+                metrics, ok = [], False
+            labels = {"collector": name}
+            return metrics + [
+                Metric("sysmon_collector_success", "Whether the last collection succeeded").add(ok, **labels),
+                Metric("sysmon_collector_duration_seconds", "Duration of the last collection").add(
+                    time.perf_counter() - start, **labels),
+                Metric("sysmon_collector_last_run_timestamp_seconds", "Unix time of the last collection").add(
+                    time.time(), **labels),
+            ]
+
+        self._samplers[name] = BackgroundSampler(collect, interval=interval, name=f"sysmon-export-{name}")
+        return self
+
+    def start(self) -> "Exporter":
+        for sampler in self._samplers.values():
+            sampler.start(prime=False)
+        return self
+
+    def stop(self) -> None:
+        for sampler in self._samplers.values():
+            sampler.stop()
+
+    def body(self) -> bytes:
+        with self._lock:
+            key = tuple(s.updated_at for s in self._samplers.values())
+            if key != self._body_key:
+                metrics: list[Metric] = []
+                for sampler in self._samplers.values():
+                    metrics.extend(sampler.latest() or [])
+                self._body = render(metrics).encode()
+                self._body_key = key
+            return self._body
+
+
+def _make_handler(exporter: Exporter) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] == "/metrics":
+                body, ctype, status = exporter.body(), CONTENT_TYPE, 200
+            elif self.path == "/":
+                body = b'<html><body><h1>SysMon Exporter</h1><a href="/metrics">/metrics</a></body></html>'
+                ctype, status = "text/html; charset=utf-8", 200
+            else:
+                body, ctype, status = b"not found\n", "text/plain", 404
+            self.send_response(status)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def make_server(exporter: Exporter, host: str = "127.0.0.1", port: int = 9110) -> ThreadingHTTPServer:
+    """建立 HTTP 伺服器（呼叫端負責 serve_forever / shutdown）"""
+    server = ThreadingHTTPServer((host, port), _make_handler(exporter))
+    server.daemon_threads = True
+    return server
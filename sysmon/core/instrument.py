@@ -0,0 +1,215 @@
+"""
+輕量計時與計數（效能分析用）
+
+    with span("dns.resolve", target=domain) as sp:   # 計時一個階段
+        ...
+        sp.set(error=message)                        # 標記失敗（選用）
+    count("cache.dns.hit")                           # 累加計數器
+
+預設停用：span() 回傳共用的空 context manager、count() 直接返回，只多一次全域旗標判斷。
+以 enable()（CLI --profile、Streamlit 除錯面板）或環境變數 SYSMON_PROFILE=1 啟用後，
+各階段的次數 / 累計 / 最大耗時彙總於行程內，snapshot() 取得、reset() 清除。
+
+階段命名為「工具.階段」：dns.resolve、tcp.connect、tls.handshake、http.connect_tcp、whois.query ...
+同一請求內的階段不互相包含，累計時間可直接比較；probe.* 與 page.run 為整體時間，包含其中的各階段。
+
+另以 set_tracer() 設定匯出器（見 sysmon.core.tracing）後，每個 span 也會帶著 trace / span ID
+（巢狀關係經由 contextvars 傳遞）交給匯出器批次寫出。
+"""
+
+from __future__ import annotations
+
+import contextvars
+import os
+import random
+import threading
+import time
+from typing import Any, Protocol
+
+_enabled = os.environ.get("SYSMON_PROFILE", "") in ("1", "true", "yes")
+_lock = threading.Lock()
+# name -> [次數, 累計秒數, 最大秒數, 失敗次數]
+_spans: dict[str, list[float]] = {}
+_counters: dict[str, int] = {}
+
+
+class Tracer(Protocol):
+    def add(self, span: tuple) -> None:
+        """接收完成的 span：(trace_id, span_id, parent_id, name, start_ns, end_ns, attrs)"""
+
+
+_tracer: Tracer | None = None
+# 目前所在 span 的 (trace_id, span_id)；無則為 _root（外部傳入的上層 trace，如 TRACEPARENT）
+_current: contextvars.ContextVar[tuple[int, int] | None] = contextvars.ContextVar("sysmon_span", default=None)
+_root: tuple[int, int] | None = None
+
+
+def enable(on: bool = True) -> None:
+    global _enabled
+    _enabled = on
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def set_tracer(tracer: Tracer | None, parent: tuple[int, int] | None = None) -> None:
+    """
+    設定 span 匯出器（None 為停止匯出）；設定時一併啟用計時。
+    parent 為外部上層 span 的 (trace_id, span_id)，最外層的 span 會掛在其下。
+    """
+    global _tracer, _root
+    _tracer, _root = tracer, parent
+    if tracer is not None:
+        enable()
+
+
+def _new_ids() -> tuple[int, int, int | None]:
+    parent = _current.get() or _root
+    if parent is None:
+        return random.getrandbits(128) or 1, random.getrandbits(64) or 1, None
+    return parent[0], random.getrandbits(64) or 1, parent[1]
+
+
+def record(name: str, seconds: float, error: bool = False) -> None:
+    """記錄一次已計時的階段（呼叫端自行量測時使用）"""
+    if not _enabled:
+        return
+    with _lock:
+        stats = _spans.get(name)
+        if stats is None:
+            stats = _spans[name] = [0, 0.0, 0.0, 0]
+        stats[0] += 1
+        stats[1] += seconds
+        if seconds > stats[2]:
+            stats[2] = seconds
+        if error:
+            stats[3] += 1
+
+
+def count(name: str, n: int = 1) -> None:
+    """累加計數器（快取命中、重新導向次數等）"""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> _NoopSpan:
+        return self
+
+    def __exit__(self, *exc: Any) -> bool:
+        return False
+
+    def set(self, **attrs: Any) -> None:
+        pass
+
+
+class Span:
+    """計時中的階段；離開 with 區塊時記錄，區塊內拋出例外或 set(error=...) 視為失敗"""
+
+    __slots__ = ("name", "attrs", "start", "start_ns", "tracer", "ids", "token")
+
+    def __init__(self, name: str, attrs: dict[str, Any]):
+        self.name = name
+        self.attrs = attrs
+        self.tracer = _tracer
+
+    def __enter__(self) -> Span:
+        if self.tracer is not None:
+            self.ids = _new_ids()
+            self.token = _current.set(self.ids[:2])
+            self.start_ns = time.time_ns()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> bool:
+        elapsed = time.perf_counter() - self.start
+        if exc_type is not None and "error" not in self.attrs:
+            self.attrs["error"] = str(exc) or exc_type.__name__
+        record(self.name, elapsed, bool(self.attrs.get("error")))
+        if self.tracer is not None:
+            _current.reset(self.token)
+            self.tracer.add((*self.ids, self.name, self.start_ns, self.start_ns + int(elapsed * 1e9), self.attrs))
+        return False
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name: str, **attrs: Any) -> Span | _NoopSpan:
+    """計時 with 區塊；停用時回傳共用的空物件"""
+    if not _enabled:
+        return _NOOP
+    return Span(name, attrs)
+
+
+def http_trace(asynchronous: bool = False, **attrs: Any) -> dict[str, Any]:
+    """
+    httpx 請求的 extensions：啟用時以 httpcore trace 事件記錄 http.connect_tcp（含 DNS 解析）、
+    http.start_tls、http.send_request_headers、http.receive_response_headers、http.receive_response_body 等階段。
+    停用時回傳空 dict。匯出 span 時 attrs（如 target）附加於各階段，且同一請求的階段屬於同一個 trace。
+    """
+    if not _enabled:
+        return {}
+    tracer = _tracer
+    parent = _current.get() or _root
+    if tracer is not None and parent is None:
+        parent = (random.getrandbits(128) or 1, None)
+    starts: dict[str, tuple[float, int]] = {}
+
+    def trace(event: str, info: dict[str, Any]) -> None:
+        phase, _, state = event.rpartition(".")
+        if state == "started":
+            starts[phase] = (time.perf_counter(), time.time_ns())
+        elif phase in starts:
+            start, start_ns = starts.pop(phase)
+            elapsed = time.perf_counter() - start
+            name = "http." + phase.rpartition(".")[2]
+            failed = state == "failed"
+            record(name, elapsed, failed)
+            if tracer is not None:
+                phase_attrs = {**attrs, "error": str(info.get("exception") or "失敗")} if failed else attrs
+                ids = (parent[0], random.getrandbits(64) or 1, parent[1])
+                tracer.add((*ids, name, start_ns, start_ns + int(elapsed * 1e9), phase_attrs))
+
+    if not asynchronous:
+        return {"trace": trace}
+
+    async def atrace(event: str, info: dict[str, Any]) -> None:
+        trace(event, info)
+
+    return {"trace": atrace}
+
+
+def snapshot() -> dict[str, Any]:
+    """目前的彙總：spans 依累計時間由大到小排序"""
+    with _lock:
+        spans = {name: list(stats) for name, stats in _spans.items()}
+        counters = dict(_counters)
+    ordered = sorted(spans.items(), key=lambda kv: kv[1][1], reverse=True)
+    return {
+        "spans": {
+            name: {
+                "count": int(n),
+                "total_ms": round(total * 1000, 2),
+                "mean_ms": round(total / n * 1000, 2) if n else 0.0,
+                "max_ms": round(peak * 1000, 2),
+                "errors": int(errors),
+            }
+            for name, (n, total, peak, errors) in ordered
+        },
+        "counters": dict(sorted(counters.items())),
+    }
+
+
+def reset() -> None:
+    with _lock:
+        _spans.clear()
+        _counters.clear()
@@ -0,0 +1,392 @@
+"""大量 IP / CIDR 集合運算模組（NumPy 向量化）
+
+IPv4 以 uint32 儲存，IPv6 以 (n, 2) uint64（高/低 64 位元）儲存；
+比對與排序時將 IPv6 視為 (hi, lo) 結構化陣列，以字典序做排序與二分搜尋。
+"""
+
+from __future__ import annotations
+
+import ipaddress
+import socket
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+import numpy as np
+
+_V6 = np.dtype([("hi", np.uint64), ("lo", np.uint64)])
+_U64_MAX = np.uint64(0xFFFFFFFFFFFFFFFF)
+_U32_MAX = np.uint32(0xFFFFFFFF)
+_BITS = {4: 32, 6: 128}
+
+
+@dataclass
+class AddressArray:
+    """單一位址族的位址陣列，rows 為各位址在原始輸入中的索引"""
+    version: int
+    values: np.ndarray
+    rows: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+@dataclass
+class PrefixArray:
+    """單一位址族的 CIDR 陣列，以閉區間 [start, end] 表示"""
+    version: int
+    start: np.ndarray
+    end: np.ndarray
+    plen: np.ndarray
+    rows: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+# ── 解析 ──────────────────────────────────────────────────────────────────────
+def read_lines(text: str) -> list[str]:
+    """切分輸入文字為清單，略過空行與 # 註解"""
+    lines = []
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line:
+            lines.append(line)
+    return lines
+
+
+def _to_arrays(buf4: bytearray, buf6: bytearray) -> tuple[np.ndarray, np.ndarray]:
+    v4 = np.frombuffer(bytes(buf4), dtype=">u4").astype(np.uint32)
+    v6 = np.frombuffer(bytes(buf6), dtype=">u8").astype(np.uint64).reshape(-1, 2)
+    return v4, v6
+
+
+def parse_addresses(items: Iterable[str]) -> tuple[dict[int, AddressArray], list[str]]:
+    """解析 IP 清單為 {4: AddressArray, 6: AddressArray}，並回傳無法解析的項目"""
+    buf4, buf6 = bytearray(), bytearray()
+    rows4: list[int] = []
+    rows6: list[int] = []
+    invalid: list[str] = []
+    for i, text in enumerate(items):
+        try:
+            if ":" in text:
+                buf6 += socket.inet_pton(socket.AF_INET6, text)
+                rows6.append(i)
+            else:
+                buf4 += socket.inet_pton(socket.AF_INET, text)
+                rows4.append(i)
+        except OSError:
+            invalid.append(text)
+    v4, v6 = _to_arrays(buf4, buf6)
+    return {
+        4: AddressArray(4, v4, np.asarray(rows4, dtype=np.int64)),
+        6: AddressArray(6, v6, np.asarray(rows6, dtype=np.int64)),
+    }, invalid
+
+
+def parse_prefixes(items: Iterable[str]) -> tuple[dict[int, PrefixArray], list[str]]:
+    """解析 CIDR 清單（允許主機位元非零，等同 strict=False；無前綴視為單一位址）"""
+    buf4, buf6 = bytearray(), bytearray()
+    rows4: list[int] = []
+    rows6: list[int] = []
+    len4: list[int] = []
+    len6: list[int] = []
+    invalid: list[str] = []
+    for i, text in enumerate(items):
+        addr, _, plen = text.partition("/")
+        try:
+            if ":" in addr:
+                n = int(plen) if plen else 128
+                if not 0 <= n <= 128:
+                    raise ValueError
+                buf6 += socket.inet_pton(socket.AF_INET6, addr)
+                rows6.append(i)
+                len6.append(n)
+            else:
+                n = int(plen) if plen else 32
+                if not 0 <= n <= 32:
+                    raise ValueError
+                buf4 += socket.inet_pton(socket.AF_INET, addr)
+                rows4.append(i)
+                len4.append(n)
+        except (OSError, ValueError):
+            invalid.append(text)
+    v4, v6 = _to_arrays(buf4, buf6)
+    l4 = np.asarray(len4, dtype=np.uint8)
+    l6 = np.asarray(len6, dtype=np.uint8)
+
+    # IPv4：主機遮罩 = 2^(32-len) - 1
+    host4 = ((np.uint64(1) << (32 - l4.astype(np.uint64))) - np.uint64(1)).astype(np.uint32)
+    start4 = v4 & ~host4
+    end4 = start4 | host4
+
+    # IPv6：分別計算高/低 64 位元的主機遮罩（位移 64 需特別處理）
+    hostbits = 128 - l6.astype(np.int64)
+    lo_bits = np.minimum(hostbits, 64).astype(np.uint64)
+    hi_bits = np.maximum(hostbits - 64, 0).astype(np.uint64)
+    lo_mask = np.where(lo_bits == 64, _U64_MAX, (np.uint64(1) << (lo_bits % np.uint64(64))) - np.uint64(1))
+    hi_mask = np.where(hi_bits == 64, _U64_MAX, (np.uint64(1) << (hi_bits % np.uint64(64))) - np.uint64(1))
+    start6 = np.empty_like(v6)
+    end6 = np.empty_like(v6)
+    start6[:, 0] = v6[:, 0] & ~hi_mask
+    start6[:, 1] = v6[:, 1] & ~lo_mask
+    end6[:, 0] = start6[:, 0] | hi_mask
+    end6[:, 1] = start6[:, 1] | lo_mask
+
+    return {
+        4: PrefixArray(4, start4, end4, l4, np.asarray(rows4, dtype=np.int64)),
+        6: PrefixArray(6, start6, end6, l6, np.asarray(rows6, dtype=np.int64)),
+    }, invalid
+
+
+# ── 向量化區間運算（IPv6 以結構化陣列比較） ───────────────────────────────────
+def _keys(values: np.ndarray) -> np.ndarray:
+    """取得可排序的鍵：IPv4 直接使用，IPv6 轉為 (hi, lo) 結構化檢視"""
+    if values.ndim == 2:
+        return np.ascontiguousarray(values).view(_V6).ravel()
+    return values
+
+
+def _le(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    if a.dtype == _V6:
+        return (a["hi"] < b["hi"]) | ((a["hi"] == b["hi"]) & (a["lo"] <= b["lo"]))
+    return a <= b
+
+
+def _cummax(a: np.ndarray) -> np.ndarray:
+    if a.dtype == _V6:
+        uniq, inv = np.unique(a, return_inverse=True)
+        return uniq[np.maximum.accumulate(inv.ravel())]
+    return np.maximum.accumulate(a)
+
+
+def _succ(a: np.ndarray) -> np.ndarray:
+    """位址 +1（在最大位址處飽和）"""
+    if a.dtype == _V6:
+        out = a.copy()
+        carry = a["lo"] == _U64_MAX
+        top = carry & (a["hi"] == _U64_MAX)
+        out["lo"] = np.where(top, _U64_MAX, a["lo"] + np.uint64(1))
+        out["hi"] = np.where(carry & ~top, a["hi"] + np.uint64(1), a["hi"])
+        return out
+    return np.where(a == _U32_MAX, a, a + np.uint32(1))
+
+
+def _pred(a: np.ndarray) -> np.ndarray:
+    """位址 -1（呼叫端保證不為 0）"""
+    if a.dtype == _V6:
+        out = a.copy()
+        borrow = a["lo"] == 0
+        out["lo"] = a["lo"] - np.uint64(1)
+        out["hi"] = np.where(borrow, a["hi"] - np.uint64(1), a["hi"])
+        return out
+    return a - np.uint32(1)
+
+
+def _is_zero(a: np.ndarray) -> np.ndarray:
+    if a.dtype == _V6:
+        return (a["hi"] == 0) & (a["lo"] == 0)
+    return a == 0
+
+
+def _is_max(a: np.ndarray) -> np.ndarray:
+    if a.dtype == _V6:
+        return (a["hi"] == _U64_MAX) & (a["lo"] == _U64_MAX)
+    return a == _U32_MAX
+
+
+def _merge(start: np.ndarray, end: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """合併重疊與相鄰的閉區間，回傳排序後互不相交的區間"""
+    if len(start) == 0:
+        return start, end
+    order = np.argsort(start, kind="stable")
+    s, e = start[order], end[order]
+    reach = _cummax(_succ(e))
+    new = np.ones(len(s), dtype=bool)
+    new[1:] = ~_le(s[1:], reach[:-1])
+    heads = np.nonzero(new)[0]
+    last = np.r_[heads[1:] - 1, len(s) - 1]
+    return s[heads], _cummax(e)[last]
+
+
+def _intersect(xs, xe, ys, ye) -> tuple[np.ndarray, np.ndarray]:
+    """兩組各自排序且互不相交的區間取交集"""
+    if len(xs) == 0 or len(ys) == 0:
+        return xs[:0], xe[:0]
+    lo = np.searchsorted(ye, xs, side="left")
+    hi = np.searchsorted(ys, xe, side="right")
+    counts = np.maximum(hi - lo, 0)
+    total = int(counts.sum())
+    xi = np.repeat(np.arange(len(xs)), counts)
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    yi = np.arange(total) - offsets + np.repeat(lo, counts)
+    a_s, b_s = xs[xi], ys[yi]
+    a_e, b_e = xe[xi], ye[yi]
+    rs = np.where(_le(a_s, b_s), b_s, a_s)
+    re = np.where(_le(a_e, b_e), a_e, b_e)
+    return rs, re
+
+
+def _complement(start: np.ndarray, end: np.ndarray, version: int) -> tuple[np.ndarray, np.ndarray]:
+    """整個位址空間扣除已合併區間後的空隙"""
+    zero = np.zeros(1, dtype=start.dtype)
+    top = np.zeros(1, dtype=start.dtype)
+    if version == 6:
+        top["hi"] = _U64_MAX
+        top["lo"] = _U64_MAX
+    else:
+        top[0] = _U32_MAX
+    if len(start) == 0:
+        return zero, top
+    gs = np.concatenate([zero, _succ(end)])
+    ge = np.concatenate([_pred(np.where(_is_zero(start[:1]), top, start[:1])), _pred(start[1:]), top])
+    keep = np.ones(len(gs), dtype=bool)
+    keep[0] = not bool(_is_zero(start[:1])[0])
+    keep[-1] = not bool(_is_max(end[-1:])[0])
+    return gs[keep], ge[keep]
+
+
+def _longest_match(
+    addrs: np.ndarray,
+    pfx: PrefixArray,
+    qlen: np.ndarray | None = None,
+) -> np.ndarray:
+    """
+    最長前綴比對：依前綴長度由長到短逐層以 searchsorted 查詢。
+    同一長度的 CIDR 彼此不相交，因此每層只需一次二分搜尋。
+    qlen 不為 None 時，僅比對長度嚴格小於 qlen 的前綴（用於找出包含關係）。
+    回傳 pfx 內的索引，無符合為 -1。
+    """
+    result = np.full(len(addrs), -1, dtype=np.int64)
+    if len(pfx) == 0 or len(addrs) == 0:
+        return result
+    starts = _keys(pfx.start)
+    ends = _keys(pfx.end)
+    for plen in np.unique(pfx.plen)[::-1]:
+        sel = np.nonzero(pfx.plen == plen)[0]
+        order = sel[np.argsort(starts[sel], kind="stable")]
+        level_starts = starts[order]
+        level_ends = ends[order]
+
+        pending = result < 0
+        if qlen is not None:
+            pending &= qlen > plen
+        idx = np.nonzero(pending)[0]
+        if len(idx) == 0:
+            continue
+        q = addrs[idx]
+        pos = np.searchsorted(level_starts, q, side="right") - 1
+        ok = pos >= 0
+        pos_ok = pos[ok]
+        hit = np.searchsorted(level_ends, q[ok], side="left") <= pos_ok
+        result[idx[ok][hit]] = order[pos_ok[hit]]
+    return result
+
+
+def _range_to_cidrs(start: int, end: int, version: int) -> list[str]:
+    """以整數運算把位址區間拆成最少的 CIDR"""
+    bits = _BITS[version]
+    addr_cls = ipaddress.IPv4Address if version == 4 else ipaddress.IPv6Address
+    out: list[str] = []
+    while start <= end:
+        size = (start & -start).bit_length() - 1 if start else bits
+        while size > 0 and start + (1 << size) - 1 > end:
+            size -= 1
+        out.append(f"{addr_cls(start)}/{bits - size}")
+        start += 1 << size
+    return out
+
+
+def _to_int(key: np.ndarray | np.void | np.integer) -> int:
+    if isinstance(key, np.void):
+        return (int(key["hi"]) << 64) | int(key["lo"])
+    return int(key)
+
+
+def _intervals_to_cidrs(start: np.ndarray, end: np.ndarray, version: int) -> list[str]:
+    out: list[str] = []
+    for s, e in zip(start, end):
+        out.extend(_range_to_cidrs(_to_int(s), _to_int(e), version))
+    return out
+
+
+# ── 對外 API ─────────────────────────────────────────────────────────────────
+def match_addresses(ips: list[str], prefixes: list[str]) -> dict[str, Any]:
+    """
+    找出每個 IP 所屬的最長前綴。
+
+    Returns:
+        match: 長度與 ips 相同的 int64 陣列，值為 prefixes 的索引（-1 表示無符合或格式錯誤）
+    """
+    addr_sets, bad_ips = parse_addresses(ips)
+    pfx_sets, bad_pfx = parse_prefixes(prefixes)
+    match = np.full(len(ips), -1, dtype=np.int64)
+    for version in (4, 6):
+        addrs, pfx = addr_sets[version], pfx_sets[version]
+        found = _longest_match(_keys(addrs.values), pfx)
+        hit = found >= 0
+        match[addrs.rows[hit]] = pfx.rows[found[hit]]
+    return {
+        "total": len(ips),
+        "matched": int((match >= 0).sum()),
+        "match": match,
+        "invalid_ips": bad_ips,
+        "invalid_prefixes": bad_pfx,
+    }
+
+
+def collapse_prefixes(prefixes: list[str]) -> dict[str, Any]:
+    """合併重疊與相鄰的 CIDR，回傳最少數量的等價前綴清單"""
+    pfx_sets, bad = parse_prefixes(prefixes)
+    result: list[str] = []
+    for version in (4, 6):
+        p = pfx_sets[version]
+        ms, me = _merge(_keys(p.start), _keys(p.end))
+        result.extend(_intervals_to_cidrs(ms, me, version))
+    return {"input_count": len(prefixes), "prefixes": result, "invalid": bad}
+
+
+def find_overlaps(prefixes: list[str]) -> dict[str, Any]:
+    """找出被其他前綴包含（或重複）的 CIDR，並指出最小的包含者"""
+    pfx_sets, bad = parse_prefixes(prefixes)
+    overlaps: list[dict[str, str]] = []
+    for version in (4, 6):
+        p = pfx_sets[version]
+        if len(p) == 0:
+            continue
+        # 先處理完全相同的網路（同起點、同長度）
+        keyed = np.empty(len(p), dtype=[("start", _keys(p.start).dtype), ("plen", np.uint8)])
+        keyed["start"] = _keys(p.start)
+        keyed["plen"] = p.plen
+        _, first, inv = np.unique(keyed, return_index=True, return_inverse=True)
+        inv = inv.ravel()
+        dup = first[inv] != np.arange(len(p))
+        for i in np.nonzero(dup)[0]:
+            overlaps.append({
+                "prefix": prefixes[p.rows[i]],
+                "contained_in": prefixes[p.rows[first[inv[i]]]],
+                "kind": "duplicate",
+            })
+
+        container = _longest_match(_keys(p.start), p, qlen=p.plen)
+        for i in np.nonzero((container >= 0) & ~dup)[0]:
+            overlaps.append({
+                "prefix": prefixes[p.rows[i]],
+                "contained_in": prefixes[p.rows[container[i]]],
+                "kind": "subnet",
+            })
+    return {"input_count": len(prefixes), "overlaps": overlaps, "invalid": bad}
+
+
+def subtract_prefixes(prefixes: list[str], remove: list[str]) -> dict[str, Any]:
+    """從 prefixes 的位址範圍中扣除 remove 的範圍，回傳剩餘的 CIDR"""
+    pfx_sets, bad = parse_prefixes(prefixes)
+    rm_sets, bad_rm = parse_prefixes(remove)
+    result: list[str] = []
+    for version in (4, 6):
+        a, b = pfx_sets[version], rm_sets[version]
+        a_s, a_e = _merge(_keys(a.start), _keys(a.end))
+        b_s, b_e = _merge(_keys(b.start), _keys(b.end))
+        g_s, g_e = _complement(b_s, b_e, version)
+        r_s, r_e = _intersect(a_s, a_e, g_s, g_e)
+        result.extend(_intervals_to_cidrs(r_s, r_e, version))
+    return {"prefixes": result, "invalid": bad + bad_rm}
@@ -5,6 +5,9 @@ from __future__ import annotations
 import requests
 from typing import Any
 
+from sysmon.core.cache import tool_cache
+from sysmon.core.instrument import count, span
+
 
 FREE_API_URL = "http://ip-api.com/json/{ip}"
 FREE_API_FIELDS = (
@@ -14,27 +17,42 @@ FREE_API_FIELDS = (
 IPIFY_URL = "https://api.ipify.org?format=json"
 IPINFO_URL = "https://ipinfo.io/{ip}/json"
 
+# 以 (ip, provider) 為鍵；成功結果保留 6 小時，失敗結果保留 1 分鐘，並跨 CLI 執行持久化（見 cache.TOOL_OPTIONS）
+_IP_CACHE = tool_cache("ip_info")
 
-def get_public_ip() -> str:
-    """取得本機公網 IP"""
+
+def _detect_public_ip() -> str | None:
+    """依序詢問 ipify 與 my-ip.io，都失敗時回傳 None"""
     try:
-        resp = requests.get(IPIFY_URL, timeout=5)
-        resp.raise_for_status()
-        return resp.json().get("ip", "")
+        with span("http.request", target=IPIFY_URL):
+            resp = requests.get(IPIFY_URL, timeout=5)
+            resp.raise_for_status()
+        ip = resp.json().get("ip")
+        if ip:
+            return ip
     except Exception:
-        try:
+        pass
+    count("ip_info.public_ip.retry")
+    try:
+        with span("http.request", target="api4.my-ip.io"):
             resp = requests.get("https://api4.my-ip.io/ip.json", timeout=5)
-            return resp.json().get("ip", "未知")
-        except Exception:
-            return "未知"
+        return resp.json().get("ip") or None
+    except Exception:
+        return None
+
+
+def get_public_ip() -> str:
+    """取得本機公網 IP（無法取得時回傳「未知」，供顯示用）"""
+    return _detect_public_ip() or "未知"
 
 
 def query_ip_free(ip: str) -> dict[str, Any]:
     """使用 ip-api.com 查詢 IP 資訊（免費，每分鐘 45 次）"""
     url = FREE_API_URL.format(ip=ip if ip else "")
     try:
-        resp = requests.get(url, params={"fields": FREE_API_FIELDS, "lang": "zh-TW"}, timeout=10)
-        resp.raise_for_status()
+        with span("http.request", target=url):
+            resp = requests.get(url, params={"fields": FREE_API_FIELDS, "lang": "zh-TW"}, timeout=10)
+            resp.raise_for_status()
         data = resp.json()
         if data.get("status") == "fail":
             return {"error": data.get("message", "查詢失敗")}
@@ -47,21 +65,45 @@ def query_ip_ipinfo(ip: str, token: str) -> dict[str, Any]:
     """使用 ipinfo.io 查詢（需要 Token）"""
     url = IPINFO_URL.format(ip=ip if ip else "")
     try:
-        resp = requests.get(url, headers={"Authorization": f"Bearer {token}"}, timeout=10)
-        resp.raise_for_status()
+        with span("http.request", target=url):
+            resp = requests.get(url, headers={"Authorization": f"Bearer {token}"}, timeout=10)
+            resp.raise_for_status()
         return resp.json()
     except requests.RequestException as e:
         return {"error": str(e)}
 
 
-def query_ip(ip: str = "", ipinfo_token: str = "") -> dict[str, Any]:
+def query_ip(ip: str = "", ipinfo_token: str = "", use_cache: bool = True) -> dict[str, Any]:
     """
     查詢 IP 資訊。
     若未提供 ip，自動偵測公網 IP。
     若提供 ipinfo_token，使用 ipinfo.io；否則使用 ip-api.com。
+    結果依 (ip, provider) 快取，命中時回傳值帶有 _cached=True。
+    無法偵測公網 IP 時直接回傳錯誤，不查詢也不寫入快取。
     """
-    target_ip = ip.strip() if ip else get_public_ip()
+    target_ip = ip.strip() if ip else _detect_public_ip()
+    if not target_ip:
+        return {"error": "無法取得公網 IP"}
+    provider = "ipinfo.io" if ipinfo_token else "ip-api.com"
+    key = (target_ip, provider)
+
+    if use_cache:
+        entry = _IP_CACHE.get(key)
+        if entry is not None:
+            return {**entry.value, "_cached": True}
+
+    data = _query_provider(target_ip, ipinfo_token)
+    if use_cache:
+        _IP_CACHE.set(key, data, negative="error" in data)
+    return data
+
+
+def clear_ip_cache() -> None:
+    """清除 IP 查詢快取（含持久層）"""
+    _IP_CACHE.clear()
+
 
+def _query_provider(target_ip: str, ipinfo_token: str) -> dict[str, Any]:
     if ipinfo_token:
         raw = query_ip_ipinfo(target_ip, ipinfo_token)
         # 統一回傳格式
@@ -111,6 +153,6 @@ def format_ip_info(data: dict[str, Any]) -> dict[str, str]:
         "代理/VPN": "是" if data.get("proxy") else "否",
         "資料中心": "是" if data.get("hosting") else "否",
         "行動網路": "是" if data.get("mobile") else "否",
-        "資料來源": data.get("_source", "ip-api.com"),
+        "資料來源": data.get("_source", "ip-api.com") + ("（快取）" if data.get("_cached") else ""),
     }
     return result
@@ -0,0 +1,418 @@
+"""
+批次工作檔執行器（sysmon run）
+
+工作檔（YAML / TOML / JSON）宣告多組目標與要執行的檢查：
+
+    settings:
+      concurrency: 32        # 同時執行的檢查數
+      timeout: 10
+    jobs:
+      - name: domains
+        domains: [example.com, example.org]   # 或 domains_file: domains.txt
+        checks: [dns, whois, ssl]
+        dns_types: [A, MX]
+      - name: lan
+        cidrs: [192.168.1.0/28]
+        checks: [scan]
+        ports: [22, 80, 443]
+
+每項檢查完成即附加一行到 <輸出目錄>/<job>.ndjson；結果檔本身就是檢查點，
+重新執行同一工作檔時會略過已有結果的 (job, check, target)，中斷後不必重做；
+retry_failed=True 時失敗（ok=false）的項目會重新執行，新結果附加在後，以最後一筆為準。
+檢查沿用既有的 query_* / check_website / scan_ports 函式，以執行緒池限制並發，
+目標以產生器逐批送出，記憶體用量不隨目標數量增長。
+"""
+
+from __future__ import annotations
+
+import ipaddress
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+TARGET_KEYS = ("domains", "urls", "hosts", "ips", "cidrs")
+# 各檢查可套用的目標種類
+CHECKS: dict[str, tuple[str, ...]] = {
+    "dns": ("domains", "urls"),
+    "whois": ("domains", "urls", "ips", "cidrs"),
+    "ip": ("ips", "cidrs"),
+    "ssl": ("domains", "urls", "hosts"),
+    "web": ("domains", "urls"),
+    "tcp": ("hosts",),
+    "scan": ("domains", "ips", "cidrs", "hosts"),
+}
+_SAFE_NAME = re.compile(r"[^\w.-]+")
+
+
+@dataclass
+class Job:
+    name: str
+    checks: list[str]
+    targets: dict[str, list[str]]
+    ports: list[int] | None = None
+    dns_types: list[str] = field(default_factory=lambda: ["A"])
+
+    @classmethod
+    def from_dict(cls, raw: dict[str, Any], base_dir: Path) -> "Job":
+        name = raw.get("name")
+        if not name:
+            raise ValueError(f"工作缺少 name：{raw}")
+        checks = [str(c).lower() for c in raw.get("checks", [])]
+        unknown = [c for c in checks if c not in CHECKS]
+        if not checks or unknown:
+            raise ValueError(f"工作 {name} 的 checks 不合法：{unknown or '未指定'}（可用：{', '.join(CHECKS)}）")
+
+        targets: dict[str, list[str]] = {}
+        for key in TARGET_KEYS:
+            items = [str(v).strip() for v in raw.get(key, []) if str(v).strip()]
+            if raw.get(f"{key}_file"):
+                from sysmon.core.ip_bulk import read_lines
+
+                path = base_dir / raw[f"{key}_file"]
+                items += read_lines(path.read_text(encoding="utf-8"))
+            if items:
+                targets[key] = items
+        if not targets:
+            raise ValueError(f"工作 {name} 沒有任何目標（{' / '.join(TARGET_KEYS)}）")
+        for cidr in targets.get("cidrs", []):
+            ipaddress.ip_network(cidr, strict=False)
+
+        ports = raw.get("ports")
+        return cls(
+            name=str(name),
+            checks=checks,
+            targets=targets,
+            ports=[int(p) for p in ports] if ports else None,
+            dns_types=[str(t).upper() for t in raw.get("dns_types", ["A"])],
+        )
+
+    def tasks(self) -> Iterator[tuple[str, str]]:
+        """依序產生 (check, target)；CIDR 逐一展開為主機位址"""
+        for check in self.checks:
+            for kind in CHECKS[check]:
+                for target in self._iter_targets(kind):
+                    if check == "dns":
+                        for rtype in self.dns_types:
+                            yield check, f"{target} {rtype}"
+                    else:
+                        yield check, target
+
+    def count(self) -> int:
+        total = 0
+        for check in self.checks:
+            for kind in CHECKS[check]:
+                n = sum(_cidr_hosts(c) for c in self.targets.get(kind, [])) if kind == "cidrs" \
+                    else len(self.targets.get(kind, []))
+                total += n * (len(self.dns_types) if check == "dns" else 1)
+        return total
+
+    def _iter_targets(self, kind: str) -> Iterator[str]:
+        if kind != "cidrs":
+            yield from self.targets.get(kind, [])
+            return
+        from sysmon.core.subnet_calc import iter_hosts
+
+        for cidr in self.targets.get("cidrs", []):
+            yield from iter_hosts(cidr)
+
+
+def _cidr_hosts(cidr: str) -> int:
+    from sysmon.core.subnet_calc import _host_range
+
+    first, last = _host_range(ipaddress.ip_network(cidr, strict=False))
+    return last - first + 1
+
+
+@dataclass
+class JobFile:
+    jobs: list[Job]
+    concurrency: int = 16
+    timeout: float = 10.0
+    output: str | None = None
+
+
+def _parse(path: Path) -> dict[str, Any]:
+    suffix = path.suffix.lower()
+    if suffix in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError as e:
+            raise ValueError("讀取 YAML 工作檔需要安裝 PyYAML（pip install pyyaml），或改用 .toml / .json") from e
+        with open(path, encoding="utf-8") as f:
+            try:
+                return yaml.safe_load(f) or {}
+            except yaml.YAMLError as e:
+                raise ValueError(f"YAML 格式錯誤：{e}") from e
+    if suffix == ".toml":
+        import tomllib
+
+        with open(path, "rb") as f:
+            try:
+                return tomllib.load(f)
+            except tomllib.TOMLDecodeError as e:
+                raise ValueError(f"TOML 格式錯誤：{e}") from e
+    if suffix == ".json":
+        with open(path, encoding="utf-8") as f:
+            try:
+                return json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"JSON 格式錯誤：{e}") from e
+    raise ValueError(f"不支援的工作檔格式：{suffix}（可用 .yaml / .toml / .json）")
+
+
+def load_jobs(path: str | Path) -> JobFile:
+    """
+    讀取工作檔（依副檔名判斷 YAML / TOML / JSON）。
+
+    Raises:
+        ValueError: 內容不合法或缺少 PyYAML
+        OSError: 檔案無法讀取
+    """
+    path = Path(path)
+    raw = _parse(path)
+    if not isinstance(raw, dict):
+        raise ValueError("工作檔頂層必須是物件")
+    settings = raw.get("settings", {})
+    jobs = [Job.from_dict(j, path.parent) for j in raw.get("jobs", raw.get("job", []))]
+    if not jobs:
+        raise ValueError("工作檔中沒有任何 jobs")
+    names = [j.name for j in jobs]
+    if len(set(names)) != len(names):
+        raise ValueError("工作名稱重複")
+    return JobFile(
+        jobs=jobs,
+        concurrency=int(settings.get("concurrency", 16)),
+        timeout=float(settings.get("timeout", 10)),
+        output=settings.get("output"),
+    )
+
+
+# ── 檢查 ───────────────────────────────────────────────────────────────────────
+def _host_of(target: str) -> str:
+    return target.removeprefix("https://").removeprefix("http://").split("/")[0]
+
+
+def _split_host_port(target: str, default: int | None = None) -> tuple[str, int | None]:
+    from sysmon.core.probe import _split_port
+
+    host, port = _split_port(_host_of(target), 0)
+    return host, port or default
+
+
+def run_check(check: str, target: str, job: Job, timeout: float) -> dict[str, Any]:
+    """執行單一檢查，回傳對應工具函式的結果"""
+    if check == "dns":
+        from sysmon.core.dns_tools import query_dns
+
+        name, _, rtype = target.rpartition(" ")
+        return query_dns(_split_host_port(name)[0], rtype)
+    if check == "whois":
+        from sysmon.core.whois_tools import query_whois
+
+        return query_whois(_split_host_port(target)[0])
+    if check == "ip":
+        from sysmon.core.ip_info import query_ip
+
+        return query_ip(target)
+    if check == "ssl":
+        from sysmon.core.ssl_tools import query_ssl
+
+        host, port = _split_host_port(target, 443)
+        return query_ssl(host, port)
+    if check == "web":
+        from sysmon.core.web_tools import DEFAULT_UA, check_website
+
+        return check_website(target, DEFAULT_UA, int(timeout))
+    if check == "tcp":
+        from sysmon.core.port_scanner import _scan_port
+
+        host, port = _split_host_port(target)
+        if not port:
+            return {"error": f"缺少連接埠：{target}"}
+        return _scan_port(host, port, timeout)
+    # scan：host:port 目標只掃該埠，否則掃 job.ports（未指定時為常見埠）
+    from sysmon.core.port_scanner import scan_ports
+
+    host, port = _split_host_port(target)
+    ports = [port] if port else job.ports
+    return scan_ports(host, ports=ports, timeout=min(timeout, 3.0), max_workers=32)
+
+
+def _is_ok(result: dict[str, Any]) -> bool:
+    return not result.get("error")
+
+
+# ── 執行器 ─────────────────────────────────────────────────────────────────────
+def _job_filename(name: str) -> str:
+    return f"{_SAFE_NAME.sub('_', name)}.ndjson"
+
+
+def _truncate_torn_tail(f, chunk: int = 65536) -> None:
+    """中斷時可能留下未寫完的最後一行：從檔尾往回找最後一個換行並截斷，讓後續附加保持每行一筆"""
+    size = f.seek(0, os.SEEK_END)
+    pos = size
+    end = 0
+    while pos > 0:
+        step = min(chunk, pos)
+        pos -= step
+        f.seek(pos)
+        i = f.read(step).rfind(b"\n")
+        if i >= 0:
+            end = pos + i + 1
+            break
+    if end != size:
+        f.truncate(end)
+
+
+def _load_done(path: Path, retry_failed: bool = False) -> set[tuple[str, str]]:
+    """
+    逐行讀取既有結果檔中已完成的 (check, target)，不把整個檔案（含完整結果）載入記憶體。
+    retry_failed=True 時只有 ok 的記錄算完成。
+    """
+    done: set[tuple[str, str]] = set()
+    if not path.exists():
+        return done
+    with open(path, "rb+") as f:
+        _truncate_torn_tail(f)
+        f.seek(0)
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            key = (rec.get("check"), rec.get("target"))
+            if rec.get("ok", True) or not retry_failed:
+                done.add(key)
+            else:
+                done.discard(key)  # 同一項有多筆記錄時以最後一筆為準
+    return done
+
+
+@dataclass
+class RunSummary:
+    total: int = 0
+    skipped: int = 0
+    completed: int = 0
+    failed: int = 0
+    elapsed_s: float = 0.0
+    interrupted: bool = False
+    files: list[str] = field(default_factory=list)
+
+
+class JobRunner:
+    """
+    執行工作檔：同時最多 concurrency 項檢查，完成即寫入結果檔（每行 flush）。
+
+    Args:
+        resume: 略過結果檔中已有記錄的檢查；False 時覆寫結果檔
+        retry_failed: 續跑時重新執行失敗（ok=false）的檢查
+        on_result: 每項檢查完成時呼叫 on_result(record)
+        on_progress: 每項檢查完成時呼叫 on_progress(已完成 + 已略過, 總數)
+    """
+
+    def __init__(
+        self,
+        job_file: JobFile,
+        output_dir: str | Path,
+        concurrency: int | None = None,
+        resume: bool = True,
+        retry_failed: bool = False,
+        on_result: Callable[[dict[str, Any]], None] | None = None,
+        on_progress: Callable[[int, int], None] | None = None,
+    ):
+        self.job_file = job_file
+        self.output_dir = Path(output_dir)
+        self.concurrency = max(1, concurrency or job_file.concurrency)
+        self.resume = resume
+        self.retry_failed = retry_failed
+        self.on_result = on_result
+        self.on_progress = on_progress
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        """停止送出新的檢查（已在執行中的會完成並寫入）"""
+        self._stop.set()
+
+    def total(self) -> int:
+        return sum(job.count() for job in self.job_file.jobs)
+
+    def run(self) -> RunSummary:
+        """執行到完成或被中斷（Ctrl+C / stop()）；中斷時等待執行中的檢查寫完後回傳"""
+        from sysmon.output import dumps
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        summary = RunSummary(total=self.total())
+        start = time.perf_counter()
+        files: dict[str, Any] = {}
+        lock = threading.Lock()
+        timeout = self.job_file.timeout
+
+        def pending() -> Iterator[tuple[Job, str, str]]:
+            for job in self.job_file.jobs:
+                path = self.output_dir / _job_filename(job.name)
+                done = _load_done(path, self.retry_failed) if self.resume else set()
+                files[job.name] = open(path, "a" if self.resume else "w", encoding="utf-8")
+                summary.files.append(str(path))
+                for check, target in job.tasks():
+                    if (check, target) in done:
+                        summary.skipped += 1
+                        continue
+                    yield job, check, target
+
+        def execute(job: Job, check: str, target: str) -> None:
+            t0 = time.perf_counter()
+            try:
+                result = run_check(check, target, job, timeout)
+            except Exception as e:
+                result = {"error": str(e)}
+            record = {
+                "job": job.name,
+                "check": check,
+                "target": target,
+                "ts": datetime.now().isoformat(timespec="seconds"),
+                "elapsed_ms": round((time.perf_counter() - t0) * 1000, 2),
+                "ok": _is_ok(result),
+                "result": result,
+            }
+            line = dumps(record) + "\n"
+            with lock:
+                f = files[job.name]
+                f.write(line)
+                f.flush()
+                summary.completed += 1
+                summary.failed += not record["ok"]
+                done = summary.completed + summary.skipped
+            if self.on_result is not None:
+                self.on_result(record)
+            if self.on_progress is not None:
+                self.on_progress(done, summary.total)
+
+        # 只保留 2 倍並發量的未完成 future，避免一次送出全部目標
+        in_flight: set[Future] = set()
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="sysmon-job") as pool:
+                try:
+                    for job, check, target in pending():
+                        if self._stop.is_set():
+                            summary.interrupted = True
+                            break
+                        if len(in_flight) >= self.concurrency * 2:
+                            _, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        in_flight.add(pool.submit(execute, job, check, target))
+                    wait(in_flight)
+                except KeyboardInterrupt:
+                    summary.interrupted = True
+                    for fut in in_flight:
+                        fut.cancel()
+        finally:
+            for f in files.values():
+                f.close()
+            summary.elapsed_s = time.perf_counter() - start
+        return summary
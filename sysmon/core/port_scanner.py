@@ -2,9 +2,13 @@
 
 from __future__ import annotations
 
+import contextvars
 import socket
+import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Any
+from typing import Any, Callable
+
+from sysmon.core.instrument import span
 
 
 COMMON_PORTS: list[int] = [
@@ -24,16 +28,23 @@ SERVICE_NAMES: dict[int, str] = {
 }
 
 
+def service_name(port: int, is_open: bool = True) -> str:
+    """常見服務名稱；開放的未知連接埠再查系統服務表"""
+    if port in SERVICE_NAMES:
+        return SERVICE_NAMES[port]
+    if not is_open:
+        return ""
+    return socket.getservbyport(port, "tcp") if _has_service(port) else "unknown"
+
+
 def _scan_port(host: str, port: int, timeout: float) -> dict[str, Any]:
     try:
-        with socket.create_connection((host, port), timeout=timeout):
-            return {
-                "port": port,
-                "status": "open",
-                "service": SERVICE_NAMES.get(port, socket.getservbyport(port, "tcp") if _has_service(port) else "unknown"),
-            }
+        with span("tcp.connect", target=f"{host}:{port}"):
+            sock = socket.create_connection((host, port), timeout=timeout)
+        with sock:
+            return {"port": port, "status": "open", "service": service_name(port)}
     except (ConnectionRefusedError, socket.timeout, OSError):
-        return {"port": port, "status": "closed", "service": SERVICE_NAMES.get(port, "")}
+        return {"port": port, "status": "closed", "service": service_name(port, is_open=False)}
 
 
 def _has_service(port: int) -> bool:
@@ -50,6 +61,8 @@ def scan_ports(
     preset: str = "common",
     timeout: float = 1.0,
     max_workers: int = 100,
+    on_result: Callable[[dict[str, Any]], None] | None = None,
+    stop_event: threading.Event | None = None,
 ) -> dict[str, Any]:
     """
     掃描指定主機的連接埠。
@@ -60,6 +73,8 @@ def scan_ports(
         preset: "common"（預設常見埠）或 "all"（1-1024）
         timeout: 每個連接埠的逾時秒數
         max_workers: 最大並發執行緒數
+        on_result: 每個連接埠完成時（依完成順序）呼叫，可用於串流輸出
+        stop_event: 設定後不再開始新的連接埠，已完成的結果照常回傳（results 只含已掃描者）
     """
     if ports:
         target_ports = ports[:1000]  # 最多 1000 個
@@ -71,9 +86,20 @@ def scan_ports(
     results: list[dict[str, Any]] = []
 
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {executor.submit(_scan_port, host, p, timeout): p for p in target_ports}
+        # 複製 contextvars，讓 tcp.connect span 掛在呼叫端目前的 span 之下
+        futures = {
+            executor.submit(contextvars.copy_context().run, _scan_port, host, p, timeout): p for p in target_ports
+        }
         for future in as_completed(futures):
-            results.append(future.result())
+            if future.cancelled():
+                continue
+            result = future.result()
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+            if stop_event is not None and stop_event.is_set():
+                for f in futures:
+                    f.cancel()
 
     results.sort(key=lambda x: x["port"])
     open_ports = [r for r in results if r["status"] == "open"]
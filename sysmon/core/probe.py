@@ -0,0 +1,455 @@
+"""
+非同步探測協調器：以單一 asyncio 事件迴圈執行 DNS / TCP / TLS / HTTP / WHOIS 探測
+
+- 全域並發上限與每個目的主機的並發上限（避免同時對單一主機發出過多連線）
+- 每個探測的逾時、整體期限（到期後取消尚未完成的探測）
+- 每完成一筆即回呼（串流輸出 / 進度顯示），並可由其他執行緒呼叫 cancel()
+
+結果格式沿用各工具模組的 dict，外加 kind / target / ok / elapsed_ms 欄位；
+失敗時同樣以 "error" 欄位表示，不拋出例外。ok 表示目標狀態正常：沒有錯誤、連接埠開放、
+HTTP 狀態碼小於 400、憑證未過期。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import ssl
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Iterable
+
+from sysmon.core.instrument import count, http_trace, record, span
+
+KINDS = ("dns", "tcp", "tls", "http", "whois")
+DEFAULT_PORTS = {"tcp": 80, "tls": 443}
+
+
+@dataclass(frozen=True)
+class Probe:
+    """單一探測：kind 為 KINDS 之一，params 為各類型的額外參數（如 DNS 記錄類型）"""
+
+    kind: str
+    target: str
+    port: int | None = None
+    params: dict[str, Any] = field(default_factory=dict, compare=False, hash=False)
+
+    @property
+    def host(self) -> str:
+        """並發限制所依據的目的主機"""
+        if self.kind == "http":
+            import httpx
+
+            return httpx.URL(_http_url(self.target)).host or self.target
+        return self.target
+
+    @property
+    def label(self) -> str:
+        if self.kind == "dns":
+            return f"{self.target} {self.params.get('record_type', 'A')}"
+        if self.port is not None:
+            return f"{self.target}:{self.port}"
+        return self.target
+
+
+def parse_probe(spec: str) -> Probe:
+    """
+    解析探測描述字串：
+        dns:example.com[/MX]   tcp:host:22   tls:host[:443]
+        http:https://example.com/path        whois:example.com
+
+    Raises:
+        ValueError: 類型不支援或格式錯誤
+    """
+    kind, sep, rest = spec.strip().partition(":")
+    kind = kind.lower()
+    if not sep or kind not in KINDS or not rest:
+        raise ValueError(f"探測格式錯誤：{spec}（應為 {'/'.join(KINDS)}:目標）")
+    if kind == "dns":
+        name, _, rtype = rest.partition("/")
+        return Probe("dns", name, params={"record_type": (rtype or "A").upper()})
+    if kind in ("tcp", "tls"):
+        host, port = _split_port(rest, DEFAULT_PORTS[kind])
+        return Probe(kind, host, port)
+    return Probe(kind, rest)
+
+
+def _split_port(spec: str, default: int) -> tuple[str, int]:
+    if spec.startswith("["):  # [IPv6]:port
+        host, _, tail = spec[1:].partition("]")
+        return host, int(tail[1:]) if tail.startswith(":") else default
+    if spec.count(":") == 1:
+        host, port = spec.split(":")
+        return host, int(port)
+    return spec, default
+
+
+def build_probes(
+    targets: Iterable[str],
+    kinds: Iterable[str] = ("dns", "tcp", "tls", "http"),
+    ports: Iterable[int] = (),
+    record_types: Iterable[str] = ("A",),
+) -> list[Probe]:
+    """
+    由目標清單產生探測：每個目標套用所有 kinds。
+    以 "類型:" 開頭的目標視為完整描述（見 parse_probe），不再展開。
+    tcp 依 ports 各產生一個探測（未指定時使用目標所帶的連接埠，否則為 80）。
+    """
+    kinds = [k.lower() for k in kinds]
+    for k in kinds:
+        if k not in KINDS:
+            raise ValueError(f"不支援的探測類型：{k}")
+    probes: list[Probe] = []
+    for target in targets:
+        target = target.strip()
+        if not target or target.startswith("#"):
+            continue
+        prefix, _, rest = target.partition(":")
+        if prefix.lower() in KINDS and not rest.startswith("//"):
+            probes.append(parse_probe(target))
+            continue
+        host, port = _split_port(target.removeprefix("https://").removeprefix("http://").split("/")[0], 0)
+        for kind in kinds:
+            if kind == "dns":
+                # IP 目標改查反解（PTR）
+                rtypes = ["PTR"] if _is_ip(host) else [r.upper() for r in record_types]
+                probes += [Probe("dns", host, params={"record_type": r}) for r in rtypes]
+            elif kind == "tcp":
+                tcp_ports = list(ports) or [port or DEFAULT_PORTS["tcp"]]
+                probes += [Probe("tcp", host, p) for p in tcp_ports]
+            elif kind == "tls":
+                probes.append(Probe("tls", host, DEFAULT_PORTS["tls"]))
+            elif kind == "http":
+                probes.append(Probe("http", target))
+            else:
+                probes.append(Probe("whois", host))
+    return probes
+
+
+def _is_ip(value: str) -> bool:
+    import ipaddress
+
+    try:
+        ipaddress.ip_address(value)
+        return True
+    except ValueError:
+        return False
+
+
+# ── 各類型探測 ─────────────────────────────────────────────────────────────────
+def _http_url(target: str) -> str:
+    from sysmon.core.web_tools import _normalize_url
+
+    return _normalize_url(target)
+
+
+async def _probe_dns(probe: Probe, ctx: "_Context") -> dict[str, Any]:
+    import dns.asyncresolver
+    from sysmon.core.dns_tools import _error_message, _format_rdata, _query_name
+
+    rtype = probe.params.get("record_type", "A")
+    server = probe.params.get("dns_server")
+    resolver = dns.asyncresolver.Resolver()
+    if server:
+        resolver.nameservers = [server]
+    resolver.timeout = min(5.0, ctx.timeout)
+    resolver.lifetime = ctx.timeout
+    ttl = None
+    try:
+        with span("dns.resolve", target=probe.target, type=rtype):
+            answers = await resolver.resolve(_query_name(probe.target, rtype), rtype)
+        records, error = [_format_rdata(rtype, r) for r in answers], None
+        ttl = answers.rrset.ttl if answers.rrset is not None else None
+    except Exception as e:
+        records, error = [], _error_message(e, probe.target, rtype)
+    result = {"domain": probe.target, "type": rtype, "records": records, "ttl": ttl, "dns_server": server or "系統預設"}
+    if error:
+        result["error"] = error
+    return result
+
+
+async def _probe_tcp(probe: Probe, ctx: "_Context") -> dict[str, Any]:
+    from sysmon.core.port_scanner import service_name
+
+    try:
+        with span("tcp.connect", target=probe.label):
+            _, writer = await asyncio.wait_for(asyncio.open_connection(probe.target, probe.port), ctx.timeout)
+    except (OSError, asyncio.TimeoutError):
+        return {"port": probe.port, "status": "closed", "service": service_name(probe.port, is_open=False)}
+    writer.close()
+    with contextlib.suppress(OSError):
+        await writer.wait_closed()
+    return {"port": probe.port, "status": "open", "service": service_name(probe.port)}
+
+
+async def _probe_tls(probe: Probe, ctx: "_Context") -> dict[str, Any]:
+    from sysmon.core.ssl_tools import _cert_info, _error_result
+
+    # server_name：直接連線到已解析的 IP，但以域名作為 SNI 並驗證憑證
+    server_name = probe.params.get("server_name", probe.target)
+    try:
+        # TCP 連線與 TLS 交握在同一個呼叫內完成，合併計時
+        with span("tls.connect", target=probe.label):
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(probe.target, probe.port, ssl=ctx.ssl_context, server_hostname=server_name),
+                ctx.timeout,
+            )
+        cert_der = writer.get_extra_info("ssl_object").getpeercert(binary_form=True)
+        writer.close()
+        with contextlib.suppress(OSError, ssl.SSLError):
+            await writer.wait_closed()
+        with span("tls.parse", target=server_name):
+            return _cert_info(server_name, probe.port, cert_der)
+    except asyncio.TimeoutError as e:
+        return _error_result(probe.target, probe.port, TimeoutError(str(e)))
+    except Exception as e:
+        return _error_result(probe.target, probe.port, e)
+
+
+async def _probe_http(probe: Probe, ctx: "_Context") -> dict[str, Any]:
+    from sysmon.core.web_tools import _build_result, _error_result
+
+    url = _http_url(probe.target)
+    # connect_ip：第一個請求直接連線到已解析的 IP（Host 標頭與 SNI 仍為原域名），不重複解析
+    connect_ip = probe.params.get("connect_ip")
+    request_url, headers, extensions = url, {}, http_trace(asynchronous=True, target=url)
+    if connect_ip:
+        import httpx
+
+        parsed = httpx.URL(url)
+        request_url = parsed.copy_with(host=connect_ip)
+        headers["Host"] = parsed.netloc.decode()
+        extensions["sni_hostname"] = parsed.host
+    try:
+        start = time.perf_counter()
+        resp = await ctx.http_client().get(request_url, headers=headers, extensions=extensions)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        count("http.redirects", len(resp.history))
+        with span("http.parse", target=url):
+            result = _build_result(url, resp, elapsed_ms)
+    except Exception as e:
+        return _error_result(url, e)
+    if connect_ip:
+        result["connected_ip"] = connect_ip
+        result["url"] = _restore_host(result["url"], connect_ip, parsed.host)
+        for r in result["redirect_chain"]:
+            r["url"] = _restore_host(r["url"], connect_ip, parsed.host)
+    return result
+
+
+def _restore_host(url: str, ip: str, host: str) -> str:
+    import httpx
+
+    parsed = httpx.URL(url)
+    return str(parsed.copy_with(host=host)) if parsed.host == ip else url
+
+
+async def _probe_whois(probe: Probe, ctx: "_Context") -> dict[str, Any]:
+    from sysmon.core.whois_tools import query_whois
+
+    # WHOIS 函式庫為阻塞式，交由預設執行緒池
+    return await asyncio.to_thread(query_whois, probe.target)
+
+
+PROBES: dict[str, Callable[[Probe, "_Context"], Awaitable[dict[str, Any]]]] = {
+    "dns": _probe_dns,
+    "tcp": _probe_tcp,
+    "tls": _probe_tls,
+    "http": _probe_http,
+    "whois": _probe_whois,
+}
+
+
+class _Context:
+    """單次執行共用的資源：TLS context 與 HTTP 連線池"""
+
+    def __init__(self, timeout: float, user_agent: str | None):
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self.ssl_context = ssl.create_default_context()
+        self._http = None
+
+    def http_client(self):
+        if self._http is None:
+            import httpx
+            from sysmon.core.web_tools import DEFAULT_UA
+
+            self._http = httpx.AsyncClient(
+                headers={"User-Agent": self.user_agent or DEFAULT_UA},
+                follow_redirects=True,
+                timeout=self.timeout,
+                verify=False,
+                limits=httpx.Limits(max_connections=None, max_keepalive_connections=20),
+            )
+        return self._http
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+
+
+# ── 協調器 ─────────────────────────────────────────────────────────────────────
+class ProbeRunner:
+    """
+    並發執行一批探測。
+
+    Args:
+        concurrency: 全域同時進行的探測數上限
+        per_host: 同一目的主機同時進行的探測數上限
+        timeout: 單一探測逾時秒數
+        deadline: 整體期限秒數（None 為不限），到期後未完成的探測標記為已取消
+        on_result: 每筆完成時呼叫 on_result(result)，依完成順序
+        on_progress: 每筆完成時呼叫 on_progress(done, total)
+
+    同一個 runner 可在事件迴圈中並發呼叫多次 run_async（如 audit 的多條分支），
+    這些呼叫共用全域與每主機配額，並發上限不會因分支數而倍增。
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 100,
+        per_host: int = 10,
+        timeout: float = 10.0,
+        deadline: float | None = None,
+        user_agent: str | None = None,
+        on_result: Callable[[dict[str, Any]], None] | None = None,
+        on_progress: Callable[[int, int], None] | None = None,
+    ):
+        self.concurrency = max(1, concurrency)
+        self.per_host = max(1, per_host)
+        self.timeout = timeout
+        self.deadline = deadline
+        self.user_agent = user_agent
+        self.on_result = on_result
+        self.on_progress = on_progress
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self._active = 0
+        self._global_sem: asyncio.Semaphore | None = None
+        self._host_sems: dict[str, asyncio.Semaphore] = {}
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        """取消進行中執行尚未完成的探測（可由其他執行緒呼叫）；之後的 run 不受影響"""
+        self._cancelled.set()
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._cancel_pending)
+
+    def _cancel_pending(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+
+    def run(self, probes: Iterable[Probe]) -> list[dict[str, Any]]:
+        """同步介面：建立事件迴圈執行並回傳結果（依輸入順序）"""
+        return asyncio.run(self.run_async(probes))
+
+    async def run_async(self, probes: Iterable[Probe]) -> list[dict[str, Any]]:
+        probes = list(probes)
+        if not self._active:
+            # 第一個進行中的呼叫建立配額並清除上次的取消，之後並發的呼叫沿用
+            self._cancelled.clear()
+            self._loop = asyncio.get_running_loop()
+            self._global_sem = asyncio.Semaphore(self.concurrency)
+            self._host_sems = {}
+        self._active += 1
+        global_sem, host_sems = self._global_sem, self._host_sems
+        ctx = _Context(self.timeout, self.user_agent)
+        tasks: list[asyncio.Task] = []
+        results: list[dict[str, Any] | None] = [None] * len(probes)
+        done = 0
+
+        def finish(index: int, result: dict[str, Any]) -> None:
+            nonlocal done
+            results[index] = result
+            done += 1
+            if self.on_result is not None:
+                self.on_result(result)
+            if self.on_progress is not None:
+                self.on_progress(done, len(probes))
+
+        async def run_one(index: int, probe: Probe) -> None:
+            sem = host_sems.setdefault(probe.host, asyncio.Semaphore(self.per_host))
+            queued = time.perf_counter()
+            # 先取得主機配額再佔用全域配額，等待中的探測不會擋住其他主機
+            async with sem, global_sem:
+                start = time.perf_counter()
+                record("probe.wait", start - queued)
+                with span(f"probe.{probe.kind}", target=probe.label) as sp:
+                    try:
+                        # 外層逾時多留一秒，讓各探測以自己的錯誤訊息回報逾時
+                        payload = await asyncio.wait_for(PROBES[probe.kind](probe, ctx), self.timeout + 1)
+                    except asyncio.TimeoutError:
+                        payload = {"error": "探測超時"}
+                    except Exception as e:
+                        payload = {"error": str(e)}
+                    if payload.get("error"):
+                        sp.set(error=payload["error"])
+                    elif payload.get("status") == "closed":
+                        # 與 tcp.connect 子 span 一致，關閉的連接埠在 trace 中標記為失敗
+                        sp.set(error="連接埠關閉")
+                finish(index, _result(probe, payload, time.perf_counter() - start))
+
+        try:
+            tasks = [asyncio.create_task(run_one(i, p)) for i, p in enumerate(probes)]
+            self._tasks.update(tasks)
+            if self._cancelled.is_set():
+                self._cancel_pending()
+            if tasks:
+                _, pending = await asyncio.wait(tasks, timeout=self.deadline)
+                reason = "超過整體期限" if pending else ""
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    await asyncio.wait(pending)
+                for i, probe in enumerate(probes):
+                    if results[i] is None:
+                        reason = reason or "已取消"
+                        finish(i, _result(probe, {"error": reason, "cancelled": True}, None))
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._tasks.difference_update(tasks)
+            self._active -= 1
+            if not self._active:
+                self._loop = None
+            await ctx.aclose()
+        return results  # type: ignore[return-value]
+
+
+def _result(probe: Probe, payload: dict[str, Any], elapsed: float | None) -> dict[str, Any]:
+    result = {"kind": probe.kind, "target": probe.label, **payload}
+    result["ok"] = _ok(payload)
+    result["elapsed_ms"] = None if elapsed is None else round(elapsed * 1000, 2)
+    return result
+
+
+def _ok(payload: dict[str, Any]) -> bool:
+    if payload.get("error") or payload.get("status", "open") != "open":
+        return False
+    # HTTP 結果以 status_code 表示狀態、TLS 以 is_expired 表示憑證是否過期
+    return (payload.get("status_code") or 0) < 400 and not payload.get("is_expired")
+
+
+def summarize(result: dict[str, Any]) -> str:
+    """單行摘要（表格顯示用）"""
+    if result.get("error"):
+        return str(result["error"])
+    kind = result["kind"]
+    if kind == "dns":
+        return ", ".join(result["records"])
+    if kind == "tcp":
+        return f"{result['status']} {result['service']}".strip()
+    if kind == "tls":
+        return f"{result['subject'].get('CN', '')}，剩 {result['days_left']} 天"
+    if kind == "http":
+        return f"{result['status_code']} {result['status_text']}  {result['url']}".strip()
+    if kind == "whois":
+        return str(result.get("registrar") or result.get("asn_description") or "")
+    return ""
+
+
+def run_probes(probes: Iterable[Probe], **kwargs: Any) -> list[dict[str, Any]]:
+    """便利函式：以 ProbeRunner(**kwargs) 執行並回傳結果"""
+    return ProbeRunner(**kwargs).run(probes)
@@ -0,0 +1,154 @@
+"""行程資源查詢模組 (psutil)"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any
+
+import psutil
+
+# 一次 as_dict() 取回的欄位；psutil 會在 oneshot() 內批次讀取 /proc 等來源
+_ATTRS = [
+    "pid", "ppid", "name", "username", "status",
+    "cpu_percent", "memory_info", "num_threads", "io_counters",
+    "num_fds" if psutil.POSIX else "num_handles",
+]
+
+SORT_KEYS = {
+    "cpu": "cpu_percent",
+    "mem": "rss_mb",
+    "fds": "num_fds",
+    "threads": "threads",
+    "io": "io_bps",
+    "pid": "pid",
+    "name": "name",
+}
+# 預設遞增排序的欄位（其餘為數值由大到小）
+ASCENDING_KEYS = ("pid", "name")
+
+
+class ProcessMonitor:
+    """
+    以 PID 為鍵快取 psutil.Process 物件與上一次的 I/O 計數器。
+
+    快取屬於此物件本身（不共用 psutil.process_iter 的全域快取），
+    因此 cpu_percent 與 I/O 速率都是相對於「這個監控器」上一次 refresh 的差值。
+    PID 被重複使用時以 is_running()（比對實際行程的啟動時間）辨識並重建物件；
+    不可比對 as_dict 的 create_time，psutil 會把它記憶在舊物件上。
+    """
+
+    def __init__(self):
+        self._procs: dict[int, psutil.Process] = {}
+        self._io_prev: dict[int, tuple[int, int]] = {}
+        self._last_ts = 0.0
+        self._lock = threading.Lock()
+        self._total_mem = psutil.virtual_memory().total
+
+    def refresh(self) -> list[dict[str, Any]]:
+        """列舉所有行程並回傳未排序的資料列"""
+        with self._lock:
+            now = time.monotonic()
+            dt = now - self._last_ts if self._last_ts else 0.0
+            self._last_ts = now
+
+            procs: dict[int, psutil.Process] = {}
+            io_prev: dict[int, tuple[int, int]] = {}
+            rows: list[dict[str, Any]] = []
+
+            for pid in psutil.pids():
+                proc = self._procs.get(pid)
+                if proc is not None and not proc.is_running():
+                    # PID 已被新行程重用：丟棄舊物件，CPU% 與 I/O 速率重新起算
+                    proc = None
+                    self._io_prev.pop(pid, None)
+                if proc is None:
+                    try:
+                        proc = psutil.Process(pid)
+                    except (psutil.NoSuchProcess, psutil.AccessDenied):
+                        continue
+                try:
+                    info = proc.as_dict(_ATTRS, ad_value=None)
+                except psutil.NoSuchProcess:
+                    continue
+                procs[pid] = proc
+
+                read_bps = write_bps = None
+                io = info.get("io_counters")
+                if io is not None:
+                    io_prev[pid] = (io.read_bytes, io.write_bytes)
+                    prev = self._io_prev.get(pid)
+                    if prev is not None and dt > 0:
+                        read_bps = max(io.read_bytes - prev[0], 0) / dt
+                        write_bps = max(io.write_bytes - prev[1], 0) / dt
+
+                mem = info.get("memory_info")
+                rss = mem.rss if mem else 0
+                rows.append({
+                    "pid": pid,
+                    "ppid": info.get("ppid"),
+                    "name": info.get("name") or "",
+                    "user": info.get("username") or "",
+                    "status": info.get("status") or "",
+                    "cpu_percent": info.get("cpu_percent") or 0.0,
+                    "rss_mb": round(rss / 1024 ** 2, 1),
+                    "mem_percent": round(rss / self._total_mem * 100, 2) if self._total_mem else 0.0,
+                    "threads": info.get("num_threads") or 0,
+                    "num_fds": info.get("num_fds", info.get("num_handles")),
+                    "read_bps": read_bps,
+                    "write_bps": write_bps,
+                    "io_bps": (read_bps or 0.0) + (write_bps or 0.0),
+                })
+
+            self._procs, self._io_prev = procs, io_prev
+            return rows
+
+    def snapshot(
+        self,
+        sort_by: str = "cpu",
+        name_filter: str = "",
+        user: str = "",
+        top_n: int | None = None,
+        descending: bool | None = None,
+    ) -> list[dict[str, Any]]:
+        """refresh 後依條件篩選、排序並取前 top_n 筆；descending 未指定時 pid / name 遞增，其餘遞減"""
+        rows = self.refresh()
+        if name_filter:
+            needle = name_filter.lower()
+            rows = [r for r in rows if needle in r["name"].lower() or needle == str(r["pid"])]
+        if user:
+            rows = [r for r in rows if r["user"] == user]
+        key = SORT_KEYS.get(sort_by, "cpu_percent")
+        if descending is None:
+            descending = key not in ASCENDING_KEYS
+        if key == "name":
+            rows.sort(key=lambda r: r["name"].lower(), reverse=descending)
+        else:
+            # 無權限讀取的欄位（None）一律排在最後
+            rows.sort(key=lambda r: -1 if r[key] is None else r[key], reverse=descending)
+        return rows[:top_n] if top_n else rows
+
+
+_monitor: ProcessMonitor | None = None
+_monitor_lock = threading.Lock()
+
+
+def get_process_monitor() -> ProcessMonitor:
+    """取得全域共用的行程監控器（CLI 單次執行與長駐程式共用同一份快取）"""
+    global _monitor
+    with _monitor_lock:
+        if _monitor is None:
+            _monitor = ProcessMonitor()
+        return _monitor
+
+
+def list_processes(
+    sort_by: str = "cpu",
+    name_filter: str = "",
+    user: str = "",
+    top_n: int | None = 20,
+    monitor: ProcessMonitor | None = None,
+    descending: bool | None = None,
+) -> list[dict[str, Any]]:
+    """列出行程資源使用情況；CPU% 與 I/O 速率需第二次呼叫後才有數值"""
+    return (monitor or get_process_monitor()).snapshot(sort_by, name_filter, user, top_n, descending)
@@ -0,0 +1,306 @@
+"""
+歷史指標彙總與查詢模組（多解析度預先彙總，增量更新）
+
+每個解析度是一組固定大小、以 np.memmap 存於磁碟的環形陣列，槽位 = bucket % 容量：
+    bucket (int64)         該槽位目前代表的時間桶（ts // 解析度）
+    count  (uint32, F)     樣本數
+    sum    (float64, F)    總和（平均 = sum / count）
+    min/max (float32, F)   極值
+    hist   (uint32, F, B)  直方圖（百分位數估計用；百分比欄位線性分箱，其餘對數分箱）
+查詢時依時間窗與點數挑選解析度，再把相鄰桶以 reduceat 合併為 N 個點。
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+from pathlib import Path
+from typing import Any, Sequence
+
+import numpy as np
+
+from sysmon.core.samplelog import default_data_dir, load_range, next_timestamp
+
+# (解析度秒數, 槽位數)：10 秒保留 1 天、5 分鐘保留 28 天、1 小時保留 1 年
+LEVELS: tuple[tuple[int, int], ...] = ((10, 8640), (300, 8064), (3600, 8760))
+HIST_BINS = 32
+STATE_VERSION = 1
+AGGREGATES = ("avg", "min", "max", "count", "p50", "p90", "p95", "p99")
+
+
+def _edges(field: str) -> np.ndarray:
+    """百分比欄位：0–100 線性；其他（bytes/s 等）：0、10^2 … 10^10 對數"""
+    if field.endswith("_percent"):
+        return np.linspace(0.0, 100.0, HIST_BINS + 1)
+    return np.concatenate([[0.0], np.logspace(2, 10, HIST_BINS)])
+
+
+class _Level:
+    def __init__(self, root: Path, res: int, cap: int, nfields: int, readonly: bool):
+        self.res = res
+        self.cap = cap
+        base = root / f"{res}s"
+        mode = "r" if readonly else "r+"
+        shapes = {
+            "bucket": ((cap,), np.int64, -1),
+            "count": ((cap, nfields), np.uint32, 0),
+            "sum": ((cap, nfields), np.float64, 0),
+            "min": ((cap, nfields), np.float32, np.inf),
+            "max": ((cap, nfields), np.float32, -np.inf),
+            "hist": ((cap, nfields, HIST_BINS), np.uint32, 0),
+        }
+        if not readonly:
+            base.mkdir(parents=True, exist_ok=True)
+        for name, (shape, dtype, fill) in shapes.items():
+            path = base / f"{name}.npy"
+            if not path.exists():
+                if readonly:
+                    raise FileNotFoundError(path)
+                arr = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+                arr[:] = fill
+                arr.flush()
+                del arr
+            setattr(self, name, np.load(path, mmap_mode=mode))
+
+    def flush(self) -> None:
+        for name in ("bucket", "count", "sum", "min", "max", "hist"):
+            getattr(self, name).flush()
+
+
+class RollupStore:
+    """
+    多解析度彙總儲存區。寫入端（agent）以 update() 從取樣記錄檔增量匯入，
+    讀取端（頁面）以 readonly=True 開啟後呼叫 query()。同一目錄只應有一個寫入端。
+    """
+
+    def __init__(
+        self,
+        directory: str | Path | None = None,
+        fields: Sequence[str] | None = None,
+        readonly: bool = False,
+    ):
+        self.log_dir = Path(directory) if directory else default_data_dir()
+        self.root = self.log_dir / "rollups"
+        self.readonly = readonly
+        self._lock = threading.Lock()
+
+        state = self._read_state()
+        if state is None:
+            if readonly or not fields:
+                raise FileNotFoundError(f"尚未建立彙總資料：{self.root}")
+            state = {"version": STATE_VERSION, "fields": list(fields), "hwm": 0.0}
+        self.fields: tuple[str, ...] = tuple(state["fields"])
+        self.hwm: float = state["hwm"]
+        self._edges = [_edges(f) for f in self.fields]
+        self.levels = [_Level(self.root, res, cap, len(self.fields), readonly) for res, cap in LEVELS]
+        if not readonly:
+            self._write_state()
+
+    # ── 狀態檔 ──
+    def _read_state(self) -> dict[str, Any] | None:
+        try:
+            state = json.loads((self.root / "state.json").read_text())
+        except (OSError, ValueError):
+            return None
+        return state if state.get("version") == STATE_VERSION else None
+
+    def _write_state(self) -> None:
+        tmp = self.root / "state.json.tmp"
+        tmp.write_text(json.dumps({"version": STATE_VERSION, "fields": list(self.fields), "hwm": self.hwm}))
+        os.replace(tmp, self.root / "state.json")
+
+    # ── 寫入 ──
+    def _bin_index(self, data: np.ndarray) -> np.ndarray:
+        idx = np.empty(data.shape, dtype=np.int64)
+        for j, edges in enumerate(self._edges):
+            idx[:, j] = np.searchsorted(edges, data[:, j], side="right") - 1
+        return np.clip(idx, 0, HIST_BINS - 1)
+
+    def ingest(self, ts: np.ndarray, data: np.ndarray) -> None:
+        """
+        匯入一批樣本（ts: [n]，data: [n, F]，欄位順序同 self.fields），全程向量化。
+        比槽位內現有桶更舊的樣本（已超出保留期間）會被丟棄；NaN 不計入。
+        """
+        if self.readonly:
+            raise PermissionError("唯讀模式無法寫入")
+        if len(ts) == 0:
+            return
+        ts = np.asarray(ts, dtype=np.float64)
+        data = np.asarray(data, dtype=np.float64).reshape(len(ts), len(self.fields))
+        if np.any(np.diff(ts) < 0):
+            order = np.argsort(ts, kind="stable")
+            ts, data = ts[order], data[order]
+
+        finite = np.isfinite(data)
+        bins = self._bin_index(np.where(finite, data, 0.0))
+        with self._lock:
+            for lv in self.levels:
+                self._ingest_level(lv, ts, data, finite, bins)
+
+    def _ingest_level(self, lv: _Level, ts, data, finite, bins) -> None:
+        nf = len(self.fields)
+        b = (ts // lv.res).astype(np.int64)
+        keep = b > b[-1] - lv.cap
+        b, data, finite, bins = b[keep], data[keep], finite[keep], bins[keep]
+        starts = np.flatnonzero(np.r_[True, b[1:] != b[:-1]])
+        ub = b[starts]
+        slots = ub % lv.cap
+
+        current = lv.bucket[slots]
+        ok = ub >= current
+        fresh = ub > current
+        reset = slots[fresh]
+        lv.bucket[reset] = ub[fresh]
+        lv.count[reset] = 0
+        lv.sum[reset] = 0.0
+        lv.min[reset] = np.inf
+        lv.max[reset] = -np.inf
+        lv.hist[reset] = 0
+
+        cnt = np.add.reduceat(finite.astype(np.uint32), starts, axis=0)
+        total = np.add.reduceat(np.where(finite, data, 0.0), starts, axis=0)
+        lo = np.minimum.reduceat(np.where(finite, data, np.inf), starts, axis=0)
+        hi = np.maximum.reduceat(np.where(finite, data, -np.inf), starts, axis=0)
+        group = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(b)]))
+        flat = (group[:, None] * nf + np.arange(nf)) * HIST_BINS + bins
+        hist = np.bincount(flat[finite], minlength=len(starts) * nf * HIST_BINS)
+        hist = hist.reshape(len(starts), nf, HIST_BINS).astype(np.uint32)
+
+        s = slots[ok]
+        lv.count[s] += cnt[ok]
+        lv.sum[s] += total[ok]
+        lv.min[s] = np.minimum(lv.min[s], lo[ok])
+        lv.max[s] = np.maximum(lv.max[s], hi[ok])
+        lv.hist[s] += hist[ok]
+
+    def update(self, chunk_s: float = 86400.0) -> int:
+        """從取樣記錄檔匯入 hwm 之後的新樣本（每次最多 chunk_s 秒一批），回傳匯入筆數"""
+        total = 0
+        while True:
+            # 首次建立時資料可能很多：每批只載入 [下一筆樣本, +chunk_s) 的時間窗，限制記憶體用量
+            start = next_timestamp(self.log_dir, np.nextafter(self.hwm, math.inf) if self.hwm else None)
+            if start is None:
+                break
+            arr = load_range(self.log_dir, start=start, end=start + chunk_s, fields=self.fields)
+            if len(arr) == 0:
+                break
+            data = np.column_stack([arr[f] for f in self.fields]) if self.fields else np.empty((len(arr), 0))
+            self.ingest(arr["ts"], data)
+            self.hwm = float(arr["ts"][-1])
+            total += len(arr)
+        if total:
+            self.flush()
+        return total
+
+    def flush(self) -> None:
+        with self._lock:
+            for lv in self.levels:
+                lv.flush()
+            self._write_state()
+
+    # ── 查詢 ──
+    def _pick_level(self, start: float, end: float, points: int) -> _Level:
+        target = (end - start) / max(points, 1)
+        now = max(self.hwm, end)
+        chosen = self.levels[0]
+        for lv in self.levels:
+            if lv.res <= target:
+                chosen = lv
+        # 所選解析度保留期間不足以涵蓋起點時改用更粗的解析度
+        for lv in self.levels[self.levels.index(chosen):]:
+            chosen = lv
+            if start >= now - lv.res * lv.cap:
+                break
+        return chosen
+
+    def query(
+        self,
+        field: str,
+        start: float,
+        end: float,
+        points: int = 300,
+        aggregates: Sequence[str] = ("avg", "min", "max"),
+    ) -> dict[str, Any]:
+        """
+        查詢 [start, end) 內某欄位的彙總值，最多回傳 points 個點。
+
+        aggregates 可含 avg / min / max / count / pNN（百分位數，由直方圖估計）。
+        無資料的點為 NaN。
+        """
+        if self.readonly:
+            state = self._read_state()
+            if state:
+                self.hwm = state["hwm"]
+        if field not in self.fields:
+            return {"field": field, "error": f"未知欄位：{field}"}
+        if end <= start:
+            return {"field": field, "error": "結束時間必須晚於開始時間"}
+        j = self.fields.index(field)
+        lv = self._pick_level(start, end, points)
+
+        b0 = int(start // lv.res)
+        b1 = max(int(math.ceil(end / lv.res)), b0 + 1)
+        b0 = max(b0, b1 - lv.cap)
+        ids = np.arange(b0, b1, dtype=np.int64)
+        slots = ids % lv.cap
+        valid = lv.bucket[slots] == ids
+
+        cnt = np.where(valid, lv.count[slots, j], 0).astype(np.int64)
+        total = np.where(valid, lv.sum[slots, j], 0.0)
+        lo = np.where(valid, lv.min[slots, j], np.inf)
+        hi = np.where(valid, lv.max[slots, j], -np.inf)
+
+        k = max(1, math.ceil(len(ids) / max(points, 1)))
+        starts = np.arange(0, len(ids), k)
+        g_cnt = np.add.reduceat(cnt, starts)
+        has = g_cnt > 0
+        result: dict[str, Any] = {
+            "field": field,
+            "resolution_s": lv.res * k,
+            "level_s": lv.res,
+            "ts": (ids[starts] * lv.res).astype(np.float64),
+        }
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for agg in aggregates:
+                if agg == "count":
+                    result[agg] = g_cnt
+                elif agg == "avg":
+                    result[agg] = np.where(has, np.add.reduceat(total, starts) / g_cnt, np.nan)
+                elif agg == "min":
+                    result[agg] = np.where(has, np.minimum.reduceat(lo, starts), np.nan)
+                elif agg == "max":
+                    result[agg] = np.where(has, np.maximum.reduceat(hi, starts), np.nan)
+                elif agg.startswith("p") and agg[1:].replace(".", "", 1).isdigit():
+                    hist = np.where(valid[:, None], lv.hist[slots, j], 0).astype(np.int64)
+                    result[agg] = _hist_quantile(
+                        np.add.reduceat(hist, starts, axis=0), g_cnt, float(agg[1:]) / 100,
+                        self._edges[j],
+                        np.minimum.reduceat(lo, starts), np.maximum.reduceat(hi, starts),
+                    )
+                else:
+                    return {"field": field, "error": f"不支援的彙總：{agg}"}
+        return result
+
+
+def _hist_quantile(hist, count, q, edges, lo, hi) -> np.ndarray:
+    """由直方圖估計分位數：找出累計數達 q·count 的分箱後在箱內線性內插，並限制於 [min, max]"""
+    cum = np.cumsum(hist, axis=1)
+    target = q * count
+    idx = np.argmax(cum >= target[:, None], axis=1)
+    rows = np.arange(len(idx))
+    before = np.where(idx > 0, cum[rows, np.maximum(idx - 1, 0)], 0)
+    inbin = hist[rows, idx]
+    frac = np.where(inbin > 0, (target - before) / np.maximum(inbin, 1), 0.0)
+    value = edges[idx] + frac * (edges[idx + 1] - edges[idx])
+    value = np.clip(value, lo, hi)
+    return np.where(count > 0, value, np.nan)
+
+
+def open_store(directory: str | Path | None = None) -> RollupStore | None:
+    """以唯讀模式開啟彙總資料；尚未建立時回傳 None"""
+    try:
+        return RollupStore(directory, readonly=True)
+    except FileNotFoundError:
+        return None
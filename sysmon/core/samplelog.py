@@ -0,0 +1,265 @@
+"""
+固定寬度二進位取樣記錄檔（agent 寫入、以 np.memmap 讀取）
+
+檔案格式：
+    [固定 256 bytes 標頭][記錄 0][記錄 1]...
+標頭為 MAGIC + JSON（版本、欄位名稱），不足處以空白補齊；
+每筆記錄為 little-endian 的 ts(float64) + 各欄位(float32)，寫入即附加於檔尾。
+讀取時依檔案大小推算筆數，直接 memmap 成結構化陣列，不需逐行解析。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+
+MAGIC = b"SYSMONLG"
+HEADER_SIZE = 256
+FORMAT_VERSION = 1
+FILE_PREFIX = "metrics-"
+FILE_SUFFIX = ".bin"
+
+
+def default_data_dir() -> Path:
+    """取樣記錄目錄：優先使用環境變數 SYSMON_DATA_DIR，否則為 ~/.local/share/sysmon/samples"""
+    env = os.environ.get("SYSMON_DATA_DIR")
+    if env:
+        return Path(env)
+    return Path.home() / ".local" / "share" / "sysmon" / "samples"
+
+
+def record_dtype(fields: Sequence[str]) -> np.dtype:
+    return np.dtype([("ts", "<f8")] + [(f, "<f4") for f in fields])
+
+
+def _header(fields: Sequence[str]) -> bytes:
+    meta = json.dumps({"version": FORMAT_VERSION, "fields": list(fields)}).encode()
+    if len(MAGIC) + len(meta) > HEADER_SIZE:
+        raise ValueError("欄位過多，標頭超過固定長度")
+    return (MAGIC + meta).ljust(HEADER_SIZE, b" ")
+
+
+def read_header(path: str | Path) -> list[str]:
+    """
+    讀取檔案標頭並回傳欄位名稱。
+
+    Raises:
+        ValueError: 不是取樣記錄檔或版本不支援
+    """
+    with open(path, "rb") as f:
+        raw = f.read(HEADER_SIZE)
+    if len(raw) < HEADER_SIZE or not raw.startswith(MAGIC):
+        raise ValueError(f"不是 sysmon 取樣記錄檔：{path}")
+    meta = json.loads(raw[len(MAGIC):].rstrip(b" "))
+    if meta.get("version") != FORMAT_VERSION:
+        raise ValueError(f"不支援的格式版本：{meta.get('version')}")
+    return meta["fields"]
+
+
+class SampleLogWriter:
+    """
+    附加寫入取樣記錄，依檔案大小或時間輪替，並只保留最近 keep 個檔案。
+
+    寫入經過緩衝，每 flush_s 秒（或輪替、關閉時）落盤一次；
+    程式中斷時最多遺失最後一個緩衝區，讀取端會忽略不完整的尾端記錄。
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        fields: Sequence[str],
+        max_bytes: int = 64 * 1024 ** 2,
+        rotate_s: float = 24 * 3600,
+        keep: int = 30,
+        flush_s: float = 1.0,
+    ):
+        self.directory = Path(directory)
+        self.fields = tuple(fields)
+        self.dtype = record_dtype(self.fields)
+        self.max_bytes = max_bytes
+        self.rotate_s = rotate_s
+        self.keep = keep
+        self.flush_s = flush_s
+        self._file = None
+        self._path: Path | None = None
+        self._opened_at = 0.0
+        self._size = 0
+        self._last_flush = 0.0
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def path(self) -> Path | None:
+        return self._path
+
+    def _open(self, ts: float) -> None:
+        # 檔名為 UTC 時間（含毫秒），字典序即時間順序（本地時間在日光節約回撥時會倒退）；
+        # 同名時往後遞增以維持順序
+        ms = int(ts * 1000)
+        while True:
+            stamp = datetime.fromtimestamp(ms / 1000, timezone.utc).strftime("%Y%m%d-%H%M%S")
+            path = self.directory / f"{FILE_PREFIX}{stamp}{ms % 1000:03d}{FILE_SUFFIX}"
+            if not path.exists():
+                break
+            ms += 1
+        self._file = open(path, "wb")
+        self._file.write(_header(self.fields))
+        self._path = path
+        self._opened_at = ts
+        self._size = HEADER_SIZE
+        self._prune()
+
+    def _prune(self) -> None:
+        if self.keep <= 0:
+            return
+        for old in list_log_files(self.directory)[:-self.keep]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def append(self, ts: float, values: Sequence[float]) -> None:
+        record = np.array([(ts, *values)], dtype=self.dtype).tobytes()
+        with self._lock:
+            if self._file is None or self._size + len(record) > self.max_bytes \
+                    or ts - self._opened_at >= self.rotate_s:
+                self._close_file()
+                self._open(ts)
+            self._file.write(record)
+            self._size += len(record)
+            now = time.monotonic()
+            if now - self._last_flush >= self.flush_s:
+                self._file.flush()
+                self._last_flush = now
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_file()
+
+
+def _first_ts(path: Path) -> float:
+    """檔案第一筆記錄的時間；尚無記錄（剛建立、正在寫入）視為最新"""
+    try:
+        with open(path, "rb") as f:
+            f.seek(HEADER_SIZE)
+            raw = f.read(8)
+    except OSError:
+        raw = b""
+    return float(np.frombuffer(raw, dtype="<f8")[0]) if len(raw) == 8 else float("inf")
+
+
+def list_log_files(directory: str | Path) -> list[Path]:
+    """
+    依時間排序的記錄檔清單。以第一筆記錄的時間排序、檔名為次要鍵：
+    舊版以本地時間命名的檔案與 UTC 命名的檔案混在同一目錄時順序仍正確。
+    """
+    directory = Path(directory)
+    if not directory.is_dir():
+        return []
+    return sorted(directory.glob(f"{FILE_PREFIX}*{FILE_SUFFIX}"), key=lambda p: (_first_ts(p), p.name))
+
+
+def open_log(path: str | Path) -> np.ndarray:
+    """將單一記錄檔 memmap 成唯讀結構化陣列（忽略不完整的尾端記錄）"""
+    fields = read_header(path)
+    dtype = record_dtype(fields)
+    count = (os.path.getsize(path) - HEADER_SIZE) // dtype.itemsize
+    if count <= 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=(count,))
+
+
+def next_timestamp(directory: str | Path | None = None, start: float | None = None) -> float | None:
+    """第一筆時間 >= start 的記錄時間（只在 memmap 上 searchsorted，不複製資料）；沒有則為 None"""
+    found: float | None = None
+    for path in list_log_files(directory or default_data_dir()):
+        try:
+            ts = open_log(path)["ts"]
+        except (ValueError, OSError):
+            continue
+        i = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+        if i < len(ts) and (found is None or ts[i] < found):
+            found = float(ts[i])
+    return found
+
+
+def load_range(
+    directory: str | Path | None = None,
+    start: float | None = None,
+    end: float | None = None,
+    fields: Sequence[str] | None = None,
+) -> np.ndarray:
+    """
+    載入 [start, end) 時間範圍內的記錄（unix 秒），回傳結構化陣列（ts + 欄位）。
+
+    每個檔案以 searchsorted 在 memmap 上定位區間後整段複製，不逐筆解析；
+    只讀取與範圍重疊的檔案。fields 指定時只保留這些欄位（缺少的欄位填 NaN）。
+    """
+    files = list_log_files(directory or default_data_dir())
+    parts: list[np.ndarray] = []
+    out_fields: list[str] | None = list(fields) if fields else None
+
+    for path in files:
+        try:
+            arr = open_log(path)
+        except (ValueError, OSError):
+            continue
+        if len(arr) == 0:
+            continue
+        ts = arr["ts"]
+        if (end is not None and ts[0] >= end) or (start is not None and ts[-1] < start):
+            continue
+        lo = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+        hi = len(arr) if end is None else int(np.searchsorted(ts, end, side="left"))
+        if hi <= lo:
+            continue
+        chunk = arr[lo:hi]
+        if out_fields is None:
+            out_fields = [n for n in arr.dtype.names if n != "ts"]
+        parts.append(_project(chunk, out_fields))
+
+    if not parts:
+        return np.empty(0, dtype=record_dtype(out_fields or []))
+    return np.concatenate(parts)
+
+
+def _project(chunk: np.ndarray, fields: Sequence[str]) -> np.ndarray:
+    """複製為指定欄位順序的陣列（同時脫離 memmap）"""
+    out = np.empty(len(chunk), dtype=record_dtype(fields))
+    out["ts"] = chunk["ts"]
+    for f in fields:
+        out[f] = chunk[f] if f in chunk.dtype.names else np.nan
+    return out
+
+
+def load_dataframe(
+    directory: str | Path | None = None,
+    start: float | None = None,
+    end: float | None = None,
+    fields: Sequence[str] | None = None,
+):
+    """同 load_range，回傳以時間為索引的 pandas DataFrame"""
+    import pandas as pd
+
+    arr = load_range(directory, start, end, fields)
+    df = pd.DataFrame({name: arr[name] for name in arr.dtype.names if name != "ts"})
+    df.index = pd.to_datetime(arr["ts"], unit="s")
+    df.index.name = "time"
+    return df
@@ -3,12 +3,68 @@
 from __future__ import annotations
 
 import ipaddress
-from typing import Any
+from typing import Any, Iterator
+
+IPNetwork = ipaddress.IPv4Network | ipaddress.IPv6Network
+
+
+def _host_range(network: IPNetwork) -> tuple[int, int]:
+    """
+    以整數運算取得可用主機範圍（第一個, 最後一個），語意與 network.hosts() 相同：
+    IPv4 排除網路/廣播位址，IPv6 排除 Subnet-Router anycast，/31、/32、/127、/128 則全部可用。
+    """
+    first = int(network.network_address)
+    last = int(network.broadcast_address)
+    if network.max_prefixlen - network.prefixlen <= 1:
+        return first, last
+    if network.version == 4:
+        return first + 1, last - 1
+    return first + 1, last
+
+
+def iter_hosts(cidr: str | IPNetwork, start: int = 0, stop: int | None = None) -> Iterator[str]:
+    """
+    延遲產生可用主機位址（第 start 個到第 stop 個，不含 stop），記憶體用量固定。
+
+    Raises:
+        ValueError: CIDR 格式錯誤
+    """
+    network = cidr if isinstance(cidr, (ipaddress.IPv4Network, ipaddress.IPv6Network)) \
+        else ipaddress.ip_network(cidr.strip(), strict=False)
+    first, last = _host_range(network)
+    count = last - first + 1
+    stop = count if stop is None else min(stop, count)
+    addr_cls = ipaddress.IPv4Address if network.version == 4 else ipaddress.IPv6Address
+    for i in range(max(start, 0), stop):
+        yield str(addr_cls(first + i))
+
+
+def host_page(cidr: str, page: int = 1, page_size: int = 256) -> dict[str, Any]:
+    """分頁取得主機清單（page 從 1 開始）"""
+    try:
+        network = ipaddress.ip_network(cidr.strip(), strict=False)
+    except ValueError as e:
+        return {"input": cidr, "error": str(e)}
+    page_size = max(page_size, 1)
+    first, last = _host_range(network)
+    total = last - first + 1
+    pages = max((total + page_size - 1) // page_size, 1)
+    page = min(max(page, 1), pages)
+    offset = (page - 1) * page_size
+    return {
+        "network": network.compressed,
+        "page": page,
+        "page_size": page_size,
+        "pages": pages,
+        "total": total,
+        "offset": offset,
+        "hosts": list(iter_hosts(network, offset, offset + page_size)),
+    }
 
 
 def calculate_subnet(cidr: str) -> dict[str, Any]:
     """
-    計算 CIDR 子網路資訊。
+    計算 CIDR 子網路資訊（純整數運算，任何前綴長度皆為 O(1)）。
 
     Args:
         cidr: CIDR 表示法，如 192.168.1.0/24 或 10.0.0.1/16
@@ -22,8 +78,9 @@ def calculate_subnet(cidr: str) -> dict[str, Any]:
         network = ipaddress.ip_network(cidr, strict=False)
         input_ip = cidr.split("/")[0]
 
-        hosts = list(network.hosts())
-        host_count = len(hosts)
+        first, last = _host_range(network)
+        host_count = last - first + 1
+        addr_cls = ipaddress.IPv4Address if network.version == 4 else ipaddress.IPv6Address
 
         result: dict[str, Any] = {
             "input": cidr,
@@ -35,8 +92,8 @@ def calculate_subnet(cidr: str) -> dict[str, Any]:
             "version": f"IPv{network.version}",
             "total_addresses": network.num_addresses,
             "usable_hosts": host_count,
-            "first_host": str(hosts[0]) if hosts else "N/A",
-            "last_host": str(hosts[-1]) if hosts else "N/A",
+            "first_host": str(addr_cls(first)),
+            "last_host": str(addr_cls(last)),
             "is_private": network.is_private,
             "is_global": network.is_global,
             "is_multicast": network.is_multicast,
@@ -44,11 +101,11 @@ def calculate_subnet(cidr: str) -> dict[str, Any]:
             "compressed": network.compressed,
         }
 
-        # 若為 /30 以上，列出所有主機（最多 256 個）
+        # 主機數不超過 256 時列出全部，否則僅列前 10 個及最後一個（完整清單請用 iter_hosts / host_page）
         if host_count <= 256:
-            result["host_list"] = [str(h) for h in hosts]
+            result["host_list"] = list(iter_hosts(network))
         else:
-            result["host_list"] = [str(h) for h in hosts[:10]] + ["..."] + [str(hosts[-1])]
+            result["host_list"] = list(iter_hosts(network, 0, 10)) + ["..."] + [str(addr_cls(last))]
 
         return result
 
@@ -56,19 +113,68 @@ def calculate_subnet(cidr: str) -> dict[str, Any]:
         return {"input": cidr, "error": str(e)}
 
 
-def split_subnet(cidr: str, new_prefix: int) -> dict[str, Any]:
-    """將子網路分割為更小的子網路"""
+def _split_params(network: IPNetwork, new_prefix: int) -> tuple[int, int]:
+    """回傳 (子網路數量, 每個子網路的位址數)；前綴不合法時拋出 ValueError"""
+    if new_prefix <= network.prefixlen:
+        raise ValueError(f"新前綴 /{new_prefix} 必須大於原前綴 /{network.prefixlen}")
+    if new_prefix > network.max_prefixlen:
+        raise ValueError(f"新前綴 /{new_prefix} 超過 IPv{network.version} 上限 /{network.max_prefixlen}")
+    return 1 << (new_prefix - network.prefixlen), 1 << (network.max_prefixlen - new_prefix)
+
+
+def _subnet_str(network: IPNetwork, new_prefix: int, step: int, index: int) -> str:
+    addr_cls = ipaddress.IPv4Address if network.version == 4 else ipaddress.IPv6Address
+    return f"{addr_cls(int(network.network_address) + index * step)}/{new_prefix}"
+
+
+def subnet_at(cidr: str, new_prefix: int, index: int) -> str:
+    """
+    直接計算第 index 個（從 0 開始）子網路，不需展開前面的子網路。
+
+    Raises:
+        ValueError: CIDR 或前綴不合法、index 超出範圍
+    """
+    network = ipaddress.ip_network(cidr.strip(), strict=False)
+    count, step = _split_params(network, new_prefix)
+    if not 0 <= index < count:
+        raise ValueError(f"索引 {index} 超出範圍（共 {count:,} 個子網路）")
+    return _subnet_str(network, new_prefix, step, index)
+
+
+def iter_subnets(cidr: str, new_prefix: int, start: int = 0, stop: int | None = None) -> Iterator[str]:
+    """
+    延遲產生第 start 到 stop（不含）個子網路，記憶體用量固定。
+
+    Raises:
+        ValueError: CIDR 或前綴不合法
+    """
+    network = ipaddress.ip_network(cidr.strip(), strict=False)
+    count, step = _split_params(network, new_prefix)
+    stop = count if stop is None else min(stop, count)
+    for i in range(max(start, 0), stop):
+        yield _subnet_str(network, new_prefix, step, i)
+
+
+def split_subnet(cidr: str, new_prefix: int, page: int = 1, page_size: int = 64) -> dict[str, Any]:
+    """將子網路分割為更小的子網路（數量以位元運算求得，僅產生目前頁面）"""
     try:
-        network = ipaddress.ip_network(cidr, strict=False)
-        if new_prefix <= network.prefixlen:
-            return {"error": f"新前綴 /{new_prefix} 必須大於原前綴 /{network.prefixlen}"}
-        subnets = list(network.subnets(new_prefix=new_prefix))
+        network = ipaddress.ip_network(cidr.strip(), strict=False)
+        count, _ = _split_params(network, new_prefix)
+        page_size = max(page_size, 1)
+        pages = (count + page_size - 1) // page_size
+        page = min(max(page, 1), pages)
+        offset = (page - 1) * page_size
+        subnets = list(iter_subnets(cidr, new_prefix, offset, offset + page_size))
         return {
             "parent": str(network),
             "new_prefix": new_prefix,
-            "count": len(subnets),
-            "subnets": [str(s) for s in subnets[:64]],  # 最多顯示 64 個
-            "truncated": len(subnets) > 64,
+            "count": count,
+            "subnets": subnets,
+            "truncated": count > len(subnets),
+            "page": page,
+            "page_size": page_size,
+            "pages": pages,
+            "offset": offset,
         }
     except ValueError as e:
         return {"error": str(e)}
@@ -4,27 +4,277 @@ from __future__ import annotations
 
 import platform
 import socket
+import threading
+import time
+from collections import deque
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, Callable
 
 import psutil
 
 
-def get_cpu_info() -> dict[str, Any]:
-    """取得 CPU 資訊"""
+def _cpu_total(t) -> float:
+    # Linux 的 guest/guest_nice 已計入 user/nice，與 psutil 相同不重複計算
+    return sum(t) - getattr(t, "guest", 0.0) - getattr(t, "guest_nice", 0.0)
+
+
+def _cpu_busy(t) -> float:
+    return _cpu_total(t) - t.idle - getattr(t, "iowait", 0.0)
+
+
+def _busy_percent(busy: float, total: float) -> float:
+    if total <= 0:
+        return 0.0
+    return round(min(max(busy / total * 100, 0.0), 100.0), 1)
+
+
+class CpuSampler:
+    """
+    背景 CPU 取樣器。
+
+    背景執行緒每 interval 秒記錄一次 psutil.cpu_times(percpu=True)；
+    讀取時以當下計數與約 window 秒前的快照相減計算使用率，不需阻塞等待。
+    """
+
+    def __init__(self, interval: float = 0.25, window: float = 1.0):
+        self.interval = interval
+        self.window = window
+        self._snapshots: deque[tuple[float, list]] = deque(maxlen=int(window / interval) + 2)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> "CpuSampler":
+        if self._thread is None:
+            self._record()
+            self._thread = threading.Thread(target=self._run, name="sysmon-cpu-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _record(self) -> None:
+        snap = (time.monotonic(), psutil.cpu_times(percpu=True))
+        with self._lock:
+            self._snapshots.append(snap)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._record()
+
+    def _baseline(self, now: float) -> tuple[float, list]:
+        with self._lock:
+            baseline = self._snapshots[0]
+            for snap in self._snapshots:
+                if snap[0] <= now - self.window:
+                    baseline = snap
+            return baseline
+
+    def usage(self, min_span: float = 0.0) -> dict[str, Any]:
+        """
+        回傳 {"total": 總使用率, "per_core": [...], "span_s": 實際計算區間秒數}。
+        min_span > 0 時，若累積的歷史不足會等待補足（僅冷啟動時發生）。
+        """
+        now = time.monotonic()
+        t0, before = self._baseline(now)
+        if now - t0 < min_span:
+            time.sleep(min_span - (now - t0))
+            now = time.monotonic()
+        after = psutil.cpu_times(percpu=True)
+
+        per_core = []
+        busy_sum = total_sum = 0.0
+        for b, a in zip(before, after):
+            busy = _cpu_busy(a) - _cpu_busy(b)
+            total = _cpu_total(a) - _cpu_total(b)
+            busy_sum += busy
+            total_sum += total
+            per_core.append(_busy_percent(busy, total))
+        return {
+            "total": _busy_percent(busy_sum, total_sum),
+            "per_core": per_core,
+            "span_s": round(now - t0, 3),
+        }
+
+
+_cpu_sampler: CpuSampler | None = None
+_cpu_sampler_lock = threading.Lock()
+
+
+def get_cpu_sampler() -> CpuSampler:
+    """取得（必要時啟動）全域共用的 CPU 取樣器"""
+    global _cpu_sampler
+    with _cpu_sampler_lock:
+        if _cpu_sampler is None:
+            _cpu_sampler = CpuSampler().start()
+        return _cpu_sampler
+
+
+def get_cpu_info(min_span: float = 0.0) -> dict[str, Any]:
+    """
+    取得 CPU 資訊。
+
+    使用率由背景取樣器提供，讀取不阻塞；min_span 可要求至少涵蓋的取樣秒數。
+    """
     freq = psutil.cpu_freq()
+    usage = get_cpu_sampler().usage(min_span)
     return {
         "physical_cores": psutil.cpu_count(logical=False),
         "logical_cores": psutil.cpu_count(logical=True),
         "current_freq_mhz": round(freq.current, 1) if freq else None,
         "max_freq_mhz": round(freq.max, 1) if freq else None,
-        "usage_percent": psutil.cpu_percent(interval=0.5),
-        "per_core_usage": psutil.cpu_percent(interval=0.5, percpu=True),
+        "usage_percent": usage["total"],
+        "per_core_usage": usage["per_core"],
+        "usage_window_s": usage["span_s"],
         "architecture": platform.machine(),
         "processor": platform.processor() or "未知",
     }
 
 
+_WRAP_32 = 2 ** 32
+
+
+def counter_delta(new: int | float, old: int | float) -> int | float:
+    """
+    累計計數器差值，處理溢位與重置：
+    舊值接近 2^32（超過四分之三）時視為 32 位元計數器溢位（Windows 與部分驅動程式）；
+    其餘變小的情況視為重置（如介面重新啟用，64 位元計數器實務上不會溢位），差值取新值。
+    """
+    if new >= old:
+        return new - old
+    if _WRAP_32 * 3 // 4 < old < _WRAP_32:
+        return new + _WRAP_32 - old
+    return new
+
+
+class RateTracker:
+    """
+    保留前一次計數器快照，計算每個鍵（磁碟、網卡等）各欄位的每秒變化量。
+
+    Args:
+        read: 回傳 {名稱: psutil 計數器 namedtuple} 的函式，如
+              lambda: psutil.net_io_counters(pernic=True)
+    """
+
+    def __init__(self, read: Callable[[], dict[str, Any]]):
+        self._read = read
+        self._prev: dict[str, Any] | None = None
+        self._prev_ts = 0.0
+        self.interval_s = 0.0
+
+    def update(self) -> dict[str, dict[str, float]]:
+        """讀取新快照並回傳與上一次快照之間的速率；第一次呼叫僅建立基準，回傳空字典"""
+        now = time.monotonic()
+        cur = self._read() or {}
+        prev, prev_ts = self._prev, self._prev_ts
+        self._prev, self._prev_ts = cur, now
+        if prev is None or now <= prev_ts:
+            return {}
+
+        dt = now - prev_ts
+        self.interval_s = dt
+        rates: dict[str, dict[str, float]] = {}
+        for name, counters in cur.items():
+            old = prev.get(name)
+            if old is None:
+                continue
+            rates[name] = {
+                field: counter_delta(new, before) / dt
+                for field, new, before in zip(counters._fields, counters, old)
+            }
+        return rates
+
+
+class BackgroundSampler:
+    """背景執行緒每 interval 秒呼叫一次 fn 並保存結果，讀取 latest() 不阻塞"""
+
+    def __init__(self, fn: Callable[[], Any], interval: float = 1.0, name: str = "sysmon-sampler"):
+        self._fn = fn
+        self.interval = interval
+        self._name = name
+        self._latest: Any = None
+        self._updated_at = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self, prime: bool = True) -> "BackgroundSampler":
+        """prime=True 時先同步取樣一次；False 則第一次取樣也在背景執行（適合耗時的網路探測）"""
+        if self._thread is None:
+            if prime:
+                self._latest = self._fn()
+                self._updated_at = time.time()
+            self._thread = threading.Thread(target=self._run, args=(not prime,), name=self._name, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _sample(self) -> None:
+        try:
+            self._latest = self._fn()
+            self._updated_at = time.time()
+        except Exception:
+            pass
+
+    def _run(self, immediate: bool = False) -> None:
+        if immediate:
+            self._sample()
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def latest(self) -> Any:
+        return self._latest
+
+    @property
+    def updated_at(self) -> float:
+        return self._updated_at
+
+
+def net_rate_tracker() -> RateTracker:
+    """每張網卡的計數器速率追蹤器"""
+    return RateTracker(lambda: psutil.net_io_counters(pernic=True))
+
+
+def disk_rate_tracker() -> RateTracker:
+    """每個磁碟裝置的 I/O 計數器速率追蹤器"""
+    return RateTracker(lambda: psutil.disk_io_counters(perdisk=True))
+
+
+def get_network_rates(tracker: RateTracker) -> list[dict[str, Any]]:
+    """
+    以速率追蹤器計算每張網卡目前的流量。
+
+    回傳每秒位元組/封包數，以及本次取樣區間內的錯誤與丟棄封包數；
+    追蹤器第一次呼叫僅建立基準，回傳空清單。
+    """
+    rates = tracker.update()
+    dt = tracker.interval_s
+    rows = []
+    for name, r in sorted(rates.items()):
+        rows.append({
+            "name": name,
+            "sent_bps": r.get("bytes_sent", 0.0),
+            "recv_bps": r.get("bytes_recv", 0.0),
+            "packets_sent_ps": r.get("packets_sent", 0.0),
+            "packets_recv_ps": r.get("packets_recv", 0.0),
+            "errin": round(r.get("errin", 0.0) * dt),
+            "errout": round(r.get("errout", 0.0) * dt),
+            "dropin": round(r.get("dropin", 0.0) * dt),
+            "dropout": round(r.get("dropout", 0.0) * dt),
+            "interval_s": round(dt, 3),
+        })
+    return rows
+
+
+def network_rate_sampler(interval: float = 1.0) -> BackgroundSampler:
+    """背景取樣每張網卡速率，latest() 回傳 get_network_rates 的結果"""
+    tracker = net_rate_tracker()
+    tracker.update()
+    return BackgroundSampler(lambda: get_network_rates(tracker), interval, "sysmon-net-sampler")
+
+
 def get_memory_info() -> dict[str, Any]:
     """取得記憶體資訊"""
     vm = psutil.virtual_memory()
@@ -68,6 +318,39 @@ def get_disk_info() -> list[dict[str, Any]]:
     return disks
 
 
+def get_disk_io_rates(tracker: RateTracker) -> list[dict[str, Any]]:
+    """
+    以速率追蹤器計算每個磁碟裝置的 IOPS、吞吐量與平均服務時間。
+
+    平均服務時間 = Δ(read_time 或 write_time) / Δ(完成的 I/O 數)（毫秒）；
+    busy_percent 僅 Linux/FreeBSD 提供（busy_time）。追蹤器第一次呼叫回傳空清單。
+    """
+    rates = tracker.update()
+    rows = []
+    for name, r in sorted(rates.items()):
+        read_iops = r.get("read_count", 0.0)
+        write_iops = r.get("write_count", 0.0)
+        rows.append({
+            "device": name,
+            "read_iops": round(read_iops, 1),
+            "write_iops": round(write_iops, 1),
+            "read_mb_s": round(r.get("read_bytes", 0.0) / 1024 ** 2, 3),
+            "write_mb_s": round(r.get("write_bytes", 0.0) / 1024 ** 2, 3),
+            "avg_read_ms": round(r.get("read_time", 0.0) / read_iops, 2) if read_iops else 0.0,
+            "avg_write_ms": round(r.get("write_time", 0.0) / write_iops, 2) if write_iops else 0.0,
+            "busy_percent": round(min(r["busy_time"] / 10, 100.0), 1) if "busy_time" in r else None,
+            "interval_s": round(tracker.interval_s, 3),
+        })
+    return rows
+
+
+def disk_io_sampler(interval: float = 1.0) -> BackgroundSampler:
+    """背景取樣每個磁碟裝置的 I/O 指標，latest() 回傳 get_disk_io_rates 的結果"""
+    tracker = disk_rate_tracker()
+    tracker.update()
+    return BackgroundSampler(lambda: get_disk_io_rates(tracker), interval, "sysmon-disk-sampler")
+
+
 def get_network_interfaces() -> list[dict[str, Any]]:
     """取得網路介面資訊"""
     addrs = psutil.net_if_addrs()
@@ -123,12 +406,41 @@ def get_os_info() -> dict[str, Any]:
     }
 
 
-def get_all_system_info() -> dict[str, Any]:
-    """取得所有系統資訊"""
+def read_counters() -> dict[str, float]:
+    """
+    讀取一次累計計數器快照（CPU 時間、記憶體使用率、磁碟/網路累計位元組），
+    供取樣器以前後快照相減計算速率。ts 為 time.monotonic()。
+    """
+    cpu = psutil.cpu_times()
+    disk = psutil.disk_io_counters()
+    net = psutil.net_io_counters()
+    return {
+        "ts": time.monotonic(),
+        "cpu_total": _cpu_total(cpu),
+        "cpu_busy": _cpu_busy(cpu),
+        "mem_percent": psutil.virtual_memory().percent,
+        "disk_read_bytes": disk.read_bytes if disk else 0,
+        "disk_write_bytes": disk.write_bytes if disk else 0,
+        "net_sent_bytes": net.bytes_sent if net else 0,
+        "net_recv_bytes": net.bytes_recv if net else 0,
+    }
+
+
+def get_all_system_info(cpu_min_span: float = 0.0) -> dict[str, Any]:
+    """取得所有系統資訊（先建立 CPU 與磁碟 I/O 基準，讀取其他資訊的時間即為取樣區間）"""
+    get_cpu_sampler()
+    disk_tracker = disk_rate_tracker()
+    disk_tracker.update()
+    os_info = get_os_info()
+    memory = get_memory_info()
+    disks = get_disk_info()
+    nets = get_network_interfaces()
+    cpu = get_cpu_info(cpu_min_span)
     return {
-        "os": get_os_info(),
-        "cpu": get_cpu_info(),
-        "memory": get_memory_info(),
-        "disks": get_disk_info(),
-        "network_interfaces": get_network_interfaces(),
+        "os": os_info,
+        "cpu": cpu,
+        "memory": memory,
+        "disks": disks,
+        "disk_io": get_disk_io_rates(disk_tracker),
+        "network_interfaces": nets,
     }
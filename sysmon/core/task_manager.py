@@ -0,0 +1,194 @@
+"""
+伺服器端背景工作管理（Streamlit 長時間操作用）
+
+長時間的掃描 / 批次查詢交給共用執行緒池執行，頁面只保存工作 ID：
+腳本執行緒不會被阻塞，切換頁面也不會中斷工作，多位使用者的工作可同時進行。
+工作函式透過 Task 回報進度、附加部分結果並檢查是否被取消；
+完成的工作保留一段時間供頁面取回結果，之後自動清除。
+
+網路工具以 I/O 為主，使用執行緒池即可；工作數上限可由環境變數 SYSMON_TASK_WORKERS 調整。
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+ACTIVE = (PENDING, RUNNING)
+
+
+class TaskCancelled(Exception):
+    """工作函式可拋出此例外以提前結束（Task.check_cancelled 會代為拋出）"""
+
+
+class Task:
+    """單一背景工作的狀態；所有欄位經由鎖存取，頁面以 snapshot() 讀取一致的副本"""
+
+    def __init__(self, task_id: str, name: str, owner: str | None):
+        self.id = task_id
+        self.name = name
+        self.owner = owner
+        self.status = PENDING
+        self.done = 0
+        self.total: int | None = None
+        self.message = ""
+        self.partial: list[Any] = []
+        self.result: Any = None
+        self.error: str | None = None
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    # ── 工作函式使用 ──────────────────────────────────────────────────────────
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def cancel_event(self) -> threading.Event:
+        return self._cancel
+
+    def check_cancelled(self) -> None:
+        if self._cancel.is_set():
+            raise TaskCancelled()
+
+    def progress(self, done: int, total: int | None = None, message: str | None = None) -> None:
+        with self._lock:
+            self.done = done
+            if total is not None:
+                self.total = total
+            if message is not None:
+                self.message = message
+
+    def add_partial(self, item: Any) -> None:
+        """附加一筆部分結果並將進度加一"""
+        with self._lock:
+            self.partial.append(item)
+            self.done += 1
+
+    # ── 頁面使用 ──────────────────────────────────────────────────────────────
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            end = self.finished_at or time.time()
+            return {
+                "id": self.id,
+                "name": self.name,
+                "status": self.status,
+                "done": self.done,
+                "total": self.total,
+                "message": self.message,
+                "partial": list(self.partial),
+                "result": self.result,
+                "error": self.error,
+                "created_at": self.created_at,
+                "elapsed_s": end - self.started_at if self.started_at else 0.0,
+            }
+
+    def _set(self, **fields: Any) -> None:
+        with self._lock:
+            for k, v in fields.items():
+                setattr(self, k, v)
+
+
+class TaskManager:
+    """
+    Args:
+        max_workers: 同時執行的工作數上限，超出者以 pending 排隊
+        keep_s: 完成的工作保留秒數
+        max_tasks: 最多保留的工作數（超過時先清除最舊的已完成工作）
+    """
+
+    def __init__(self, max_workers: int = 4, keep_s: float = 3600, max_tasks: int = 200):
+        self.keep_s = keep_s
+        self.max_tasks = max_tasks
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sysmon-task")
+        self._tasks: dict[str, Task] = {}
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+
+    def submit(self, name: str, fn: Callable[..., Any], *args: Any, owner: str | None = None, **kwargs: Any) -> str:
+        """送出工作 fn(task, *args, **kwargs)，回傳工作 ID；fn 的回傳值成為 result"""
+        task = Task(f"{next(self._seq)}-{uuid.uuid4().hex[:8]}", name, owner)
+        with self._lock:
+            self._prune()
+            self._tasks[task.id] = task
+        self._pool.submit(self._run, task, fn, args, kwargs)
+        return task.id
+
+    def _run(self, task: Task, fn: Callable[..., Any], args: tuple, kwargs: dict) -> None:
+        if task.cancelled:
+            task._set(status=CANCELLED, finished_at=time.time())
+            return
+        task._set(status=RUNNING, started_at=time.time())
+        try:
+            result = fn(task, *args, **kwargs)
+        except TaskCancelled:
+            task._set(status=CANCELLED, finished_at=time.time())
+        except Exception as e:
+            task._set(status=FAILED, error=str(e), finished_at=time.time())
+        else:
+            task._set(status=CANCELLED if task.cancelled else DONE, result=result, finished_at=time.time())
+
+    def get(self, task_id: str) -> Task | None:
+        with self._lock:
+            return self._tasks.get(task_id)
+
+    def list(self, owner: str | None = None) -> list[Task]:
+        with self._lock:
+            tasks = list(self._tasks.values())
+        return [t for t in tasks if owner is None or t.owner == owner]
+
+    def cancel(self, task_id: str) -> bool:
+        """要求取消；排隊中的工作不會開始，執行中的工作在下次檢查時結束"""
+        task = self.get(task_id)
+        if task is None or task.status not in ACTIVE:
+            return False
+        task._cancel.set()
+        return True
+
+    def _prune(self) -> None:
+        now = time.time()
+        finished = sorted(
+            (t for t in self._tasks.values() if t.status not in ACTIVE),
+            key=lambda t: t.finished_at or 0,
+        )
+        for t in finished:
+            if now - (t.finished_at or now) > self.keep_s:
+                del self._tasks[t.id]
+        excess = len(self._tasks) - self.max_tasks + 1
+        for t in finished:
+            if excess <= 0:
+                break
+            if t.id in self._tasks:
+                del self._tasks[t.id]
+                excess -= 1
+
+    def shutdown(self) -> None:
+        for task in self.list():
+            task._cancel.set()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_manager: TaskManager | None = None
+_manager_lock = threading.Lock()
+
+
+def get_task_manager() -> TaskManager:
+    """取得全域共用的工作管理器（同一伺服器行程內所有 session 共用）"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = TaskManager(max_workers=int(os.environ.get("SYSMON_TASK_WORKERS", "4")))
+        return _manager
@@ -0,0 +1,146 @@
+"""系統指標時間序列模組（固定大小環形緩衝區 + 背景取樣執行緒）"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Sequence
+
+import numpy as np
+
+from sysmon.core.system_info import counter_delta, read_counters
+
+METRIC_FIELDS: tuple[str, ...] = (
+    "cpu_percent",
+    "mem_percent",
+    "disk_read_bps",
+    "disk_write_bps",
+    "net_sent_bps",
+    "net_recv_bps",
+)
+
+
+class RingBuffer:
+    """
+    以 NumPy 陣列為底的多欄位環形緩衝區。
+
+    容量固定，寫滿後覆蓋最舊的資料，記憶體用量不隨執行時間成長。
+    seq 為累計寫入筆數，可用 since(seq) 取得增量資料。
+    """
+
+    def __init__(self, capacity: int, fields: Sequence[str]):
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        self._ts = np.zeros(capacity, dtype=np.float64)
+        self._data = np.zeros((capacity, len(self.fields)), dtype=np.float64)
+        self._head = 0
+        self._size = 0
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def append(self, ts: float, values: Sequence[float]) -> None:
+        with self._lock:
+            self._ts[self._head] = ts
+            self._data[self._head] = values
+            self._head = (self._head + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+            self._seq += 1
+
+    def _ordered(self, count: int) -> tuple[np.ndarray, np.ndarray]:
+        idx = (np.arange(self._head - count, self._head)) % self.capacity
+        return self._ts[idx], self._data[idx]
+
+    def snapshot(self, last: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """依時間順序回傳 (時間戳, 資料) 的複本；last 限制最後幾筆"""
+        with self._lock:
+            count = self._size if last is None else min(last, self._size)
+            return self._ordered(count)
+
+    def since(self, seq: int) -> tuple[int, np.ndarray, np.ndarray]:
+        """回傳 seq 之後新增的資料（最多一個容量），以及目前的 seq"""
+        with self._lock:
+            count = min(max(self._seq - seq, 0), self._size)
+            ts, data = self._ordered(count)
+            return self._seq, ts, data
+
+    def latest(self) -> dict[str, float] | None:
+        with self._lock:
+            if self._size == 0:
+                return None
+            i = (self._head - 1) % self.capacity
+            return {"ts": float(self._ts[i]), **dict(zip(self.fields, self._data[i].tolist()))}
+
+
+class MetricsSampler:
+    """
+    背景系統指標取樣器：每 interval 秒讀取 CPU、記憶體、磁碟 I/O、網路 I/O，
+    將使用率與每秒速率寫入 RingBuffer。
+
+    on_sample 會在每筆資料寫入後以 (時間戳, 數值) 呼叫，可用來同步寫入磁碟等。
+    """
+
+    def __init__(
+        self,
+        interval: float = 1.0,
+        capacity: int = 3600,
+        on_sample: Callable[[float, tuple[float, ...]], None] | None = None,
+    ):
+        self.interval = interval
+        self.buffer = RingBuffer(capacity, METRIC_FIELDS)
+        self._on_sample = on_sample
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._prev: dict[str, float] | None = None
+
+    def start(self) -> "MetricsSampler":
+        if self._thread is None:
+            self._prev = read_counters()
+            self._thread = threading.Thread(target=self._run, name="sysmon-metrics-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        cur = read_counters()
+        prev, self._prev = self._prev, cur
+        if prev is None:
+            return
+        dt = cur["ts"] - prev["ts"]
+        if dt <= 0:
+            return
+
+        def rate(key: str) -> float:
+            return counter_delta(cur[key], prev[key]) / dt
+
+        total = cur["cpu_total"] - prev["cpu_total"]
+        busy = cur["cpu_busy"] - prev["cpu_busy"]
+        cpu = round(min(max(busy / total * 100, 0.0), 100.0), 1) if total > 0 else 0.0
+        ts = time.time()
+        values = (
+            cpu,
+            cur["mem_percent"],
+            rate("disk_read_bytes"),
+            rate("disk_write_bytes"),
+            rate("net_sent_bytes"),
+            rate("net_recv_bytes"),
+        )
+        self.buffer.append(ts, values)
+        if self._on_sample is not None:
+            self._on_sample(ts, values)
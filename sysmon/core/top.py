@@ -0,0 +1,63 @@
+"""類 top 即時監控的資料收集（重用計數器快照與 psutil 行程物件）"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import psutil
+
+from sysmon.core.system_info import (
+    CpuSampler,
+    disk_rate_tracker,
+    get_disk_io_rates,
+    get_network_rates,
+    net_rate_tracker,
+)
+
+from sysmon.core.process_info import ProcessMonitor
+
+
+class TopCollector:
+    """
+    每次 collect() 只讀取累計計數器並與上一次相減，不呼叫 get_all_system_info。
+
+    行程清單使用專屬的 ProcessMonitor：以 PID 快取 Process 物件，
+    cpu_percent 因此以上一次呼叫為基準計算，不需額外等待。
+    """
+
+    def __init__(self, interval: float = 1.0, top_n: int = 15, sort_by: str = "cpu"):
+        self.top_n = top_n
+        self.sort_by = sort_by
+        # CPU 取樣視窗與畫面更新間隔一致
+        self._cpu = CpuSampler(interval=max(interval / 2, 0.1), window=interval).start()
+        self._disks = disk_rate_tracker()
+        self._nics = net_rate_tracker()
+        self._disks.update()
+        self._nics.update()
+        self._ncpu = psutil.cpu_count() or 1
+        self._procs = ProcessMonitor()
+        self._procs.refresh()
+
+    def close(self) -> None:
+        self._cpu.stop()
+
+    def _processes(self) -> list[dict[str, Any]]:
+        return self._procs.snapshot(sort_by=self.sort_by, top_n=self.top_n)
+
+    def collect(self) -> dict[str, Any]:
+        vm = psutil.virtual_memory()
+        swap = psutil.swap_memory()
+        return {
+            "cpu": self._cpu.usage(),
+            "load_avg": psutil.getloadavg() if hasattr(psutil, "getloadavg") else None,
+            "memory": {
+                "percent": vm.percent,
+                "used_gb": vm.used / 1024 ** 3,
+                "total_gb": vm.total / 1024 ** 3,
+                "swap_percent": swap.percent,
+            },
+            "disks": {d["device"]: d for d in get_disk_io_rates(self._disks)},
+            "nics": {r["name"]: r for r in get_network_rates(self._nics)},
+            "processes": self._processes(),
+            "cpu_count": self._ncpu,
+        }
@@ -0,0 +1,267 @@
+"""
+結構化追蹤匯出（OpenTelemetry 相容的 OTLP/JSON）
+
+    processor = start("traces.jsonl")                # 或 "http://127.0.0.1:4318"（OTLP/HTTP collector）
+    ...                                              # sysmon.core 的 DNS / TCP / TLS / HTTP / WHOIS 階段自動產生 span
+    stop(processor)                                  # 停止匯出並寫出剩餘的 span
+
+instrument.span() 完成時只把 (ID, 名稱, 起訖時間, 屬性) 放入佇列，轉換成 OTLP 格式與寫檔 / 傳送
+都在背景執行緒批次處理（預設每 512 筆或每秒一次），萬筆目標的掃描每個 span 只多數微秒。
+佇列超過上限時丟棄新的 span 並計入 dropped，不會拖慢或撐爆探測本身。
+
+檔案輸出為每行一個 ExportTraceServiceRequest（與 OpenTelemetry Collector 的 file exporter 相同，
+otlpjsonfile receiver 可直接讀取）；URL 則以 OTLP/HTTP JSON POST 至 <url>/v1/traces。
+每個 span 帶有 sysmon.tool / sysmon.phase / sysmon.target / sysmon.outcome 屬性，失敗時 status 為 ERROR。
+環境變數 TRACEPARENT（W3C Trace Context）存在時，所有 span 掛在該上層 trace 之下。
+"""
+
+from __future__ import annotations
+
+import collections
+import json
+import os
+import socket
+import threading
+import urllib.parse
+import urllib.request
+from pathlib import Path
+from typing import Any
+
+from sysmon import __version__
+from sysmon.core import instrument
+
+MAX_BATCH = 512
+INTERVAL = 1.0
+MAX_QUEUE = 100_000
+
+# OTLP SpanKind / StatusCode
+_KIND_INTERNAL, _KIND_CLIENT = 1, 3
+_STATUS_OK, _STATUS_ERROR = 1, 2
+_CLIENT_TOOLS = ("dns", "tcp", "tls", "http", "whois")
+
+
+class FileExporter:
+    """附加寫入 OTLP/JSON lines 檔案"""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+
+    def export(self, payload: str) -> None:
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(payload + "\n")
+
+    def __str__(self) -> str:
+        return str(self.path)
+
+
+class HttpExporter:
+    """以 OTLP/HTTP JSON 傳送至 collector（未指定路徑時使用 /v1/traces）"""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0):
+        if urllib.parse.urlparse(endpoint).path in ("", "/"):
+            endpoint = endpoint.rstrip("/") + "/v1/traces"
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def export(self, payload: str) -> None:
+        request = urllib.request.Request(
+            self.endpoint,
+            data=payload.encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as resp:
+            resp.read()
+
+    def __str__(self) -> str:
+        return self.endpoint
+
+
+def _value(v: Any) -> dict[str, Any]:
+    if isinstance(v, bool):
+        return {"boolValue": v}
+    if isinstance(v, int):
+        return {"intValue": str(v)}
+    if isinstance(v, float):
+        return {"doubleValue": v}
+    return {"stringValue": str(v)}
+
+
+def _attr(key: str, v: Any) -> str:
+    return f'{{"key":{_quote(key)},"value":{json.dumps(_value(v), separators=(",", ":"))}}}'
+
+
+_quote = json.encoder.encode_basestring  # C 實作的 JSON 字串跳脫
+_name_cache: dict[str, str] = {}
+
+
+def _static(name: str) -> str:
+    """同名 span 共用的 JSON 片段（名稱、kind、tool / phase 屬性），快取避免重複組字串"""
+    cached = _name_cache.get(name)
+    if cached is None:
+        tool, _, phase = name.partition(".")
+        kind = _KIND_CLIENT if tool in _CLIENT_TOOLS and phase != "parse" else _KIND_INTERNAL
+        cached = _name_cache[name] = (
+            f'"name":{_quote(name)},"kind":{kind},'
+            f'"attributes":[{_attr("sysmon.tool", tool)},{_attr("sysmon.phase", phase)}'
+        )
+    return cached
+
+
+def _encode(span: tuple) -> str:
+    """
+    轉為 OTLP/JSON 的 span 物件。萬筆目標的執行會產生數萬個 span，這裡直接組 JSON 字串
+    （字串值以 C 實作跳脫），比建立巢狀 dict 再 json.dumps 快數倍。
+    """
+    trace_id, span_id, parent_id, name, start_ns, end_ns, attrs = span
+    error = attrs.get("error")
+    parts = [
+        f'{{"traceId":"{trace_id:032x}","spanId":"{span_id:016x}",',
+        f'"parentSpanId":"{parent_id:016x}",' if parent_id is not None else "",
+        f'"startTimeUnixNano":"{start_ns}","endTimeUnixNano":"{end_ns}",',
+        _static(name),
+        ',{"key":"sysmon.outcome","value":{"stringValue":"error"}}' if error
+        else ',{"key":"sysmon.outcome","value":{"stringValue":"ok"}}',
+    ]
+    for k, v in attrs.items():
+        if k == "error" or v is None:
+            continue
+        if isinstance(v, str):
+            parts.append(f',{{"key":"sysmon.{k}","value":{{"stringValue":{_quote(v)}}}}}')
+        else:
+            parts.append("," + _attr(f"sysmon.{k}", v))
+    if error:
+        parts.append(f'],"status":{{"code":{_STATUS_ERROR},"message":{_quote(str(error))}}}}}')
+    else:
+        parts.append(f'],"status":{{"code":{_STATUS_OK}}}}}')
+    return "".join(parts)
+
+
+def _envelope() -> tuple[str, str]:
+    """ExportTraceServiceRequest 中 spans 陣列前後的固定部分（resource 與 scope）"""
+    resource = {
+        "service.name": os.environ.get("OTEL_SERVICE_NAME", "sysmon"),
+        "service.version": __version__,
+        "host.name": socket.gethostname(),
+        "process.pid": os.getpid(),
+    }
+    attributes = ",".join(_attr(k, v) for k, v in resource.items())
+    head = (
+        f'{{"resourceSpans":[{{"resource":{{"attributes":[{attributes}]}},'
+        f'"scopeSpans":[{{"scope":{{"name":"sysmon.core","version":{_quote(__version__)}}},"spans":['
+    )
+    return head, "]}]}]}"
+
+
+class BatchSpanProcessor:
+    """收集 instrument 完成的 span，由背景執行緒依批次大小或時間間隔交給 exporter"""
+
+    def __init__(
+        self,
+        exporter: FileExporter | HttpExporter,
+        max_batch: int = MAX_BATCH,
+        interval: float = INTERVAL,
+        max_queue: int = MAX_QUEUE,
+    ):
+        self.exporter = exporter
+        self.max_batch = max_batch
+        self.interval = interval
+        self.max_queue = max_queue
+        self.exported = 0
+        self.dropped = 0
+        self.last_error: str | None = None
+        self._queue: collections.deque[tuple] = collections.deque()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._head, self._tail = _envelope()
+        self._thread = threading.Thread(target=self._run, name="sysmon-trace-export", daemon=True)
+        self._thread.start()
+
+    def add(self, span: tuple) -> None:
+        """探測執行緒呼叫：只做 deque.append（執行緒安全），不做任何編碼或 I/O"""
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            return
+        self._queue.append(span)
+        if len(self._queue) >= self.max_batch:
+            self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """立即匯出佇列中所有 span（每批最多 max_batch 筆）"""
+        with self._flush_lock:
+            while self._queue:
+                batch = []
+                while self._queue and len(batch) < self.max_batch:
+                    batch.append(self._queue.popleft())
+                payload = self._head + ",".join(map(_encode, batch)) + self._tail
+                try:
+                    self.exporter.export(payload)
+                    self.exported += len(batch)
+                except Exception as e:
+                    self.dropped += len(batch)
+                    self.last_error = str(e)
+
+    def shutdown(self) -> None:
+        """停止背景執行緒並寫出剩餘的 span"""
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+
+
+def parse_traceparent(value: str | None) -> tuple[int, int] | None:
+    """解析 W3C traceparent（00-<trace_id>-<span_id>-<flags>），格式不符回傳 None"""
+    parts = (value or "").strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        trace_id, span_id = int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    return (trace_id, span_id) if trace_id and span_id else None
+
+
+def start(target: str, **kwargs: Any) -> BatchSpanProcessor:
+    """
+    開始匯出：target 為 http(s):// 開頭時送往 collector，否則附加寫入該檔案。
+    回傳的 processor 已設為 instrument 的 tracer，結束時呼叫 stop()。
+    """
+    if target.startswith(("http://", "https://")):
+        exporter: FileExporter | HttpExporter = HttpExporter(target)
+    else:
+        exporter = FileExporter(target)
+    processor = BatchSpanProcessor(exporter, **kwargs)
+    instrument.set_tracer(processor, parse_traceparent(os.environ.get("TRACEPARENT")))
+    return processor
+
+
+def stop(processor: BatchSpanProcessor) -> None:
+    """停止匯出並寫出剩餘的 span"""
+    instrument.set_tracer(None)
+    processor.shutdown()
+
+
+_env_lock = threading.Lock()
+_env_processor: BatchSpanProcessor | None = None
+
+
+def start_from_env() -> BatchSpanProcessor | None:
+    """依環境變數 SYSMON_TRACE 開始匯出（每個行程只啟動一次；Streamlit 用）"""
+    global _env_processor
+    target = os.environ.get("SYSMON_TRACE")
+    if not target:
+        return None
+    with _env_lock:
+        if _env_processor is None:
+            import atexit
+
+            _env_processor = start(target)
+            atexit.register(stop, _env_processor)
+    return _env_processor
@@ -8,6 +8,8 @@ from typing import Any
 import httpx
 from html.parser import HTMLParser
 
+from sysmon.core.instrument import count, http_trace, span
+
 
 DEFAULT_UA = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -53,59 +55,71 @@ def _extract_title(html: str) -> str:
     return parser.title.strip()
 
 
-def check_website(url: str, user_agent: str = DEFAULT_UA, timeout: int = 15) -> dict[str, Any]:
-    """
-    檢測網站 HTTP 資訊：狀態碼、標頭、重定向鏈、回應時間、頁面標題
-    """
+def _normalize_url(url: str) -> str:
     if not url.startswith(("http://", "https://")):
         url = "https://" + url
+    return url
+
+
+def _build_result(url: str, resp: httpx.Response, elapsed_ms: float) -> dict[str, Any]:
+    """由最終回應（含 history）整理出檢測結果"""
+    # 重定向鏈
+    redirect_chain = [
+        {
+            "url": str(r.url),
+            "status_code": r.status_code,
+            "status_text": STATUS_DESCRIPTIONS.get(r.status_code, ""),
+        }
+        for r in resp.history
+    ]
+
+    # 最終回應
+    final_status = resp.status_code
+    content_type = resp.headers.get("content-type", "")
+    title = ""
+    if "text/html" in content_type:
+        title = _extract_title(resp.text)
+
+    return {
+        "url": str(resp.url),
+        "original_url": url,
+        "status_code": final_status,
+        "status_text": STATUS_DESCRIPTIONS.get(final_status, ""),
+        "response_time_ms": round(elapsed_ms, 2),
+        "headers": dict(resp.headers),
+        "redirect_chain": redirect_chain,
+        "title": title,
+        "content_type": content_type,
+        "content_length": len(resp.content),
+        "server": resp.headers.get("server", ""),
+    }
+
+
+def _error_result(url: str, e: Exception) -> dict[str, Any]:
+    if isinstance(e, httpx.ConnectError):
+        return {"url": url, "error": f"連線失敗：{e}"}
+    if isinstance(e, httpx.TimeoutException):
+        return {"url": url, "error": "連線超時"}
+    return {"url": url, "error": str(e)}
 
-    redirect_chain: list[dict[str, Any]] = []
-    headers = {"User-Agent": user_agent}
 
+def check_website(url: str, user_agent: str = DEFAULT_UA, timeout: int = 15) -> dict[str, Any]:
+    """
+    檢測網站 HTTP 資訊：狀態碼、標頭、重定向鏈、回應時間、頁面標題
+    """
+    url = _normalize_url(url)
     try:
         start = time.perf_counter()
         with httpx.Client(
-            headers=headers,
+            headers={"User-Agent": user_agent},
             follow_redirects=True,
             timeout=timeout,
             verify=False,
         ) as client:
-            resp = client.get(url)
+            resp = client.get(url, extensions=http_trace(target=url))
         elapsed_ms = (time.perf_counter() - start) * 1000
-
-        # 重定向鏈
-        for r in resp.history:
-            redirect_chain.append({
-                "url": str(r.url),
-                "status_code": r.status_code,
-                "status_text": STATUS_DESCRIPTIONS.get(r.status_code, ""),
-            })
-
-        # 最終回應
-        final_status = resp.status_code
-        response_headers = dict(resp.headers)
-        content_type = resp.headers.get("content-type", "")
-        title = ""
-        if "text/html" in content_type:
-            title = _extract_title(resp.text)
-
-        return {
-            "url": str(resp.url),
-            "original_url": url,
-            "status_code": final_status,
-            "status_text": STATUS_DESCRIPTIONS.get(final_status, ""),
-            "response_time_ms": round(elapsed_ms, 2),
-            "headers": response_headers,
-            "redirect_chain": redirect_chain,
-            "title": title,
-            "content_type": content_type,
-            "content_length": len(resp.content),
-            "server": resp.headers.get("server", ""),
-        }
-    except httpx.ConnectError as e:
-        return {"url": url, "error": f"連線失敗：{e}"}
-    except httpx.TimeoutException:
-        return {"url": url, "error": "連線超時"}
+        count("http.redirects", len(resp.history))
+        with span("http.parse", target=url):
+            return _build_result(url, resp, elapsed_ms)
     except Exception as e:
-        return {"url": url, "error": str(e)}
+        return _error_result(url, e)
@@ -8,6 +8,8 @@ from typing import Any
 import whois
 from ipwhois import IPWhois
 
+from sysmon.core.instrument import span
+
 
 def _is_ip(target: str) -> bool:
     try:
@@ -20,7 +22,8 @@ def _is_ip(target: str) -> bool:
 def query_domain_whois(domain: str) -> dict[str, Any]:
     """查詢域名 WHOIS"""
     try:
-        w = whois.whois(domain)
+        with span("whois.query", target=domain):
+            w = whois.whois(domain)
         result: dict[str, Any] = {
             "type": "domain",
             "domain": domain,
@@ -53,8 +56,8 @@ def query_domain_whois(domain: str) -> dict[str, Any]:
 def query_ip_whois(ip: str) -> dict[str, Any]:
     """查詢 IP WHOIS（使用 ipwhois）"""
     try:
-        obj = IPWhois(ip)
-        res = obj.lookup_rdap(depth=1)
+        with span("whois.rdap", target=ip):
+            res = IPWhois(ip).lookup_rdap(depth=1)
         network = res.get("network", {})
         return {
             "type": "ip",
@@ -0,0 +1,97 @@
+"""CLI 機器可讀輸出（JSON / NDJSON / CSV），僅使用標準函式庫以維持啟動速度"""
+
+from __future__ import annotations
+
+import csv
+import json
+import sys
+from datetime import date, datetime
+from enum import Enum
+from typing import IO, Any, Iterable
+
+
+class OutputFormat(str, Enum):
+    table = "table"
+    json = "json"
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    # NumPy 純量 / 陣列
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+
+def dumps(value: Any, indent: int | None = None) -> str:
+    return json.dumps(value, ensure_ascii=False, default=_default, indent=indent)
+
+
+def flatten(record: dict[str, Any], prefix: str = "") -> dict[str, Any]:
+    """巢狀 dict 攤平為 a.b.c 欄位；list 以 JSON 字串保存（CSV 用）"""
+    flat: dict[str, Any] = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (list, tuple)):
+            flat[name] = dumps(value)
+        else:
+            flat[name] = "" if value is None else value
+    return flat
+
+
+class RecordWriter:
+    """
+    逐筆寫出紀錄：ndjson / csv 每筆立即寫出並 flush，可用於串流；
+    json 先收集，close() 時輸出單一陣列。
+    CSV 欄位以第一筆紀錄為準，之後新增的欄位會被忽略。
+    """
+
+    def __init__(self, fmt: OutputFormat, stream: IO[str] | None = None):
+        self.fmt = fmt
+        self.stream = stream or sys.stdout
+        self._buffer: list[dict[str, Any]] = []
+        self._csv: csv.DictWriter | None = None
+        self.count = 0
+
+    def write(self, record: dict[str, Any]) -> None:
+        self.count += 1
+        if self.fmt == OutputFormat.ndjson:
+            self.stream.write(dumps(record) + "\n")
+            self.stream.flush()
+        elif self.fmt == OutputFormat.csv:
+            row = flatten(record)
+            if self._csv is None:
+                self._csv = csv.DictWriter(self.stream, fieldnames=list(row), extrasaction="ignore")
+                self._csv.writeheader()
+            self._csv.writerow(row)
+            self.stream.flush()
+        else:
+            self._buffer.append(record)
+
+    def write_all(self, records: Iterable[dict[str, Any]]) -> None:
+        for record in records:
+            self.write(record)
+
+    def close(self) -> None:
+        if self.fmt == OutputFormat.json:
+            self.stream.write(dumps(self._buffer, indent=2) + "\n")
+
+
+def emit(fmt: OutputFormat, document: Any, rows: Iterable[dict[str, Any]] | None = None) -> None:
+    """
+    輸出單一結果：json 輸出完整 document；ndjson / csv 輸出 rows
+    （未提供時以 document 本身作為一筆）。
+    """
+    if fmt == OutputFormat.json:
+        sys.stdout.write(dumps(document, indent=2) + "\n")
+        return
+    writer = RecordWriter(fmt)
+    writer.write_all(rows if rows is not None else [document])
+    writer.close()
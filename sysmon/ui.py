@@ -0,0 +1,270 @@
+"""
+Streamlit 頁面共用元件：跨 session 的查詢結果快取、「快取於」提示與強制重新查詢
+
+快取實例來自 sysmon.core.cache.tool_cache，存在於伺服器行程中，所有瀏覽器 session 共享；
+每個工具各自有項目數上限（LRU），TTL 依資料變動頻率設定（見 TOOL_TTLS）。
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Hashable
+
+import streamlit as st
+
+from sysmon.core.cache import CacheEntry, cached_call, tool_cache
+
+# DNS 依記錄 TTL 快取，但限制在此範圍內（秒）
+DNS_TTL_BOUNDS = (30, 3600)
+
+
+def normalize_target(value: str) -> str:
+    """快取鍵用的目標正規化：去除空白、協定、路徑與結尾的點，轉小寫"""
+    value = value.strip().removeprefix("https://").removeprefix("http://").split("/")[0]
+    return value.rstrip(".").lower()
+
+
+def dns_ttl(result: dict[str, Any]) -> float | None:
+    """單一查詢結果取記錄 TTL；多類型結果（query_all_types）取最小值"""
+    if "records" in result:
+        ttls = [result.get("ttl")]
+    else:
+        ttls = [r.get("ttl") for r in result.values() if isinstance(r, dict)]
+    ttls = [t for t in ttls if t is not None]
+    if not ttls:
+        return None
+    low, high = DNS_TTL_BOUNDS
+    return float(min(max(min(ttls), low), high))
+
+
+_TTL_OF: dict[str, Callable[[Any], float | None]] = {"dns": dns_ttl}
+
+
+def remember(state_key: str, query: Any, submitted: bool) -> Any:
+    """
+    按下查詢時記住查詢參數並回傳；之後因其他元件互動而重新執行時，沿用上次的查詢，
+    結果由快取提供而不會重新發出請求。
+    """
+    if submitted:
+        st.session_state[state_key] = query
+    return st.session_state.get(state_key)
+
+
+def _refresh_flag(state_key: str) -> str:
+    return f"{state_key}__refresh"
+
+
+def refresh_requested(state_key: str) -> bool:
+    """該 state_key 的「重新查詢」按鈕是否剛被按下（讀取後即清除）"""
+    return st.session_state.pop(_refresh_flag(state_key), False)
+
+
+def cached_query(
+    state_key: str,
+    tool: str,
+    key: Hashable,
+    fn: Callable[[], Any],
+    spinner: str = "查詢中...",
+) -> tuple[Any, CacheEntry]:
+    """
+    以 tool 的共用快取執行 fn()；該 state_key 的「重新查詢」按鈕被按下時略過快取。
+    只有實際查詢時才顯示 spinner。
+    """
+    refresh = refresh_requested(state_key)
+
+    def run() -> Any:
+        with st.spinner(spinner):
+            return fn()
+
+    value, entry, _ = cached_call(tool_cache(tool), key, run, refresh=refresh, ttl_of=_TTL_OF.get(tool))
+    return value, entry
+
+
+def _fmt_duration(seconds: float) -> str:
+    seconds = max(0, int(seconds))
+    if seconds < 60:
+        return f"{seconds} 秒"
+    if seconds < 3600:
+        return f"{seconds // 60} 分鐘"
+    if seconds < 86400:
+        return f"{seconds / 3600:.1f} 小時"
+    return f"{seconds / 86400:.1f} 天"
+
+
+def cache_status(state_key: str, entry: CacheEntry | None) -> None:
+    """顯示「快取於」時間與剩餘有效時間，並提供強制重新查詢按鈕"""
+    if entry is None:
+        return
+    now = time.time()
+    age = now - entry.stored_at
+    stored = time.strftime("%H:%M:%S", time.localtime(entry.stored_at))
+    when = "剛查詢" if age < 2 else f"快取於 {stored}（{_fmt_duration(age)}前）"
+    kind = "失敗結果" if entry.negative else "結果"
+    col1, col2 = st.columns([5, 1])
+    col1.caption(f"🕒 {when} · {kind}保留 {_fmt_duration(entry.expires_at - now)}")
+    col2.button(
+        "🔄 重新查詢",
+        key=f"{state_key}__refresh_btn",
+        on_click=st.session_state.__setitem__,
+        args=(_refresh_flag(state_key), True),
+        use_container_width=True,
+    )
+
+
+# ── 背景工作 ───────────────────────────────────────────────────────────────────
+def _session_id() -> str | None:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+
+def start_task(state_key: str, name: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> str:
+    """
+    送出背景工作 fn(task, *args, **kwargs) 並把工作 ID 存入 session_state[state_key]；
+    同一 state_key 尚未完成的舊工作會先取消。
+    """
+    from sysmon.core.task_manager import get_task_manager
+
+    manager = get_task_manager()
+    old = st.session_state.get(state_key)
+    if old:
+        manager.cancel(old)
+    task_id = manager.submit(name, fn, *args, owner=_session_id(), **kwargs)
+    st.session_state[state_key] = task_id
+    return task_id
+
+
+def task_progress(
+    state_key: str,
+    render_partial: Callable[[list[Any]], None] | None = None,
+    interval: float = 1.0,
+) -> dict[str, Any] | None:
+    """
+    顯示 session_state[state_key] 背景工作的狀態。
+
+    執行中：以 fragment 每 interval 秒只重繪進度區（不重跑整個頁面），
+    顯示進度條、取消按鈕與 render_partial(部分結果)；完成時觸發一次整頁重跑。
+    已結束：回傳工作快照（status / result / partial / error ...）；沒有工作時回傳 None。
+    """
+    from sysmon.core.task_manager import ACTIVE, CANCELLED, FAILED, get_task_manager
+
+    task_id = st.session_state.get(state_key)
+    if not task_id:
+        return None
+    manager = get_task_manager()
+    task = manager.get(task_id)
+    if task is None:  # 已過保留期限被清除
+        st.session_state.pop(state_key, None)
+        return None
+
+    snap = task.snapshot()
+    if snap["status"] not in ACTIVE:
+        if snap["status"] == CANCELLED:
+            st.warning(f"已取消「{snap['name']}」（完成 {snap['done']:,} 項）")
+        elif snap["status"] == FAILED:
+            st.error(f"「{snap['name']}」執行失敗：{snap['error']}")
+        return snap
+
+    @st.fragment(run_every=interval)
+    def poll() -> None:
+        s = task.snapshot()
+        if s["status"] not in ACTIVE:
+            st.rerun()
+        total = s["total"]
+        label = f"⏳ {s['name']}：{s['done']:,}" + (f" / {total:,}" if total else "") + f" · {s['elapsed_s']:.0f} 秒"
+        if s["status"] == "pending":
+            label = f"⏳ {s['name']}：排隊中..."
+        col1, col2 = st.columns([5, 1])
+        with col1:
+            st.progress(min(s["done"] / total, 1.0) if total else 0.0, text=label)
+        col2.button(
+            "⏹️ 取消", key=f"{state_key}__cancel", on_click=manager.cancel, args=(task_id,),
+            use_container_width=True,
+        )
+        if render_partial is not None and s["partial"]:
+            render_partial(s["partial"])
+
+    poll()
+    return None
+
+
+def cached_bulk(
+    task: Any,
+    tool: str,
+    keys: list[Hashable],
+    fn: Callable[[Hashable], Any],
+    max_workers: int = 8,
+    refresh: bool = False,
+) -> dict[str, Any]:
+    """
+    背景工作用的批次查詢：每個鍵各自經過 tool 的共用快取，未命中者以 max_workers 並發查詢。
+    每完成一筆即附加為部分結果；取消後不再開始新的查詢。
+
+    Returns:
+        {"results": 依 keys 順序的結果, "cached": 命中筆數, "oldest": 最早的快取時間}
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    cache = tool_cache(tool)
+    ttl_of = _TTL_OF.get(tool)
+    task.progress(0, len(keys))
+
+    def one(key: Hashable) -> tuple[Any, CacheEntry, bool] | None:
+        if task.cancelled:
+            return None
+        out = cached_call(cache, key, lambda: fn(key), refresh=refresh, ttl_of=ttl_of)
+        task.add_partial(out[0])
+        return out
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        done = [r for r in pool.map(one, keys) if r is not None]
+    return {
+        "results": [r[0] for r in done],
+        "cached": sum(r[2] for r in done),
+        "oldest": min((r[1].stored_at for r in done), default=None),
+    }
+
+
+def bulk_status(summary: dict[str, Any], on_refresh: Callable[[], None], key: str) -> None:
+    """批次結果的快取提示與重新查詢按鈕"""
+    total = len(summary["results"])
+    col1, col2 = st.columns([5, 1])
+    if summary["cached"]:
+        oldest = time.strftime("%H:%M:%S", time.localtime(summary["oldest"]))
+        col1.caption(f"🕒 {summary['cached']:,} / {total:,} 筆來自快取（最早快取於 {oldest}）")
+    else:
+        col1.caption(f"🕒 {total:,} 筆皆為剛查詢")
+    col2.button("🔄 重新查詢", key=key, on_click=on_refresh, use_container_width=True)
+
+
+# ── 除錯面板 ───────────────────────────────────────────────────────────────────
+def debug_panel() -> None:
+    """
+    側邊欄效能除錯面板：開啟後記錄 sysmon.core.instrument 的各階段耗時與計數器。
+    記錄為伺服器行程內所有 session 合計，開關也是全域的；面板在頁面之前繪製，顯示至上一次重跑為止的記錄。
+    """
+    from sysmon.core import instrument
+
+    with st.expander("🐞 效能除錯", expanded=instrument.enabled()):
+        on = st.toggle("記錄各階段耗時", value=instrument.enabled(), key="debug_profile")
+        if on != instrument.enabled():
+            instrument.enable(on)
+        if not on:
+            st.caption("開啟後顯示 DNS / 連線 / TLS / HTTP / WHOIS 各階段與頁面執行的耗時（所有使用者合計）")
+            return
+
+        snap = instrument.snapshot()
+        if snap["spans"]:
+            import pandas as pd
+
+            df = pd.DataFrame([
+                {"階段": name, "次數": s["count"], "平均 ms": s["mean_ms"], "最大 ms": s["max_ms"], "失敗": s["errors"]}
+                for name, s in snap["spans"].items()
+            ])
+            st.dataframe(df, use_container_width=True, hide_index=True)
+        else:
+            st.caption("尚無記錄，執行任一查詢後顯示")
+        for name, value in snap["counters"].items():
+            st.caption(f"{name}：{value:,}")
+        st.button("🧹 清除記錄", key="debug_reset", on_click=instrument.reset, use_container_width=True)
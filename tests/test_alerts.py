@@ -0,0 +1,120 @@
+"""告警引擎：SlidingWindow 增量彙總與逐次重算的結果對照"""
+
+from __future__ import annotations
+
+import math
+import random
+
+import pytest
+
+from sysmon.core.alerts import (
+    AlertEngine, Rule, SlidingWindow, Sink, StdoutSink, _probe_address, load_config, parse_duration,
+)
+
+AGGS = ("last", "avg", "min", "max", "count", "p50", "p90", "p99")
+
+
+def _brute(samples: list[tuple[float, float]], now: float, span: float, agg: str) -> float | None:
+    window = [v for ts, v in samples if ts >= now - span]
+    if not window:
+        return None
+    if agg == "last":
+        return window[-1]
+    if agg == "avg":
+        return sum(window) / len(window)
+    if agg == "min":
+        return min(window)
+    if agg == "max":
+        return max(window)
+    if agg == "count":
+        return float(len(window))
+    ordered = sorted(window)
+    rank = max(math.ceil(float(agg[1:]) / 100 * len(ordered)), 1)  # nearest-rank
+    return ordered[rank - 1]
+
+
+@pytest.mark.parametrize("span", [0.0, 1.0, 7.5, 60.0])
+@pytest.mark.parametrize("seed", [0, 1])
+def test_sliding_window_matches_brute_force(span, seed):
+    rng = random.Random(seed)
+    window = SlidingWindow(span, need_sorted=True)
+    samples: list[tuple[float, float]] = []
+    ts = 0.0
+    for _ in range(500):
+        ts += rng.choice([0.0, 0.25, 0.5, 1.0, 3.0])  # 含相同時間戳
+        value = float(rng.randint(-20, 20))  # 含重複值，考驗單調佇列與排序串列的刪除
+        window.add(ts, value)
+        samples.append((ts, value))
+        for agg in AGGS:
+            assert window.aggregate(agg) == pytest.approx(_brute(samples, ts, span, agg)), (agg, ts)
+        assert len(window) == sum(1 for t, _ in samples if t >= ts - span)
+
+
+def test_empty_window():
+    assert SlidingWindow(10).aggregate("avg") is None
+
+
+@pytest.mark.parametrize("text,seconds", [("30s", 30), ("5m", 300), ("1h", 3600), ("1d", 86400), ("250ms", 0.25), (90, 90)])
+def test_parse_duration(text, seconds):
+    assert parse_duration(text) == seconds
+
+
+def test_parse_duration_invalid():
+    with pytest.raises(ValueError):
+        parse_duration("5 minutes")
+
+
+def _config(tmp_path, probe: str) -> str:
+    path = tmp_path / "alerts.toml"
+    path.write_text(
+        '[[rule]]\nname = "cpu"\nmetric = "cpu_usage_percent"\nop = ">"\nthreshold = 90\n\n' + probe,
+        encoding="utf-8",
+    )
+    return str(path)
+
+
+@pytest.mark.parametrize("probe", [
+    '[[probe]]\ntype = "ports"\ntarget = "10.0.0.5"\n',
+    '[[probe]]\ntype = "ports"\ntarget = "10.0.0.5:ssh"\n',
+    '[[probe]]\ntype = "ports"\ntarget = "10.0.0.5:22,99999"\n',
+    '[[probe]]\ntype = "ports"\ntarget = ":22"\n',
+    '[[probe]]\ntype = "ssl"\ntarget = "example.com:https"\n',
+    '[[probe]]\ntype = "dns"\ntarget = "example.com"\ninterval = "often"\n',
+])
+def test_load_config_rejects_bad_probe(tmp_path, probe):
+    with pytest.raises(ValueError):
+        load_config(_config(tmp_path, probe))
+
+
+def test_load_config_probe_targets(tmp_path):
+    config = load_config(_config(
+        tmp_path,
+        '[[probe]]\ntype = "ports"\ntarget = "10.0.0.5:22, 80"\n\n'
+        '[[probe]]\ntype = "ssl"\ntarget = "example.com"\n',
+    ))
+    assert [_probe_address(p) for p in config.probes] == [("10.0.0.5", [22, 80]), ("example.com", [443])]
+    assert isinstance(config.sinks[0], StdoutSink)
+
+
+def test_sink_is_abstract():
+    with pytest.raises(TypeError):
+        Sink()
+
+
+def _rule(message: str) -> Rule:
+    return Rule.from_dict({"name": "disk", "metric": "disk_percent", "op": ">", "threshold": 90, "message": message})
+
+
+def test_message_with_missing_label_still_fires():
+    engine = AlertEngine([_rule("{mount} at {value:.0f}%")])
+    events = engine.observe("disk_percent", {"device": "/dev/sda1"}, 95, ts=1)
+    assert [e["message"] for e in events] == ["{mount} at 95%"]
+    assert engine.firing() == [("disk", {"device": "/dev/sda1"})]
+    assert [e["status"] for e in engine.observe("disk_percent", {"device": "/dev/sda1"}, 50, ts=2)] == ["resolved"]
+    assert len(engine.observe("disk_percent", {"device": "/dev/sda1"}, 95, ts=3)) == 1
+
+
+@pytest.mark.parametrize("message", ["{value:.0f", "{0}", "{labels.device}", "{device:.0f}", "{value:d}"])
+def test_rule_rejects_bad_message_template(message):
+    with pytest.raises(ValueError):
+        _rule(message)
@@ -0,0 +1,52 @@
+"""audit：並行的兩條分支共用同一組並發配額"""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from sysmon.core import probe
+from sysmon.core.audit import audit
+from sysmon.core.probe import Probe, ProbeRunner
+
+
+@pytest.fixture
+def in_flight(monkeypatch) -> dict[str, int]:
+    """以假的探測取代網路存取，記錄同時進行的最大數量"""
+    state = {"now": 0, "max": 0}
+
+    async def fake(p: Probe, ctx) -> dict:
+        state["now"] += 1
+        state["max"] = max(state["max"], state["now"])
+        await asyncio.sleep(0.01)
+        state["now"] -= 1
+        if p.kind == "dns":
+            records = ["192.0.2.1"] if p.params["record_type"] == "A" else []
+            return {"type": p.params["record_type"], "records": records}
+        return {"status": "closed"} if p.kind == "tcp" else {}
+
+    for kind in probe.PROBES:
+        monkeypatch.setitem(probe.PROBES, kind, fake)
+    return state
+
+
+def test_audit_respects_concurrency_across_branches(in_flight):
+    report = audit("example.com", ports=range(1, 21), concurrency=3, per_host=3)
+    assert in_flight["max"] == 3
+    assert report["addresses"] == ["192.0.2.1"]
+    assert len(report["ports"]["192.0.2.1"]["results"]) == 20
+
+
+def test_runner_shares_limit_between_concurrent_runs(in_flight):
+    runner = ProbeRunner(concurrency=4, per_host=4)
+    batch = [Probe("tcp", f"192.0.2.{i}", 80) for i in range(1, 11)]
+
+    async def main():
+        return await asyncio.gather(runner.run_async(batch), runner.run_async(batch))
+
+    first, second = asyncio.run(main())
+    assert in_flight["max"] == 4
+    assert [r["target"] for r in first] == [r["target"] for r in second] == [p.label for p in batch]
+    # 進行中的呼叫都結束後，runner 可在新的事件迴圈中再次使用
+    assert len(runner.run(batch[:2])) == 2
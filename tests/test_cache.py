@@ -0,0 +1,51 @@
+"""tool_cache 的設定一致性，以及 query_ip 在無法偵測公網 IP 時不查詢、不快取"""
+
+from __future__ import annotations
+
+import pytest
+
+from sysmon.core import cache, ip_info
+
+
+@pytest.fixture
+def fresh_caches(monkeypatch):
+    monkeypatch.setattr(cache, "_TOOL_CACHES", {})
+    monkeypatch.setitem(cache.TOOL_OPTIONS, "demo", {"maxsize": 8})
+
+
+def test_tool_cache_defaults_from_options(fresh_caches):
+    first = cache.tool_cache("demo")
+    assert (first.maxsize, first.persistent) == (8, False)
+    assert cache.tool_cache("demo") is first
+    assert cache.tool_cache("demo", maxsize=8, persistent=False) is first
+    assert cache.tool_cache("other").maxsize == 256
+
+
+@pytest.mark.parametrize("kwargs", [{"maxsize": 16}, {"persistent": True}])
+def test_tool_cache_rejects_conflicting_settings(fresh_caches, kwargs):
+    cache.tool_cache("demo")
+    with pytest.raises(ValueError):
+        cache.tool_cache("demo", **kwargs)
+
+
+def test_query_ip_without_public_ip(monkeypatch):
+    store = cache.TTLCache("ip_info")
+    monkeypatch.setattr(ip_info, "_IP_CACHE", store)
+    monkeypatch.setattr(ip_info, "_detect_public_ip", lambda: None)
+
+    def provider(*args):
+        raise AssertionError("不應查詢")
+
+    monkeypatch.setattr(ip_info, "_query_provider", provider)
+    assert "error" in ip_info.query_ip()
+    assert len(store) == 0
+
+
+def test_query_ip_caches_detected_ip(monkeypatch):
+    store = cache.TTLCache("ip_info")
+    monkeypatch.setattr(ip_info, "_IP_CACHE", store)
+    monkeypatch.setattr(ip_info, "_detect_public_ip", lambda: "192.0.2.7")
+    monkeypatch.setattr(ip_info, "_query_provider", lambda ip, token: {"query": ip})
+    assert ip_info.query_ip() == {"query": "192.0.2.7"}
+    assert ip_info.query_ip() == {"query": "192.0.2.7", "_cached": True}
+    assert store.get(("192.0.2.7", "ip-api.com")) is not None
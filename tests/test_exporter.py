@@ -0,0 +1,46 @@
+"""Prometheus 文字格式輸出"""
+
+from __future__ import annotations
+
+import math
+
+from sysmon.core.exporter import Metric, render
+
+
+def test_render_families_labels_and_values():
+    text = render([
+        Metric("sysmon_port_open", "Port open (1) or closed (0)").add(True, host="a", port="22"),
+        Metric("sysmon_cpu_usage_percent", "CPU usage").add(12.5),
+        Metric("sysmon_port_open", "Port open (1) or closed (0)").add(False, host="b", port="80"),
+        Metric("sysmon_bytes_total", "Bytes", "counter").add(3),
+    ])
+    assert text == (
+        "# HELP sysmon_port_open Port open (1) or closed (0)\n"
+        "# TYPE sysmon_port_open gauge\n"
+        'sysmon_port_open{host="a",port="22"} 1\n'
+        'sysmon_port_open{host="b",port="80"} 0\n'
+        "# HELP sysmon_cpu_usage_percent CPU usage\n"
+        "# TYPE sysmon_cpu_usage_percent gauge\n"
+        "sysmon_cpu_usage_percent 12.5\n"
+        "# HELP sysmon_bytes_total Bytes\n"
+        "# TYPE sysmon_bytes_total counter\n"
+        "sysmon_bytes_total 3\n"
+    )
+
+
+def test_render_escapes_label_values():
+    text = render([Metric("m", "h").add(1, url='http://x/"q"\\path\nnext')])
+    assert 'm{url="http://x/\\"q\\"\\\\path\\nnext"} 1\n' in text
+
+
+def test_render_special_floats():
+    text = render([Metric("m", "h").add(math.nan, k="nan").add(math.inf, k="pos").add(-math.inf, k="neg")])
+    assert 'm{k="nan"} NaN' in text
+    assert 'm{k="pos"} +Inf' in text
+    assert 'm{k="neg"} -Inf' in text
+
+
+def test_render_does_not_mutate_inputs():
+    a = Metric("m", "h").add(1)
+    render([a, Metric("m", "h").add(2)])
+    assert a.samples == [({}, 1)]
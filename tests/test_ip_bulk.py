@@ -0,0 +1,123 @@
+"""ip_bulk 向量化集合運算：以 ipaddress 逐一計算的結果作為對照"""
+
+from __future__ import annotations
+
+import ipaddress
+import random
+from collections import Counter
+
+import pytest
+
+from sysmon.core import ip_bulk
+
+# 小範圍宇集，讓前綴之間大量重疊 / 相鄰，且能逐一列舉位址
+UNIVERSES = {4: ipaddress.ip_network("10.0.0.0/22"), 6: ipaddress.ip_network("2001:db8::/118")}
+
+
+def _random_prefixes(rng: random.Random, version: int, n: int) -> list[str]:
+    universe = UNIVERSES[version]
+    out = []
+    for _ in range(n):
+        plen = rng.randint(universe.prefixlen, universe.max_prefixlen)
+        addr = universe.network_address + rng.randrange(universe.num_addresses)
+        out.append(str(ipaddress.ip_network(f"{addr}/{plen}", strict=False)))
+    return out
+
+
+def _covered(prefixes: list[str]) -> set[int]:
+    covered: set[int] = set()
+    for p in prefixes:
+        net = ipaddress.ip_network(p)
+        covered.update(range(int(net.network_address), int(net.broadcast_address) + 1))
+    return covered
+
+
+@pytest.fixture(params=[(4, 0), (4, 1), (6, 2), (6, 3)], ids=["v4-a", "v4-b", "v6-a", "v6-b"])
+def case(request) -> tuple[random.Random, int]:
+    version, seed = request.param
+    return random.Random(seed), version
+
+
+def test_collapse_matches_ipaddress(case):
+    rng, version = case
+    prefixes = _random_prefixes(rng, version, 60)
+    expected = [str(n) for n in ipaddress.collapse_addresses(ipaddress.ip_network(p) for p in prefixes)]
+    assert ip_bulk.collapse_prefixes(prefixes)["prefixes"] == expected
+
+
+def test_collapse_mixed_families_and_invalid():
+    result = ip_bulk.collapse_prefixes(["10.0.0.0/25", "2001:db8::/33", "10.0.0.128/25", "bad", "2001:db8:8000::/33"])
+    assert result["prefixes"] == ["10.0.0.0/24", "2001:db8::/32"]
+    assert result["invalid"] == ["bad"]
+
+
+def test_collapse_full_address_space():
+    assert ip_bulk.collapse_prefixes(["0.0.0.0/1", "128.0.0.0/1"])["prefixes"] == ["0.0.0.0/0"]
+    assert ip_bulk.collapse_prefixes(["::/1", "8000::/1"])["prefixes"] == ["::/0"]
+
+
+def test_match_is_longest_prefix(case):
+    rng, version = case
+    prefixes = list(dict.fromkeys(_random_prefixes(rng, version, 40)))
+    nets = [ipaddress.ip_network(p) for p in prefixes]
+    universe = UNIVERSES[version]
+    ips = [str(universe.network_address + rng.randrange(universe.num_addresses)) for _ in range(300)]
+    ips += ["not-an-ip", "192.0.2.1" if version == 6 else "2001:db8:ffff::1"]
+
+    result = ip_bulk.match_addresses(ips, prefixes)
+    for ip, idx in zip(ips, result["match"]):
+        try:
+            addr = ipaddress.ip_address(ip)
+        except ValueError:
+            assert idx == -1
+            continue
+        containing = [n for n in nets if n.version == addr.version and addr in n]
+        if not containing:
+            assert idx == -1, ip
+        else:
+            assert nets[idx] == max(containing, key=lambda n: n.prefixlen), ip
+    assert result["matched"] == int((result["match"] >= 0).sum())
+    assert result["invalid_ips"] == ["not-an-ip"]
+
+
+def test_subtract_matches_brute_force(case):
+    rng, version = case
+    prefixes = _random_prefixes(rng, version, 20)
+    remove = _random_prefixes(rng, version, 20)
+    result = ip_bulk.subtract_prefixes(prefixes, remove)["prefixes"]
+    assert _covered(result) == _covered(prefixes) - _covered(remove)
+    # 結果已是最少數量的前綴
+    nets = [ipaddress.ip_network(p) for p in result]
+    assert [str(n) for n in ipaddress.collapse_addresses(nets)] == result
+
+
+def test_subtract_everything_and_nothing():
+    assert ip_bulk.subtract_prefixes(["10.0.0.0/24"], ["10.0.0.0/8"])["prefixes"] == []
+    assert ip_bulk.subtract_prefixes(["10.0.0.0/24"], [])["prefixes"] == ["10.0.0.0/24"]
+    assert ip_bulk.subtract_prefixes(["::/0"], ["::/1"])["prefixes"] == ["8000::/1"]
+
+
+def test_overlaps_match_brute_force(case):
+    rng, version = case
+    prefixes = _random_prefixes(rng, version, 50)
+    prefixes += rng.sample(prefixes, 5)  # 加入完全重複的項目
+    nets = [ipaddress.ip_network(p) for p in prefixes]
+
+    expected: Counter[str] = Counter()
+    for i, net in enumerate(nets):
+        duplicate = net in nets[:i]
+        supernet = any(o.prefixlen < net.prefixlen and net.subnet_of(o) for o in nets)
+        if duplicate or supernet:
+            expected[prefixes[i]] += 1
+
+    overlaps = ip_bulk.find_overlaps(prefixes)["overlaps"]
+    assert Counter(o["prefix"] for o in overlaps) == expected
+    for o in overlaps:
+        net, container = ipaddress.ip_network(o["prefix"]), ipaddress.ip_network(o["contained_in"])
+        if o["kind"] == "duplicate":
+            assert net == container
+        else:
+            # 回報最小（最長前綴）的包含者
+            smallest = max((n for n in nets if n.prefixlen < net.prefixlen and net.subnet_of(n)),
+                           key=lambda n: n.prefixlen)
+            assert container == smallest
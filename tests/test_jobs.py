@@ -0,0 +1,99 @@
+"""JobRunner：結果檔即檢查點，中斷後重新執行只補做未完成的檢查"""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from sysmon.core import jobs
+from sysmon.core.jobs import Job, JobFile, JobRunner
+
+
+@pytest.fixture
+def calls(monkeypatch) -> list[tuple[str, str]]:
+    """以假的 run_check 取代網路檢查，記錄每次呼叫"""
+    calls: list[tuple[str, str]] = []
+
+    def fake(check, target, job, timeout):
+        calls.append((check, target))
+        return {"error": "boom"} if target.startswith("10.0.0.3") else {"target": target}
+
+    monkeypatch.setattr(jobs, "run_check", fake)
+    return calls
+
+
+def _job_file() -> JobFile:
+    return JobFile(jobs=[
+        Job(name="lan", checks=["tcp"], targets={"hosts": [f"10.0.0.{i}:22" for i in range(1, 9)]}),
+        Job(name="dns/zone", checks=["dns"], targets={"domains": ["a.example", "b.example"]}, dns_types=["A", "MX"]),
+    ], concurrency=1)
+
+
+def _records(path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_resume_after_interrupt(tmp_path, calls):
+    first = JobRunner(_job_file(), tmp_path, concurrency=1)
+    first.on_result = lambda record: first.stop() if len(calls) >= 3 else None
+    summary = first.run()
+    assert summary.interrupted
+    assert summary.total == 12
+    assert 3 <= summary.completed < summary.total
+
+    # 模擬中斷時寫到一半的最後一行
+    lan = tmp_path / "lan.ndjson"
+    with open(lan, "a", encoding="utf-8") as f:
+        f.write('{"job": "lan", "check": "tcp", "tar')
+
+    done_before = len(calls)
+    second = JobRunner(_job_file(), tmp_path).run()
+    assert not second.interrupted
+    assert second.skipped == summary.completed
+    assert second.completed == summary.total - summary.completed
+    assert len(calls) == summary.total and len(set(calls)) == summary.total
+    assert len(calls) - done_before == second.completed
+
+    lan_records = _records(lan)
+    assert sorted(r["target"] for r in lan_records) == sorted(f"10.0.0.{i}:22" for i in range(1, 9))
+    assert [r["ok"] for r in lan_records if r["target"] == "10.0.0.3:22"] == [False]
+    zone = _records(tmp_path / "dns_zone.ndjson")
+    assert sorted(r["target"] for r in zone) == ["a.example A", "a.example MX", "b.example A", "b.example MX"]
+
+    # 全部完成後再執行不會重做任何檢查
+    third = JobRunner(_job_file(), tmp_path).run()
+    assert third.skipped == third.total and third.completed == 0
+    assert len(calls) == summary.total
+
+
+def test_no_resume_rewrites(tmp_path, calls):
+    JobRunner(_job_file(), tmp_path).run()
+    summary = JobRunner(_job_file(), tmp_path, resume=False).run()
+    assert summary.skipped == 0 and summary.completed == summary.total
+    assert len(_records(tmp_path / "lan.ndjson")) == 8
+
+
+def test_cidr_targets_expand_lazily():
+    job = Job(name="net", checks=["ip"], targets={"cidrs": ["192.168.1.0/30", "10.0.0.1/32"]})
+    assert job.count() == 3
+    assert list(job.tasks()) == [("ip", "192.168.1.1"), ("ip", "192.168.1.2"), ("ip", "10.0.0.1")]
+
+
+def test_retry_failed(tmp_path, calls):
+    JobRunner(_job_file(), tmp_path).run()
+    assert JobRunner(_job_file(), tmp_path).run().completed == 0
+
+    calls.clear()
+    retried = JobRunner(_job_file(), tmp_path, retry_failed=True).run()
+    assert calls == [("tcp", "10.0.0.3:22")]
+    assert retried.completed == retried.failed == 1
+    assert [r["ok"] for r in _records(tmp_path / "lan.ndjson") if r["target"] == "10.0.0.3:22"] == [False, False]
+
+
+def test_torn_tail_truncated_across_chunks(tmp_path):
+    path = tmp_path / "big.ndjson"
+    complete = '{"check": "dns", "target": "a.example A", "ok": true}\n'
+    path.write_text(complete + '{"check": "dns", "target": "b' + "x" * 200_000, encoding="utf-8")
+    assert jobs._load_done(path) == {("dns", "a.example A")}
+    assert path.read_text(encoding="utf-8") == complete
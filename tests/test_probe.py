@@ -0,0 +1,51 @@
+"""ProbeRunner：取消只影響進行中的執行；ok 依各類結果的狀態欄位判定"""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from sysmon.core import probe
+from sysmon.core.probe import Probe, ProbeRunner
+
+
+@pytest.fixture
+def payloads(monkeypatch) -> dict[str, dict]:
+    """以假的探測取代網路存取，回傳 target -> payload 的對照表"""
+    table: dict[str, dict] = {}
+
+    async def fake(p: Probe, ctx) -> dict:
+        await asyncio.sleep(0)
+        return dict(table.get(p.target, {}))
+
+    for kind in probe.PROBES:
+        monkeypatch.setitem(probe.PROBES, kind, fake)
+    return table
+
+
+def test_cancel_does_not_poison_later_runs(payloads):
+    runner = ProbeRunner()
+    batch = [Probe("tcp", f"192.0.2.{i}", 80) for i in range(1, 4)]
+    runner.cancel()
+    results = runner.run(batch)
+    assert not any(r.get("cancelled") for r in results)
+    assert all(r["ok"] for r in results)
+
+
+@pytest.mark.parametrize("kind, payload, ok", [
+    ("http", {"status_code": 200}, True),
+    ("http", {"status_code": 302}, True),
+    ("http", {"status_code": 404}, False),
+    ("http", {"status_code": 503}, False),
+    ("tls", {"days_left": 40, "is_expired": False}, True),
+    ("tls", {"days_left": -1, "is_expired": True}, False),
+    ("tcp", {"status": "open"}, True),
+    ("tcp", {"status": "closed"}, False),
+    ("dns", {"records": ["192.0.2.1"]}, True),
+    ("dns", {"records": [], "error": "NXDOMAIN"}, False),
+])
+def test_ok_reflects_result_status(payloads, kind, payload, ok):
+    payloads["example.com"] = payload
+    (result,) = ProbeRunner().run([Probe(kind, "example.com")])
+    assert result["ok"] is ok
@@ -0,0 +1,77 @@
+"""ProcessMonitor：PID 重用時必須重建 Process 物件並重新起算 CPU% / I/O 速率"""
+
+from __future__ import annotations
+
+from collections import namedtuple
+
+import psutil
+import pytest
+
+from sysmon.core import process_info
+
+IO = namedtuple("IO", "read_bytes write_bytes")
+MEM = namedtuple("MEM", "rss")
+
+
+class FakeProcess:
+    """模擬 psutil.Process：generation 代表 PID 目前屬於第幾個行程"""
+
+    live: dict[int, int] = {}   # pid -> 目前的 generation
+    io: dict[int, int] = {}     # pid -> 目前累計讀取位元組
+
+    def __init__(self, pid: int):
+        if pid not in self.live:
+            raise psutil.NoSuchProcess(pid)
+        self.pid = pid
+        self.generation = self.live[pid]
+
+    def is_running(self) -> bool:
+        return self.live.get(self.pid) == self.generation
+
+    def as_dict(self, attrs, ad_value=None):
+        return {
+            "pid": self.pid, "ppid": 1, "name": f"gen{self.generation}", "username": "u", "status": "running",
+            "cpu_percent": 0.0, "memory_info": MEM(1024), "num_threads": 1,
+            "io_counters": IO(self.io[self.pid], 0), "num_fds": 3,
+        }
+
+
+@pytest.fixture
+def monitor(monkeypatch):
+    FakeProcess.live, FakeProcess.io = {100: 1}, {100: 1_000_000}
+    monkeypatch.setattr(process_info.psutil, "Process", FakeProcess)
+    monkeypatch.setattr(process_info.psutil, "pids", lambda: list(FakeProcess.live))
+    return process_info.ProcessMonitor()
+
+
+def test_io_rate_between_refreshes(monitor):
+    monitor.refresh()
+    FakeProcess.io[100] += 4096
+    (row,) = monitor.refresh()
+    assert row["read_bps"] is not None and row["read_bps"] > 0
+
+
+def test_reused_pid_rebuilds_process(monitor):
+    monitor.refresh()
+    # 舊行程結束、新行程拿到同一個 PID（累計 I/O 從頭開始）
+    FakeProcess.live[100] = 2
+    FakeProcess.io[100] = 10
+    (row,) = monitor.refresh()
+    assert row["name"] == "gen2"
+    assert row["read_bps"] is None  # 不與舊行程的計數器相減
+    assert monitor._procs[100].generation == 2
+
+
+def test_exited_process_dropped(monitor):
+    monitor.refresh()
+    del FakeProcess.live[100]
+    assert monitor.refresh() == []
+    assert 100 not in monitor._procs
+
+
+def test_sort_direction_defaults(monitor):
+    FakeProcess.live, FakeProcess.io = {100: 3, 200: 1, 300: 2}, {100: 0, 200: 0, 300: 0}
+    assert [r["pid"] for r in monitor.snapshot(sort_by="pid")] == [100, 200, 300]
+    assert [r["name"] for r in monitor.snapshot(sort_by="name")] == ["gen1", "gen2", "gen3"]
+    assert [r["pid"] for r in monitor.snapshot(sort_by="pid", descending=True)] == [300, 200, 100]
+    assert [r["name"] for r in monitor.snapshot(sort_by="name", descending=True)] == ["gen3", "gen2", "gen1"]
@@ -0,0 +1,90 @@
+"""RollupStore.update：分批增量匯入必須與一次匯入全部樣本的結果相同，且每批只讀自己的時間窗"""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from sysmon.core import rollup
+from sysmon.core.rollup import RollupStore
+from sysmon.core.samplelog import SampleLogWriter
+
+FIELDS = ("cpu_percent", "net_recv_bps")
+T0 = 1_700_000_000.0
+
+
+def _samples(seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """每 5 秒一筆，中間夾一段 3 天的空白（大於 chunk_s），並含 NaN"""
+    rng = np.random.default_rng(seed)
+    ts = np.r_[T0 + np.arange(0, 20_000, 5.0), T0 + 3 * 86400 + np.arange(0, 20_000, 5.0)]
+    data = np.column_stack([rng.uniform(0, 100, len(ts)), rng.lognormal(10, 2, len(ts))])
+    data[rng.random(data.shape) < 0.01] = np.nan
+    return ts, data
+
+
+def _write(writer: SampleLogWriter, ts: np.ndarray, data: np.ndarray) -> None:
+    for t, row in zip(ts, data):
+        writer.append(float(t), row)
+    writer.flush()
+
+
+def _levels(store: RollupStore) -> list[dict[str, np.ndarray]]:
+    return [
+        {name: np.array(getattr(lv, name)) for name in ("bucket", "count", "sum", "min", "max", "hist")}
+        for lv in store.levels
+    ]
+
+
+def test_incremental_update_matches_one_shot(tmp_path, monkeypatch):
+    ts, data = _samples()
+    data = data.astype(np.float32).astype(np.float64)  # 記錄檔以 float32 儲存
+
+    batches: list[np.ndarray] = []
+    load_range = rollup.load_range
+
+    def spy(*args, **kwargs):
+        arr = load_range(*args, **kwargs)
+        batches.append(arr["ts"])
+        return arr
+
+    monkeypatch.setattr(rollup, "load_range", spy)
+
+    logs = tmp_path / "logs"
+    writer = SampleLogWriter(logs, FIELDS, rotate_s=3600)
+    incremental = RollupStore(logs, FIELDS)
+    chunk_s = 2 * 3600.0
+    for part in np.array_split(np.arange(len(ts)), 4):
+        _write(writer, ts[part], data[part])
+        assert incremental.update(chunk_s=chunk_s) == len(part)
+    writer.close()
+    assert incremental.update(chunk_s=chunk_s) == 0
+    assert incremental.hwm == ts[-1]
+
+    # 每批只載入自己的時間窗，不是 hwm 之後的全部資料
+    assert batches and all(b[-1] - b[0] < chunk_s for b in batches)
+
+    oneshot = RollupStore(tmp_path / "oneshot", FIELDS)
+    oneshot.ingest(ts, data)
+    for got, want in zip(_levels(incremental), _levels(oneshot)):
+        for name in ("bucket", "count", "min", "max", "hist"):
+            np.testing.assert_array_equal(got[name], want[name], err_msg=name)
+        np.testing.assert_allclose(got["sum"], want["sum"], rtol=1e-9)
+
+
+def test_query_after_update(tmp_path):
+    ts, data = _samples(1)
+    logs = tmp_path / "logs"
+    writer = SampleLogWriter(logs, FIELDS)
+    _write(writer, ts, data)
+    writer.close()
+    store = RollupStore(logs, FIELDS)
+    store.update()
+
+    result = RollupStore(logs, readonly=True).query(
+        "cpu_percent", T0, T0 + 20_000, points=10, aggregates=("count", "min", "max"),
+    )
+    stored = data.astype(np.float32)[: len(ts) // 2, 0]
+    finite = stored[np.isfinite(stored)]
+    assert int(np.nansum(result["count"])) == len(finite)
+    assert np.nanmin(result["min"]) == pytest.approx(finite.min())
+    assert np.nanmax(result["max"]) == pytest.approx(finite.max())
@@ -0,0 +1,51 @@
+"""取樣記錄檔：檔名與清單順序必須與時間順序一致（含日光節約時間回撥）"""
+
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from sysmon.core.samplelog import SampleLogWriter, list_log_files, load_range
+
+# 2023-11-05 美東回撥：05:30 UTC 與 06:30 UTC 的本地時間都是 01:30
+FALL_BACK = 1_699_162_200.0
+
+
+@pytest.fixture
+def new_york(monkeypatch):
+    if not hasattr(time, "tzset"):
+        pytest.skip("需要 time.tzset")
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_rotation_across_dst_fall_back(tmp_path, new_york):
+    writer = SampleLogWriter(tmp_path, ["cpu_percent"], rotate_s=1800, keep=3)
+    stamps = [FALL_BACK + i * 1200 for i in range(8)]  # 每 20 分鐘一筆，跨越回撥前後各一小時
+    for i, ts in enumerate(stamps):
+        writer.append(ts, [float(i)])
+    writer.close()
+
+    # 每 2 筆輪替一次共 4 個檔案；keep=3 只刪除最舊的檔案，其餘依時間順序讀回
+    files = list_log_files(tmp_path)
+    assert [f.name for f in files] == sorted(f.name for f in files)
+    assert load_range(tmp_path)["ts"].tolist() == stamps[2:]
+
+
+def test_legacy_local_names_sorted_by_content(tmp_path):
+    old = SampleLogWriter(tmp_path, ["cpu_percent"], keep=0)
+    old.append(1000.0, [1.0])
+    old.close()
+    # 模擬舊版以本地時間命名（比 UTC 快 8 小時）而排在新檔之後的檔名
+    legacy = tmp_path / "metrics-99991231-235959000.bin"
+    old.path.rename(legacy)
+    new = SampleLogWriter(tmp_path, ["cpu_percent"], keep=0)
+    new.append(2000.0, [2.0])
+    new.close()
+
+    assert list_log_files(tmp_path)[0] == legacy
+    assert load_range(tmp_path)["ts"].tolist() == [1000.0, 2000.0]
@@ -0,0 +1,55 @@
+"""CLI 啟動時間回歸測試：確保重量級相依套件只在實際使用的指令內匯入"""
+
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+import textwrap
+
+# 任何指令啟動時都不應載入的套件（各自只在對應指令或頁面內匯入）
+HEAVY = [
+    "streamlit", "pandas", "plotly", "numpy", "cryptography", "ipwhois",
+    "whois", "dns", "httpx", "requests", "psutil",
+]
+
+# sysmon subnet 10.0.0.0/8 從開始執行到結束的預算（不含直譯器本身啟動）
+SUBNET_BUDGET_S = 0.150
+
+
+def _run(code: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", textwrap.dedent(code)],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def _loaded(modules: list[str], names: list[str]) -> list[str]:
+    return sorted({m.split(".")[0] for m in modules} & set(names))
+
+
+def test_import_cli_is_light():
+    result = _run("""
+        import json, sys
+        import sysmon.cli
+        print(json.dumps({"modules": list(sys.modules)}))
+    """)
+    assert _loaded(result["modules"], HEAVY + ["rich"]) == []
+
+
+def test_subnet_startup_budget():
+    code = """
+        import contextlib, io, json, sys, time
+        start = time.perf_counter()
+        from sysmon.cli import app
+        with contextlib.redirect_stdout(io.StringIO()):
+            app(["subnet", "10.0.0.0/8"], standalone_mode=False)
+        elapsed = time.perf_counter() - start
+        print(json.dumps({"elapsed": elapsed, "modules": list(sys.modules)}))
+    """
+    # 取三次冷啟動中最快的一次，降低機器負載造成的誤報
+    runs = [_run(code) for _ in range(3)]
+    assert _loaded(runs[0]["modules"], HEAVY) == []
+    best = min(r["elapsed"] for r in runs)
+    assert best < SUBNET_BUDGET_S, f"subnet 啟動耗時 {best * 1000:.0f} ms"
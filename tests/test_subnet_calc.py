@@ -0,0 +1,71 @@
+"""subnet_calc 分頁與延遲展開：與 ipaddress 的 hosts() / subnets() 對照"""
+
+from __future__ import annotations
+
+import ipaddress
+import itertools
+
+import pytest
+
+from sysmon.core import subnet_calc
+
+HOST_CASES = [
+    "192.168.1.0/24", "192.168.1.0/30", "192.168.1.0/31", "192.168.1.1/32",
+    "10.0.0.0/22", "2001:db8::/120", "2001:db8::/127", "2001:db8::1/128",
+]
+
+
+@pytest.mark.parametrize("cidr", HOST_CASES)
+def test_iter_hosts_matches_ipaddress(cidr):
+    expected = [str(h) for h in ipaddress.ip_network(cidr, strict=False).hosts()]
+    assert list(subnet_calc.iter_hosts(cidr)) == expected
+    assert list(subnet_calc.iter_hosts(cidr, 1, 3)) == expected[1:3]
+
+
+@pytest.mark.parametrize("cidr", HOST_CASES)
+@pytest.mark.parametrize("page_size", [1, 7, 256])
+def test_host_pages_cover_all_hosts(cidr, page_size):
+    expected = [str(h) for h in ipaddress.ip_network(cidr, strict=False).hosts()]
+    first = subnet_calc.host_page(cidr, 1, page_size)
+    assert first["total"] == len(expected)
+    pages = [subnet_calc.host_page(cidr, p, page_size) for p in range(1, first["pages"] + 1)]
+    assert list(itertools.chain.from_iterable(p["hosts"] for p in pages)) == expected
+    assert [p["offset"] for p in pages] == [i * page_size for i in range(first["pages"])]
+
+
+def test_host_page_clamps_and_huge_networks():
+    assert subnet_calc.host_page("192.168.1.0/24", 99, 100)["page"] == 3
+    assert subnet_calc.host_page("192.168.1.0/24", 0, 100)["page"] == 1
+    huge = subnet_calc.host_page("2001:db8::/32", 2, 4)
+    assert huge["total"] == 2 ** 96 - 1
+    assert huge["hosts"] == ["2001:db8::5", "2001:db8::6", "2001:db8::7", "2001:db8::8"]
+    assert "error" in subnet_calc.host_page("not-a-cidr")
+
+
+@pytest.mark.parametrize("cidr,new_prefix", [
+    ("192.168.0.0/16", 24), ("192.168.1.0/24", 26), ("192.168.1.0/24", 32), ("2001:db8::/48", 56),
+])
+def test_split_pages_match_ipaddress(cidr, new_prefix):
+    expected = [str(n) for n in ipaddress.ip_network(cidr).subnets(new_prefix=new_prefix)]
+    first = subnet_calc.split_subnet(cidr, new_prefix, 1, 10)
+    assert first["count"] == len(expected)
+    got = []
+    for page in range(1, first["pages"] + 1):
+        got += subnet_calc.split_subnet(cidr, new_prefix, page, 10)["subnets"]
+    assert got == expected
+    for i in (0, len(expected) // 2, len(expected) - 1):
+        assert subnet_calc.subnet_at(cidr, new_prefix, i) == expected[i]
+
+
+def test_split_huge_without_expanding():
+    result = subnet_calc.split_subnet("2001:db8::/32", 128, page=3, page_size=2)
+    assert result["count"] == 2 ** 96
+    assert result["subnets"] == ["2001:db8::4/128", "2001:db8::5/128"]
+    assert subnet_calc.subnet_at("10.0.0.0/8", 30, 2 ** 22 - 1) == "10.255.255.252/30"
+
+
+def test_split_invalid():
+    assert "error" in subnet_calc.split_subnet("10.0.0.0/24", 24)
+    assert "error" in subnet_calc.split_subnet("10.0.0.0/24", 33)
+    with pytest.raises(ValueError):
+        subnet_calc.subnet_at("10.0.0.0/24", 26, 4)
@@ -0,0 +1,23 @@
+"""counter_delta：只有舊值接近 2^32 才視為 32 位元溢位，其餘變小視為重置"""
+
+from __future__ import annotations
+
+import pytest
+
+from sysmon.core.system_info import counter_delta
+
+WRAP = 2 ** 32
+
+
+def test_increase():
+    assert counter_delta(1_500, 1_000) == 500
+
+
+@pytest.mark.parametrize("old, new", [(WRAP - 100, 50), (WRAP * 3 // 4 + 1, 0)])
+def test_wrap_near_32bit_limit(old, new):
+    assert counter_delta(new, old) == new + WRAP - old
+
+
+@pytest.mark.parametrize("old, new", [(10_000, 200), (WRAP * 3 // 4, 5), (WRAP * 10, 1_000)])
+def test_reset_returns_new_value(old, new):
+    assert counter_delta(new, old) == new
@@ -0,0 +1,142 @@
+"""tracing：手工組出的 OTLP/JSON 必須是合法 JSON 且結構正確；佇列上限與關閉時寫出"""
+
+from __future__ import annotations
+
+import json
+import socket
+
+import pytest
+
+from sysmon.core import instrument, tracing
+from sysmon.core.probe import Probe, ProbeRunner
+
+
+@pytest.fixture(autouse=True)
+def _reset(monkeypatch):
+    monkeypatch.delenv("TRACEPARENT", raising=False)
+    yield
+    instrument.set_tracer(None)
+    instrument.enable(False)
+    instrument.reset()
+
+
+class ListExporter:
+    def __init__(self):
+        self.payloads: list[str] = []
+
+    def export(self, payload: str) -> None:
+        self.payloads.append(payload)
+
+
+def _spans(payload: str) -> list[dict]:
+    request = json.loads(payload)
+    (resource_spans,) = request["resourceSpans"]
+    (scope_spans,) = resource_spans["scopeSpans"]
+    assert scope_spans["scope"]["name"] == "sysmon.core"
+    return scope_spans["spans"]
+
+
+def _by_name(payload: str) -> dict[str, dict]:
+    return {s["name"]: s for s in _spans(payload)}
+
+
+def _attrs(span: dict) -> dict[str, dict]:
+    return {a["key"]: a["value"] for a in span["attributes"]}
+
+
+def test_exported_line_is_valid_otlp(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    processor = tracing.start(str(path))
+    target = 'say "hi" \\ C:\\path'
+    with instrument.span("probe.tcp", target=target):
+        with instrument.span("tcp.connect", target=target) as sp:
+            sp.set(port=443, cached=True, ratio=0.5, error='refused "x"')
+    tracing.stop(processor)
+
+    (line,) = path.read_text(encoding="utf-8").splitlines()
+    spans = _by_name(line)
+    parent, child = spans["probe.tcp"], spans["tcp.connect"]
+    assert child["traceId"] == parent["traceId"] and len(parent["traceId"]) == 32
+    assert child["parentSpanId"] == parent["spanId"] and len(parent["spanId"]) == 16
+    assert "parentSpanId" not in parent
+    assert int(child["endTimeUnixNano"]) >= int(child["startTimeUnixNano"])
+    assert child["kind"] == 3
+
+    attrs = _attrs(child)
+    assert attrs["sysmon.target"] == {"stringValue": target}
+    assert attrs["sysmon.tool"] == {"stringValue": "tcp"}
+    assert attrs["sysmon.phase"] == {"stringValue": "connect"}
+    assert attrs["sysmon.port"] == {"intValue": "443"}
+    assert attrs["sysmon.cached"] == {"boolValue": True}
+    assert attrs["sysmon.ratio"] == {"doubleValue": 0.5}
+    assert attrs["sysmon.outcome"] == {"stringValue": "error"}
+    assert "sysmon.error" not in attrs
+    assert child["status"] == {"code": 2, "message": 'refused "x"'}
+    assert parent["status"] == {"code": 1}
+    assert _attrs(parent)["sysmon.outcome"] == {"stringValue": "ok"}
+    assert processor.exported == 2 and processor.dropped == 0
+
+
+def test_traceparent_becomes_parent(tmp_path, monkeypatch):
+    monkeypatch.setenv("TRACEPARENT", f"00-{'ab' * 16}-{'cd' * 8}-01")
+    path = tmp_path / "spans.jsonl"
+    processor = tracing.start(str(path))
+    with instrument.span("dns.resolve", target="example.com"):
+        pass
+    tracing.stop(processor)
+    span = _by_name(path.read_text(encoding="utf-8"))["dns.resolve"]
+    assert span["traceId"] == "ab" * 16 and span["parentSpanId"] == "cd" * 8
+
+
+@pytest.mark.parametrize("value", [None, "", "00-abc-def-01", f"00-{'0' * 32}-{'cd' * 8}-01", f"00-{'zz' * 16}-{'cd' * 8}-01"])
+def test_parse_traceparent_invalid(value):
+    assert tracing.parse_traceparent(value) is None
+
+
+def test_queue_overflow_counts_dropped():
+    exporter = ListExporter()
+    processor = tracing.BatchSpanProcessor(exporter, max_batch=100, interval=60, max_queue=3)
+    for i in range(5):
+        processor.add((1, i + 1, None, "dns.resolve", 0, 1, {}))
+    assert processor.dropped == 2
+    processor.shutdown()
+    assert processor.exported == 3
+    assert [s["spanId"] for p in exporter.payloads for s in _spans(p)] == [f"{i:016x}" for i in (1, 2, 3)]
+
+
+def test_shutdown_flushes_in_batches():
+    exporter = ListExporter()
+    processor = tracing.BatchSpanProcessor(exporter, max_batch=100, interval=60)
+    for i in range(10):
+        processor.add((1, i + 1, None, "tcp.connect", 0, 1, {}))
+    assert exporter.payloads == []
+    processor.max_batch = 4  # 未達批次大小也未到間隔，剩餘的 span 全靠 shutdown 寫出
+    processor.shutdown()
+    assert [len(_spans(p)) for p in exporter.payloads] == [4, 4, 2]
+    assert processor.exported == 10
+
+
+def test_exporter_failure_counts_dropped():
+    class Failing:
+        def export(self, payload: str) -> None:
+            raise OSError("collector down")
+
+    processor = tracing.BatchSpanProcessor(Failing(), interval=60)
+    processor.add((1, 1, None, "http.request", 0, 1, {}))
+    processor.shutdown()
+    assert (processor.exported, processor.dropped, processor.last_error) == (0, 1, "collector down")
+
+
+def test_closed_port_probe_span_is_error():
+    class Collect(list):
+        add = list.append
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    tracer = Collect()
+    instrument.set_tracer(tracer)
+    (result,) = ProbeRunner(timeout=2).run([Probe("tcp", "127.0.0.1", port)])
+    assert result["status"] == "closed"
+    errors = {name: attrs.get("error") for *_, name, _, _, attrs in tracer}
+    assert errors["tcp.connect"] and errors["probe.tcp"]